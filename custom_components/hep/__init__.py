@@ -3,13 +3,16 @@ import logging
 from datetime import datetime
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.exceptions import HomeAssistantError
 import voluptuous as vol
 from homeassistant.helpers import config_validation as cv
 
-from .const import DOMAIN, CONF_USERNAME, CONF_PASSWORD
-from .api import HepApiClient, HepOmmClient
+from .const import DOMAIN, DATA_OMM_CLIENTS, DATA_OMM_QUEUE, CONF_USERNAME, CONF_PASSWORD, CONF_TRACE_REQUESTS, DEFAULT_TRACE_REQUESTS, CONF_HISTORY_MONTHS, DEFAULT_HISTORY_MONTHS
+from .api import HepApiClient, HepOmmClientRegistry
+from .store import HepSnapshotStore
+from .submissions import HepSubmissionQueue
+from .tracing import HepRequestTracer, OMM_TRACER
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,11 +21,16 @@ PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 # Service schemas
 SERVICE_SUBMIT_OMM_READING = "submit_omm_reading"
 SERVICE_FORCE_SUBMIT_OMM_READING = "force_submit_omm_reading"
+SERVICE_SUBMIT_OMM_READINGS = "submit_omm_readings"
+SERVICE_QUEUE_OMM_READING = "queue_omm_reading"
 
 ATTR_OMM_ID = "omm_id"
 ATTR_TARIFA1 = "tarifa1"
 ATTR_TARIFA2 = "tarifa2"
 ATTR_READING_DATE = "reading_date"
+ATTR_READINGS = "readings"
+ATTR_FORCE = "force"
+ATTR_DRY_RUN = "dry_run"
 
 SERVICE_SUBMIT_SCHEMA = vol.Schema({
     vol.Required(ATTR_OMM_ID): cv.string,
@@ -30,6 +38,20 @@ SERVICE_SUBMIT_SCHEMA = vol.Schema({
     vol.Required(ATTR_TARIFA2): vol.All(vol.Coerce(int), vol.Range(min=1)),
 })
 
+SERVICE_SUBMIT_BATCH_SCHEMA = vol.Schema({
+    vol.Required(ATTR_READINGS): vol.All(cv.ensure_list, vol.Length(min=1), [vol.Schema({
+        vol.Required(ATTR_OMM_ID): cv.string,
+        vol.Required(ATTR_TARIFA1): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Required(ATTR_TARIFA2): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_FORCE, default=False): cv.boolean,
+    })]),
+    vol.Optional(ATTR_DRY_RUN, default=False): cv.boolean,
+})
+
+SERVICE_QUEUE_SCHEMA = SERVICE_SUBMIT_SCHEMA.extend({
+    vol.Optional(ATTR_FORCE, default=False): cv.boolean,
+})
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up HEP from a config entry."""
     hass.data.setdefault(DOMAIN, {})
@@ -38,21 +60,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     password = entry.data[CONF_PASSWORD]
 
     # Initialize API client
-    # We can pass the shared aiohttp session from HA
-    session = None # hass.helpers.aiohttp_client.async_get_clientsession(hass) # Not available in this mock env, but standard practice
-    # For now, we let the client create its own session if None, or we could try to import the helper if we were in a real HA env.
-    # To keep it simple and working with the mock requirements, we'll instantiate it.
-    
-    client = HepApiClient(username, password)
+    # The client owns one pooled session per config entry so login cookies
+    # never leak into HA's shared session; it is closed on unload.
+    tracer = HepRequestTracer() if entry.options.get(CONF_TRACE_REQUESTS, DEFAULT_TRACE_REQUESTS) else None
+    history_months = entry.options.get(CONF_HISTORY_MONTHS, DEFAULT_HISTORY_MONTHS)
+    client = HepApiClient(username, password, tracer=tracer, history_months=history_months or None)
     
     # Store the client in hass.data for platforms to access
     hass.data[DOMAIN][entry.entry_id] = client
 
+    def omm_tracer():
+        """Trace OMM requests while any config entry has tracing enabled."""
+        if any(client.tracer is not None for client in hass.data[DOMAIN].values()):
+            return OMM_TRACER
+        return None
+
+    def omm_clients() -> HepOmmClientRegistry:
+        """Return the OMM client registry, keeping sessions and form tokens between calls."""
+        registry = hass.data.get(DATA_OMM_CLIENTS)
+        if registry is None:
+            registry = hass.data[DATA_OMM_CLIENTS] = HepOmmClientRegistry(tracer=omm_tracer())
+        return registry
+
+    def omm_client(omm_id: str):
+        """Return the cached OMM client of omm_id."""
+        return omm_clients().get(omm_id)
+
+    # The submission queue is shared by all entries and resumes flushing what was left queued
+    if DATA_OMM_QUEUE not in hass.data:
+        queue = hass.data[DATA_OMM_QUEUE] = HepSubmissionQueue(hass, omm_clients)
+        await queue.async_load()
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
     # Register options update listener
     entry.async_on_unload(entry.add_update_listener(update_listener))
-    
+
     # Register services
     async def handle_submit_omm_reading(call: ServiceCall) -> None:
         """Handle submit OMM reading service call."""
@@ -61,11 +104,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         tarifa2 = call.data[ATTR_TARIFA2]
         reading_date = datetime.now().strftime("%d.%m.%Y.")
         
-        # Create OMM client
-        omm_client = HepOmmClient(omm_id)
-        
         # Submit reading
-        success = await omm_client.send_reading(reading_date, tarifa1, tarifa2, force_send=False)
+        success = await omm_client(omm_id).send_reading(reading_date, tarifa1, tarifa2, force_send=False)
         
         if not success:
             raise HomeAssistantError(
@@ -81,11 +121,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         tarifa2 = call.data[ATTR_TARIFA2]
         reading_date = datetime.now().strftime("%d.%m.%Y.")
         
-        # Create OMM client
-        omm_client = HepOmmClient(omm_id)
-        
         # Force submit reading
-        success = await omm_client.send_reading(reading_date, tarifa1, tarifa2, force_send=True)
+        success = await omm_client(omm_id).send_reading(reading_date, tarifa1, tarifa2, force_send=True)
         
         if not success:
             raise HomeAssistantError(
@@ -93,6 +130,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 "Please check the reading values and try again."
             )
     
+    async def handle_submit_omm_readings(call: ServiceCall) -> ServiceResponse:
+        """Handle batch submit OMM readings service call."""
+        readings = [
+            (reading[ATTR_OMM_ID], reading[ATTR_TARIFA1], reading[ATTR_TARIFA2], reading[ATTR_FORCE])
+            for reading in call.data[ATTR_READINGS]
+        ]
+        reading_date = datetime.now().strftime("%d.%m.%Y.")
+
+        results = await omm_clients().async_submit_batch(readings, reading_date, dry_run=call.data[ATTR_DRY_RUN])
+
+        return {
+            "results": [
+                {"omm_id": result.omm_id, "result": result.result, "opis": result.opis}
+                for result in results
+            ]
+        }
+
+    async def handle_queue_omm_reading(call: ServiceCall) -> None:
+        """Handle queue OMM reading service call."""
+        reading_date = datetime.now().strftime("%d.%m.%Y.")
+
+        queue = hass.data.get(DATA_OMM_QUEUE)
+        if queue is None:
+            raise HomeAssistantError("HEP integration is not loaded")
+
+        # Stored right away; HEP is contacted in the background
+        queued = await queue.async_enqueue(
+            call.data[ATTR_OMM_ID], reading_date, call.data[ATTR_TARIFA1], call.data[ATTR_TARIFA2], call.data[ATTR_FORCE]
+        )
+
+        if not queued:
+            raise HomeAssistantError(
+                f"A reading for {call.data[ATTR_OMM_ID]} was already submitted today. "
+                "Queue it with force to replace it."
+            )
+
     # Register services only once (for the first config entry)
     if not hass.services.has_service(DOMAIN, SERVICE_SUBMIT_OMM_READING):
         hass.services.async_register(
@@ -110,6 +183,23 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             schema=SERVICE_SUBMIT_SCHEMA,
         )
 
+    if not hass.services.has_service(DOMAIN, SERVICE_SUBMIT_OMM_READINGS):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_SUBMIT_OMM_READINGS,
+            handle_submit_omm_readings,
+            schema=SERVICE_SUBMIT_BATCH_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_QUEUE_OMM_READING):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_QUEUE_OMM_READING,
+            handle_queue_omm_reading,
+            schema=SERVICE_QUEUE_SCHEMA,
+        )
+
     return True
 
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
@@ -119,6 +209,18 @@ async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        client = hass.data[DOMAIN].pop(entry.entry_id)
+        await client.async_close()
+        # The OMM clients and queue are shared by all entries; drop them with the last one
+        if not hass.data[DOMAIN] and (queue := hass.data.pop(DATA_OMM_QUEUE, None)):
+            await queue.async_shutdown()
+        if not hass.data[DOMAIN] and (registry := hass.data.pop(DATA_OMM_CLIENTS, None)):
+            await registry.async_close()
 
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the cached snapshot of a removed config entry, and the submission queue with the last entry."""
+    await HepSnapshotStore(hass, entry.entry_id).async_remove()
+    if not any(other.entry_id != entry.entry_id for other in hass.config_entries.async_entries(DOMAIN)):
+        await HepSubmissionQueue(hass, lambda: None).async_remove()
@@ -1,11 +1,54 @@
 """API Client for HEP."""
+import asyncio
+import base64
+import hashlib
 import logging
 import aiohttp
 import async_timeout
-from typing import List
-import re
+from datetime import date
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple
+import random
 import time
-from .models import HepUser, HepPrices, HepBillingInfo, HepConsumption, HepWarning, HepOmmCheck, HepOmmCheckResult, HepReadingSubmissionResult
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+# orjson ships with Home Assistant; the stdlib decoder keeps the clients usable without it
+try:
+    from orjson import loads as decode_json
+except ImportError:
+    from json import loads as decode_json
+
+from .const import (
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_STREAM_CHUNK_SIZE,
+    AUTH_SESSION_LIFETIME,
+    AUTH_RENEW_MARGIN,
+    RETRY_ATTEMPTS,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    OMM_CLIENT_CACHE_SIZE,
+    OMM_PAGE_DRAIN_LIMIT,
+    OMM_BATCH_CONCURRENCY,
+    OMM_RATE_LIMIT,
+    OMM_RATE_BURST,
+    OMM_RESULT_ACCEPTED,
+    OMM_RESULT_NEEDS_FORCE,
+    OMM_RESULT_REJECTED,
+    OMM_RESULT_FAILED,
+    OMM_RESULT_VALID,
+    OMM_RESULT_UNCHECKED,
+    OMM_CHECK_TTL,
+)
+from .metrics import HepRequestMetrics, OMM_METRICS
+from .tracing import HepRequestTracer, chunk_received, iter_chunked
+from .models import HepUser, HepPrices, HepBalance, HepBill, HepBillingInfo, HepConsumption, HepWarning, HepOmmCheck, HepOmmCheckResult, HepReadingSubmissionResult, HepOmmSubmission
+from .streaming import FormTokenScanner, JsonArrayStream
 
 # Configure logging
 logging.basicConfig(
@@ -14,17 +57,316 @@ logging.basicConfig(
 )
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = "https://mojracun.hep.hr/elektra/v1/api"
+DEFAULT_OMM_BASE_URL = "https://mojamreza.hep.hr"
+
+# Elements of the OMM page holding the check and delivery forms
+_CHECK_FORM_ID = "Provjera_Omm_Form_Div"
+_DELIVERY_FORM_ID = "Dostava_Omm_Div"
+
+
+class HepSessionExpired(Exception):
+    """Raised when HEP rejects a request because the login session is no longer valid."""
+
+
+class HepTransientError(Exception):
+    """Raised for responses worth retrying: HTTP 429 and 5xx."""
+
+
+class HepCircuitOpen(Exception):
+    """Raised instead of sending a request while the host's circuit is open."""
+
+
+class HepInvalidReading(Exception):
+    """Raised instead of submitting readings that do not fit the OMM's check."""
+
+
+# Failures that may pass on their own; anything else is not retried
+TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+    HepTransientError,
+)
+
+
+class HepCircuitBreaker:
+    """Stops requests to a host after repeated transient failures.
+
+    After CIRCUIT_FAILURE_THRESHOLD consecutive failures the circuit opens
+    and requests fail fast with HepCircuitOpen. Once CIRCUIT_RESET_TIMEOUT
+    has passed the circuit is half open and lets one trial through: its
+    success closes the circuit, its failure opens it again, and everyone
+    else keeps failing fast meanwhile. The task that made the trial may
+    send more requests, such as a login before the trial fetch. A trial
+    that never reports back is given up once its task is done or after
+    another CIRCUIT_RESET_TIMEOUT.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        """Initialize."""
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = None
+        # Task and monotonic start of the trial request while half open
+        self._trial_task = None
+        self._trial_at = None
+
+    @property
+    def state(self) -> str:
+        """closed, open or half_open."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self._reset_timeout:
+            return "open"
+        return "half_open"
+
+    def check(self) -> None:
+        """Raise HepCircuitOpen unless a request may be sent now."""
+        state = self.state
+        if state == "open":
+            raise HepCircuitOpen("HEP circuit open after repeated failures")
+        if state == "half_open":
+            task = asyncio.current_task()
+            now = time.monotonic()
+            if (
+                self._trial_task is not None
+                and self._trial_task is not task
+                and not self._trial_task.done()
+                and now - self._trial_at < self._reset_timeout
+            ):
+                raise HepCircuitOpen("HEP circuit half open, waiting for the trial request")
+            if self._trial_task is not task:
+                _LOGGER.debug("HEP circuit half open, sending a trial request")
+                self._trial_task = task
+                self._trial_at = now
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            _LOGGER.info("HEP responding again, closing circuit")
+        self.failures = 0
+        self._opened_at = None
+        self._trial_task = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_task = None
+        if self._opened_at is not None or self.failures >= self._failure_threshold:
+            if self._opened_at is None:
+                _LOGGER.warning("HEP failed %d times in a row, opening circuit for %ss", self.failures, self._reset_timeout)
+            self._opened_at = time.monotonic()
+
+
+# One breaker per host, shared by every client in the process
+_CIRCUIT_BREAKERS = {}
+
+
+def get_circuit_breaker(url: str) -> HepCircuitBreaker:
+    """Return the circuit breaker of url's host."""
+    host = urlsplit(url).netloc
+    breaker = _CIRCUIT_BREAKERS.get(host)
+    if breaker is None:
+        breaker = _CIRCUIT_BREAKERS[host] = HepCircuitBreaker()
+    return breaker
+
+
+class HepRateLimiter:
+    """Spaces requests to a host to at most rate per second, allowing bursts of burst.
+
+    A request reserves the next free slot before it waits, so concurrent
+    callers are queued in order without a lock.
+    """
+
+    def __init__(self, rate: float = OMM_RATE_LIMIT, burst: int = OMM_RATE_BURST):
+        """Initialize."""
+        self._interval = 1 / rate
+        self._burst = burst
+        # When the next request would be due if requests were evenly spaced
+        self._due = 0.0
+        self.delayed = 0
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        now = time.monotonic()
+        due = max(self._due, now)
+        self._due = due + self._interval
+        wait = due - (self._burst - 1) * self._interval - now
+        if wait > 0:
+            self.delayed += 1
+            await asyncio.sleep(wait)
+
+
+# One limiter per host, shared by every OMM client in the process
+_RATE_LIMITERS = {}
+
+
+def get_rate_limiter(url: str) -> HepRateLimiter:
+    """Return the rate limiter of url's host."""
+    host = urlsplit(url).netloc
+    limiter = _RATE_LIMITERS.get(host)
+    if limiter is None:
+        limiter = _RATE_LIMITERS[host] = HepRateLimiter()
+    return limiter
+
+
+def _submission_outcome(omm_id: str, result: Optional[HepReadingSubmissionResult]) -> HepOmmSubmission:
+    """Classify HEP's answer to one submission."""
+    if result is None:
+        return HepOmmSubmission(omm_id, OMM_RESULT_FAILED, "No valid answer from HEP")
+    if result.status != 1:
+        return HepOmmSubmission(omm_id, OMM_RESULT_REJECTED, result.opis)
+    if result.posalji != 0:
+        return HepOmmSubmission(omm_id, OMM_RESULT_NEEDS_FORCE, result.opis)
+    return HepOmmSubmission(omm_id, OMM_RESULT_ACCEPTED, result.opis)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number attempt + 1."""
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt))
+
+
+def _token_lifetime(token: Optional[str]) -> Optional[float]:
+    """Return seconds until a JWT login token expires, or None if it has no readable expiry."""
+    if not token or token.count(".") != 2:
+        return None
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = decode_json(base64.urlsafe_b64decode(payload)).get("exp")
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(exp, (int, float)):
+        return None
+    return exp - time.time()
+
+
+@dataclass(slots=True)
+class _CachedResponse:
+    """Last response of one endpoint URL and the model built from it."""
+    digest: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    model: object
+
+
+def create_client_session(tracer: Optional[HepRequestTracer] = None, cookie_jar=None) -> aiohttp.ClientSession:
+    """Create a pooled session with a connector tuned for HEP endpoints.
+
+    Connections are kept alive between refreshes and DNS lookups are cached,
+    so a refresh reuses one TLS connection instead of opening one per call.
+    With a tracer, every request's phase timings are recorded into it.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(connector=connector, cookie_jar=cookie_jar, trace_configs=_trace_configs(tracer))
+
+
+def _trace_configs(tracer: Optional[HepRequestTracer]) -> Optional[list]:
+    return [tracer.trace_config] if tracer is not None else None
+
+
+@dataclass(frozen=True, slots=True)
+class _HistoryEndpoint:
+    """How to build the model of an endpoint returning a long, newest-first history."""
+    key: Optional[str]  # object member holding the rows, None if the body is the row array
+    model: type  # row model
+    month: Callable  # "YYYY-MM" of a row dict, for the date cutoff
+    finish: Callable  # (row models, other object members) -> model
+
+
+def _bill_month(data: dict) -> str:
+    return (data.get("datum") or "")[:7]
+
+
+def _consumption_month(data: dict) -> str:
+    # razdoblje is "MM.YYYY"
+    month, _, year = (data.get("razdoblje") or "").partition(".")
+    return f"{year}-{month}"
+
+
+_BILLING_HISTORY = _HistoryEndpoint(
+    key="promet",
+    model=HepBill,
+    month=_bill_month,
+    finish=lambda bills, members: HepBillingInfo(bills=bills, balance=HepBalance.from_dict(members.get("saldo", {}))),
+)
+_CONSUMPTION_HISTORY = _HistoryEndpoint(
+    key=None,
+    model=HepConsumption,
+    month=_consumption_month,
+    finish=lambda rows, members: rows,
+)
+
+
+class _HistoryLimit:
+    """Row cap and month cutoff, applied to history rows as they are parsed."""
+
+    def __init__(self, month: Callable, max_rows: Optional[int], since: Optional[str]):
+        """Initialize."""
+        self._month = month
+        self._max_rows = max_rows
+        self._since = since
+        self.kept = 0
+
+    def keep(self, data: dict) -> bool:
+        if self._max_rows is not None and self.kept >= self._max_rows:
+            return False
+        if self._since is not None and self._month(data) < self._since:
+            return False
+        self.kept += 1
+        return True
+
+
+def _build_warnings(data) -> Tuple[HepWarning, ...]:
+    return HepWarning.from_rows(data)
+
+
 class HepApiClient:
     """HEP API Client."""
 
-    def __init__(self, username, password, session=None):
-        """Initialize the API client."""
+    def __init__(
+        self,
+        username,
+        password,
+        session=None,
+        base_url=DEFAULT_BASE_URL,
+        tracer: Optional[HepRequestTracer] = None,
+        history_max_rows: Optional[int] = None,
+        history_months: Optional[int] = None,
+    ):
+        """Initialize the API client.
+
+        If no session is given, the client creates and owns a pooled session
+        which must be released with async_close(). A tracer only applies to
+        the owned session. Billing and consumption history can be limited to
+        the newest history_max_rows rows and to the last history_months
+        months, counting the current one.
+        """
         self._username = username
         self._password = password
         self._session = session
+        self._owns_session = session is None
         self._user_data = None
         self._cookies = {}
-        self._base_url = "https://mojracun.hep.hr/elektra/v1/api"
+        self._token = None
+        self._auth_expires_at = None
+        self._auth_generation = 0
+        self._logged_in_at = None
+        self._auth_lock = asyncio.Lock()
+        self._renew_task = None
+        self._base_url = base_url
+        self._circuit_breaker = get_circuit_breaker(base_url)
+        self._metrics = HepRequestMetrics()
+        self._tracer = tracer
+        self._history_max_rows = history_max_rows
+        self._history_months = history_months
+        # Last response per URL, so unchanged payloads are neither parsed nor rebuilt
+        self._response_cache = {}
         self._headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36",
             "Content-Type": "application/json",
@@ -33,20 +375,227 @@ class HepApiClient:
             "Accept-Language": "en-GB,en-US;q=0.9,en;q=0.8",
         }
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the long-lived session, creating the owned one on first use."""
+        if self._session is None or (self._owns_session and self._session.closed):
+            self._session = create_client_session(self._tracer)
+            self._owns_session = True
+        return self._session
+
+    async def async_close(self) -> None:
+        """Close the owned session and release pooled connections."""
+        if self._renew_task is not None and not self._renew_task.done():
+            self._renew_task.cancel()
+        self._renew_task = None
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._owns_session:
+            self._session = None
+
+    @property
+    def session_expires_in(self) -> Optional[float]:
+        """Seconds until the login session is considered expired, None if not logged in."""
+        if self._auth_expires_at is None:
+            return None
+        return self._auth_expires_at - time.monotonic()
+
+    @property
+    def is_session_valid(self) -> bool:
+        """Return True if the current login session can be reused."""
+        expires_in = self.session_expires_in
+        return self._user_data is not None and expires_in is not None and expires_in > 0
+
+    @property
+    def last_login(self) -> Optional[float]:
+        """Monotonic time of the last successful login, which also refreshed the user data."""
+        return self._logged_in_at
+
+    def invalidate_session(self) -> None:
+        """Forget the login session so the next call logs in again."""
+        self._auth_expires_at = None
+
     async def authenticate(self) -> bool:
         """Authenticate with the API and fetch data."""
         try:
-            if self._session is None:
-                async with aiohttp.ClientSession() as session:
-                    return await self._authenticate_with_session(session)
-            else:
-                return await self._authenticate_with_session(self._session)
+            async with self._auth_lock:
+                return await self._authenticate_with_session(self._get_session())
         except Exception as e:
             _LOGGER.error("Authentication failed: %s", e)
             return False
 
+    async def async_ensure_authenticated(self) -> bool:
+        """Reuse the login session while valid, logging in only when it has expired.
+
+        A session close to expiry is renewed in the background, so callers
+        keep using the current cookies instead of waiting for a login.
+        """
+        if self.is_session_valid:
+            if self.session_expires_in < AUTH_RENEW_MARGIN:
+                self.async_renew_in_background()
+            return True
+
+        async with self._auth_lock:
+            # Another caller may have logged in while we waited for the lock
+            if self.is_session_valid:
+                return True
+            try:
+                return await self._authenticate_with_session(self._get_session())
+            except Exception as e:
+                _LOGGER.error("Authentication failed: %s", e)
+                return False
+
+    def async_renew_in_background(self) -> None:
+        """Start a login in the background unless one is already running."""
+        if self._renew_task is None or self._renew_task.done():
+            self._renew_task = asyncio.create_task(self.authenticate())
+
+    @property
+    def metrics(self) -> HepRequestMetrics:
+        """Per-endpoint request metrics of this client."""
+        return self._metrics
+
+    @property
+    def tracer(self) -> Optional[HepRequestTracer]:
+        """Request tracer of this client, None unless tracing is enabled."""
+        return self._tracer
+
+    @property
+    def circuit_breaker(self) -> HepCircuitBreaker:
+        """The circuit breaker of the HEP host this client talks to."""
+        return self._circuit_breaker
+
+    async def _async_authenticated_call(self, endpoint: str, fetch, *args):
+        """Run a GET fetch, retrying transient failures with jittered exponential backoff.
+
+        Each attempt goes through the host's circuit breaker; an open circuit
+        or the last failed attempt raises to the caller.
+        """
+        for attempt in range(RETRY_ATTEMPTS):
+            self._circuit_breaker.check()
+            try:
+                result = await self._async_authenticated_attempt(fetch, *args)
+            except TRANSIENT_ERRORS as e:
+                self._circuit_breaker.record_failure()
+                if attempt == RETRY_ATTEMPTS - 1 or self._circuit_breaker.state != "closed":
+                    raise
+                delay = _backoff_delay(attempt)
+                self._metrics.record_retry(endpoint)
+                _LOGGER.debug("Transient error (%s), retrying in %.1fs", e or type(e).__name__, delay)
+                await asyncio.sleep(delay)
+            else:
+                self._circuit_breaker.record_success()
+                return result
+
+    async def _async_authenticated_attempt(self, fetch, *args):
+        """Run a fetch on the current session, logging in again once if HEP rejects it."""
+        if not await self.async_ensure_authenticated():
+            raise Exception("Not authenticated")
+        generation = self._auth_generation
+        try:
+            return await fetch(self._get_session(), *args)
+        except HepSessionExpired:
+            _LOGGER.debug("Session rejected by HEP, logging in again")
+            # Concurrent calls may all be rejected; only the first one invalidates the session
+            if generation == self._auth_generation:
+                self.invalidate_session()
+            if not await self.async_ensure_authenticated():
+                raise Exception("Not authenticated")
+            return await fetch(self._get_session(), *args)
+
+    def _conditional_headers(self, url: str) -> dict:
+        """Validators of the cached response for url, for a conditional GET."""
+        cached = self._response_cache.get(url)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def _not_modified(self, url: str, response):
+        """Return the model cached for url after a 304 Not Modified."""
+        response.release()
+        return self._response_cache[url].model
+
+    def _build_cached(self, url: str, headers, body: bytes, build):
+        """Build the model from a 200 response body, unless it hashes the same as last time.
+
+        An unchanged body returns the very same model object, so the
+        coordinator can tell by identity that nothing changed.
+        """
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        cached = self._response_cache.get(url)
+        if cached is not None and cached.digest == digest:
+            model = cached.model
+        else:
+            model = build(decode_json(body))
+        self._response_cache[url] = _CachedResponse(
+            digest=digest,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            model=model,
+        )
+        return model
+
+    def _history_limit(self, history: _HistoryEndpoint) -> _HistoryLimit:
+        since = None
+        if self._history_months:
+            # Counted from today, so the window moves along while HA keeps running
+            today = date.today()
+            index = today.year * 12 + today.month - self._history_months
+            since = f"{index // 12:04d}-{index % 12 + 1:02d}"
+        return _HistoryLimit(history.month, self._history_max_rows, since)
+
+    async def _stream_history(self, url: str, response, history: _HistoryEndpoint):
+        """Build a history model while the body downloads, returning it and the body size.
+
+        Rows are parsed as they arrive and rows outside the history window
+        are dropped right away, so memory stays bounded by the rows kept
+        rather than the size of the body. The kept rows are only built into
+        models once the whole body is hashed, and not at all if it hashes
+        the same as the cached one.
+        """
+        cached = self._response_cache.get(url)
+        stream = JsonArrayStream(history.key)
+        limit = self._history_limit(history)
+        digest = hashlib.blake2b(digest_size=16)
+        size = 0
+        kept = []
+
+        def add(items) -> None:
+            for item in items:
+                if limit.keep(item):
+                    kept.append(item)
+
+        async for chunk in iter_chunked(response, HTTP_STREAM_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+            add(stream.feed(chunk))
+
+        digest = digest.digest()
+        if cached is not None and cached.digest == digest:
+            model = cached.model
+        else:
+            add(stream.close())
+            if kept:
+                history.model.validate(kept[0])
+            model = history.finish(tuple(history.model.from_dict(item) for item in kept), stream.members)
+        self._response_cache[url] = _CachedResponse(
+            digest=digest,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            model=model,
+        )
+        return model, size
+
     async def _authenticate_with_session(self, session) -> bool:
         """Internal authentication logic."""
+        self._circuit_breaker.check()
+        start = time.monotonic()
+        received = None
+        status = None
+        size = None
         try:
             async with async_timeout.timeout(10):
                 payload = {
@@ -59,201 +608,300 @@ class HepApiClient:
                     json=payload,
                     headers=self._headers,
                 )
+                status = response.status
                 if response.status == 200:
-                    data = await response.json()
+                    body = await response.read()
+                    received = time.monotonic()
+                    size = len(body)
+                    data = decode_json(body)
                     self._token = data.get("token")
                     self._user_data = HepUser.from_dict(data)
+
+                    lifetime = _token_lifetime(self._token)
+                    if lifetime is None:
+                        lifetime = AUTH_SESSION_LIFETIME
+                    self._logged_in_at = time.monotonic()
+                    self._auth_expires_at = self._logged_in_at + lifetime
+                    self._auth_generation += 1
                     
                     # Capture cookies from the session cookie jar
-                    # This is crucial because we might be using a temporary session
+                    # This keeps requests authenticated even on a session shared with other integrations
                     for cookie in session.cookie_jar:
                         self._cookies[cookie.key] = cookie.value
                     
+                    self._circuit_breaker.record_success()
                     return True
                 else:
                     _LOGGER.error("Login failed with status: %s", response.status)
+                    response.release()
+                    if response.status == 429 or response.status >= 500:
+                        self._circuit_breaker.record_failure()
                     return False
+        except TRANSIENT_ERRORS as e:
+            self._circuit_breaker.record_failure()
+            _LOGGER.error("Error during authentication: %s", e)
+            raise
         except Exception as e:
             _LOGGER.error("Error during authentication: %s", e)
             raise
+        finally:
+            self._metrics.record("prijava", status, (received or time.monotonic()) - start, size)
 
     async def get_data(self) -> HepUser:
         """Fetch data from the API."""
         # In this API, login returns the data.
         if not self._user_data:
-            if not await self.authenticate():
+            if not await self.async_ensure_authenticated():
                 raise Exception("Not authenticated")
         
         return self._user_data
 
-    async def get_prices(self) -> HepPrices:
+    async def get_prices(self) -> Optional[HepPrices]:
         """Fetch pricing data from the API."""
-        if not self._user_data:
-             if not await self.authenticate():
-                raise Exception("Not authenticated")
-
         try:
-            if self._session is None:
-                async with aiohttp.ClientSession() as session:
-                    return await self._get_prices_with_session(session)
-            else:
-                return await self._get_prices_with_session(self._session)
+            return await self._async_authenticated_call("cjenik", self._get_prices_with_session)
         except Exception as e:
             _LOGGER.error("Failed to fetch prices: %s", e)
             raise
 
-    async def _get_prices_with_session(self, session) -> HepPrices:
+    async def _get_prices_with_session(self, session) -> Optional[HepPrices]:
         """Internal price fetch logic."""
-        try:
-            async with async_timeout.timeout(10):
-                headers = self._headers.copy()
-                if self._cookies:
-                    cookie_str = "; ".join([f"{k}={v}" for k, v in self._cookies.items()])
-                    headers["Cookie"] = cookie_str
+        return await self._get_model_with_session(
+            session, "cjenik", "obracun/cjenik", HepPrices.from_dict, "prices"
+        )
 
-                response = await session.get(
-                    f"{self._base_url}/obracun/cjenik",
-                    headers=headers
-                )
-                
-                if response.status == 200:
-                    data = await response.json()
-                    return HepPrices.from_dict(data)
-                else:
-                    _LOGGER.error("Price fetch failed with status: %s", response.status)
-                    return None
-        except Exception as e:
-             _LOGGER.error("Error fetching prices: %s", e)
-             raise
-
-    async def get_billing(self, kupac_id: int) -> HepBillingInfo:
+    async def get_billing(self, kupac_id: int) -> Optional[HepBillingInfo]:
         """Fetch billing data (promet) from the API."""
-        if not self._user_data:
-             if not await self.authenticate():
-                raise Exception("Not authenticated")
-
         try:
-            if self._session is None:
-                async with aiohttp.ClientSession() as session:
-                    return await self._get_billing_with_session(session, kupac_id)
-            else:
-                return await self._get_billing_with_session(self._session, kupac_id)
+            return await self._async_authenticated_call("promet", self._get_billing_with_session, kupac_id)
         except Exception as e:
             _LOGGER.error("Failed to fetch billing info: %s", e)
             raise
 
-    async def _get_billing_with_session(self, session, kupac_id: int) -> HepBillingInfo:
+    async def _get_billing_with_session(self, session, kupac_id: int) -> Optional[HepBillingInfo]:
         """Internal billing fetch logic."""
-        try:
-            async with async_timeout.timeout(10):
-                headers = self._headers.copy()
-                if self._cookies:
-                    cookie_str = "; ".join([f"{k}={v}" for k, v in self._cookies.items()])
-                    headers["Cookie"] = cookie_str
+        return await self._get_model_with_session(
+            session, "promet", f"promet/{kupac_id}", None, "billing info", _BILLING_HISTORY
+        )
 
-                response = await session.get(
-                    f"{self._base_url}/promet/{kupac_id}",
-                    headers=headers
-                )
-                
-                if response.status == 200:
-                    data = await response.json()
-                    return HepBillingInfo.from_dict(data)
-                else:
-                    _LOGGER.error("Billing fetch failed with status: %s", response.status)
-                    return None
-        except Exception as e:
-             _LOGGER.error("Error fetching billing info: %s", e)
-             raise
-    async def get_consumption(self, kupac_id: int) -> List[HepConsumption]:
+    async def get_consumption(self, kupac_id: int) -> Optional[Tuple[HepConsumption, ...]]:
         """Fetch consumption data (potrosnja) from the API."""
-        if not self._user_data:
-             if not await self.authenticate():
-                raise Exception("Not authenticated")
-
         try:
-            if self._session is None:
-                async with aiohttp.ClientSession() as session:
-                    return await self._get_consumption_with_session(session, kupac_id)
-            else:
-                return await self._get_consumption_with_session(self._session, kupac_id)
+            return await self._async_authenticated_call("potrosnja", self._get_consumption_with_session, kupac_id)
         except Exception as e:
             _LOGGER.error("Failed to fetch consumption info: %s", e)
             raise
 
-    async def _get_consumption_with_session(self, session, kupac_id: int) -> List[HepConsumption]:
+    async def _get_consumption_with_session(self, session, kupac_id: int) -> Optional[Tuple[HepConsumption, ...]]:
         """Internal consumption fetch logic."""
-        try:
-            async with async_timeout.timeout(10):
-                headers = self._headers.copy()
-                if self._cookies:
-                    cookie_str = "; ".join([f"{k}={v}" for k, v in self._cookies.items()])
-                    headers["Cookie"] = cookie_str
+        return await self._get_model_with_session(
+            session, "potrosnja", f"potrosnja/{kupac_id}", None, "consumption info", _CONSUMPTION_HISTORY
+        )
 
-                response = await session.get(
-                    f"{self._base_url}/potrosnja/{kupac_id}",
-                    headers=headers
-                )
-                
-                if response.status == 200:
-                    data = await response.json()
-                    return [HepConsumption.from_dict(item) for item in data]
-                else:
-                    _LOGGER.error("Consumption fetch failed with status: %s", response.status)
-                    return []
-        except Exception as e:
-             _LOGGER.error("Error fetching consumption info: %s", e)
-             raise
-
-    async def get_warnings(self, kupac_id: int) -> List[HepWarning]:
+    async def get_warnings(self, kupac_id: int) -> Optional[Tuple[HepWarning, ...]]:
         """Fetch warnings (opomene) from the API."""
-        if not self._user_data:
-             if not await self.authenticate():
-                raise Exception("Not authenticated")
-
         try:
-            if self._session is None:
-                async with aiohttp.ClientSession() as session:
-                    return await self._get_warnings_with_session(session, kupac_id)
-            else:
-                return await self._get_warnings_with_session(self._session, kupac_id)
+            return await self._async_authenticated_call("opomene", self._get_warnings_with_session, kupac_id)
         except Exception as e:
             _LOGGER.error("Failed to fetch warnings: %s", e)
             raise
 
-    async def _get_warnings_with_session(self, session, kupac_id: int) -> List[HepWarning]:
+    async def _get_warnings_with_session(self, session, kupac_id: int) -> Optional[Tuple[HepWarning, ...]]:
         """Internal warnings fetch logic."""
+        return await self._get_model_with_session(
+            session, "opomene", f"opomene/{kupac_id}", _build_warnings, "warnings"
+        )
+
+    async def _get_model_with_session(
+        self, session, endpoint: str, path: str, build, what: str, history: Optional[_HistoryEndpoint] = None
+    ):
+        """GET one data endpoint and build its model, recording latency, size and status under endpoint.
+
+        History endpoints pass history instead of build; their rows are
+        limited to the client's history window, and their bodies are parsed
+        as they download instead of being buffered.
+
+        Returns None for unexpected statuses, so callers keep their last good
+        data; raises HepSessionExpired for a rejected session and
+        HepTransientError for responses worth retrying.
+        """
+        url = f"{self._base_url}/{path}"
+        start = time.monotonic()
+        received = None
+        status = None
+        size = None
         try:
             async with async_timeout.timeout(10):
                 headers = self._headers.copy()
                 if self._cookies:
                     cookie_str = "; ".join([f"{k}={v}" for k, v in self._cookies.items()])
                     headers["Cookie"] = cookie_str
+                if self._token:
+                    headers["Authorization"] = f"Bearer {self._token}"
+                headers.update(self._conditional_headers(url))
 
-                response = await session.get(
-                    f"{self._base_url}/opomene/{kupac_id}",
-                    headers=headers
-                )
+                response = await session.get(url, headers=headers)
+                status = response.status
                 
+                if response.status in (401, 403):
+                    response.release()
+                    raise HepSessionExpired(f"HTTP {response.status}")
+                if response.status == 304:
+                    return self._not_modified(url, response)
+                if response.status == 429 or response.status >= 500:
+                    response.release()
+                    raise HepTransientError(f"HTTP {response.status}")
                 if response.status == 200:
-                    data = await response.json()
-                    return [HepWarning.from_dict(item) for item in data]
+                    if history is not None:
+                        # Content-Length is the compressed size, so even a small one can hide a large body
+                        model, size = await self._stream_history(url, response, history)
+                        received = time.monotonic()
+                        return model
+                    body = await response.read()
+                    received = time.monotonic()
+                    size = len(body)
+                    return self._build_cached(url, response.headers, body, build)
                 else:
-                    _LOGGER.error("Warnings fetch failed with status: %s", response.status)
-                    return []
+                    _LOGGER.error("Fetching %s failed with status: %s", what, response.status)
+                    response.release()
+                    return None
+        except (HepSessionExpired, HepTransientError):
+            raise
         except Exception as e:
-             _LOGGER.error("Error fetching warnings: %s", e)
+             _LOGGER.error("Error fetching %s: %s", what, e)
              raise
+        finally:
+            self._metrics.record(endpoint, status, (received or time.monotonic()) - start, size)
+
+class HepOmmClientRegistry:
+    """One HepOmmClient per omm_id, so cookies and form tokens survive between submissions.
+
+    The least recently used client is dropped beyond OMM_CLIENT_CACHE_SIZE.
+    All clients share one pooled session without a cookie jar, each one
+    sending the cookies of its own OMM page, and the rate limiter of the
+    OMM portal host.
+    """
+
+    def __init__(
+        self,
+        size: int = OMM_CLIENT_CACHE_SIZE,
+        base_url=DEFAULT_OMM_BASE_URL,
+        tracer: Optional[HepRequestTracer] = None,
+        rate_limiter: Optional[HepRateLimiter] = None,
+    ):
+        """Initialize."""
+        self._size = size
+        self._base_url = base_url
+        self._tracer = tracer
+        self._rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter(base_url)
+        self._session = None
+        self._clients = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = create_client_session(self._tracer, cookie_jar=aiohttp.DummyCookieJar())
+        return self._session
+
+    def get(self, omm_id: str) -> "HepOmmClient":
+        """Return the client of omm_id, creating it and evicting the least recently used one if needed."""
+        client = self._clients.get(omm_id)
+        if client is not None:
+            self._clients.move_to_end(omm_id)
+            return client
+        client = self._clients[omm_id] = HepOmmClient(
+            omm_id, session=self._get_session(), base_url=self._base_url, rate_limiter=self._rate_limiter
+        )
+        while len(self._clients) > self._size:
+            evicted_id, _ = self._clients.popitem(last=False)
+            _LOGGER.debug("Dropping cached OMM client %s", evicted_id)
+        return client
+
+    async def async_submit_batch(
+        self,
+        readings: Iterable[Tuple[str, int, int, bool]],
+        reading_date: str,
+        concurrency: int = OMM_BATCH_CONCURRENCY,
+        dry_run: bool = False,
+    ) -> List[HepOmmSubmission]:
+        """Submit (omm_id, tarifa1, tarifa2, force_send) readings, at most concurrency OMMs at a time.
+
+        Returns one outcome per reading, in order; a reading that fails
+        does not stop the others. A dry run sends nothing and validates
+        the readings against the cached OMM checks only.
+        """
+        if dry_run:
+            return [self._dry_run(omm_id, tarifa1, tarifa2) for omm_id, tarifa1, tarifa2, _force_send in readings]
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def submit(omm_id: str, tarifa1: int, tarifa2: int, force_send: bool) -> HepOmmSubmission:
+            async with semaphore:
+                try:
+                    result = await self.get(omm_id).async_submit(reading_date, tarifa1, tarifa2, force_send)
+                except HepInvalidReading as e:
+                    return HepOmmSubmission(omm_id, OMM_RESULT_REJECTED, str(e))
+                except Exception as e:
+                    _LOGGER.error("Error submitting reading for OMM %s: %s", omm_id, e)
+                    return HepOmmSubmission(omm_id, OMM_RESULT_FAILED, str(e) or type(e).__name__)
+            return _submission_outcome(omm_id, result)
+
+        return list(await asyncio.gather(*(submit(*reading) for reading in readings)))
+
+    def _dry_run(self, omm_id: str, tarifa1: int, tarifa2: int) -> HepOmmSubmission:
+        """Validate readings against the cached check of omm_id, without creating a client."""
+        client = self._clients.get(omm_id)
+        omm_check = client.cached_check if client is not None else None
+        if omm_check is None:
+            return HepOmmSubmission(omm_id, OMM_RESULT_UNCHECKED, "No recent OMM check cached")
+        error = omm_check.reading_error(tarifa1, tarifa2)
+        if error:
+            return HepOmmSubmission(omm_id, OMM_RESULT_REJECTED, error)
+        return HepOmmSubmission(omm_id, OMM_RESULT_VALID, "Readings fit the cached OMM check")
+
+    async def async_close(self) -> None:
+        """Forget every client and close the shared session."""
+        self._clients.clear()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
 
 class HepOmmClient:
     """HEP OMM Client."""
 
-    def __init__(self, omm_id):
-        """Initialize the OMM client."""
+    def __init__(
+        self,
+        omm_id,
+        metrics: Optional[HepRequestMetrics] = None,
+        tracer: Optional[HepRequestTracer] = None,
+        session=None,
+        base_url=DEFAULT_OMM_BASE_URL,
+        rate_limiter: Optional[HepRateLimiter] = None,
+    ):
+        """Initialize the OMM client.
+
+        Cookies and form tokens from the OMM page are kept between
+        submissions and the page is loaded again only when HEP rejects
+        them. The last OMM check is kept for OMM_CHECK_TTL to validate
+        readings before anything is sent.
+
+        If no session is given, the client creates and owns a pooled
+        session which must be released with async_close(); a shared
+        session must not keep cookies of its own, since they are per OMM.
+        Requests wait for the rate limiter of the OMM portal host.
+        """
         self._omm_id = omm_id
-        self._session = None
+        self._session = session
+        self._owns_session = session is None
+        self._tracer = tracer
+        self._metrics = metrics if metrics is not None else OMM_METRICS
+        self._rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter(base_url)
+        self._lock = asyncio.Lock()
         self._cookies = {}
-        self._base_url = "https://mojamreza.hep.hr"
+        self._base_url = base_url
         self._headers = {
             "Accept-Encoding": "gzip, deflate, br, zstd",
             "Accept-Language": "en-GB,en-US;q=0.9,en;q=0.8",
@@ -266,70 +914,165 @@ class HepOmmClient:
         }
         self._check_form_token = ""
         self._delivery_form_token = ""
+        self._page_loads = 0
+        self._check: Optional[HepOmmCheck] = None
+        self._checked_at = None
 
     def setSession(self, session):
         """Set the session for testing purposes."""
-        self._session = session    
+        self._session = session
+        self._owns_session = False
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the long-lived session, creating the owned one on first use."""
+        if self._session is None or (self._owns_session and self._session.closed):
+            self._session = create_client_session(self._tracer)
+            self._owns_session = True
+        return self._session
+
+    async def async_close(self) -> None:
+        """Close the owned session, once a submission in progress has finished."""
+        async with self._lock:
+            if self._owns_session and self._session is not None and not self._session.closed:
+                await self._session.close()
+            if self._owns_session:
+                self._session = None
+
+    def _capture_cookies(self, response) -> None:
+        """Keep the cookies a response sets; they are sent by hand since the session may be shared."""
+        set_cookies = response.headers.getall("Set-Cookie", [])
+        for cookie_str in set_cookies:
+            cookie_parts = cookie_str.split(';')[0]
+            if '=' in cookie_parts:
+                key, value = cookie_parts.split('=', 1)
+                self._cookies[key.strip()] = value.strip()
+        if self._cookies:
+            self._headers["Cookie"] = "; ".join([f"{k}={v}" for k, v in self._cookies.items()])
+
+    @property
+    def has_tokens(self) -> bool:
+        """Return True if form tokens from an earlier page load can be tried."""
+        return bool(self._check_form_token and self._delivery_form_token)
+
+    @property
+    def page_loads(self) -> int:
+        """Number of times the OMM page was loaded for cookies and form tokens."""
+        return self._page_loads
+
+    @property
+    def cached_check(self) -> Optional[HepOmmCheck]:
+        """Return the last OMM check if it is recent enough to validate readings with."""
+        if self._check is None or time.monotonic() - self._checked_at > OMM_CHECK_TTL:
+            return None
+        return self._check
+
+    def _validate(self, omm_check: Optional[HepOmmCheck], tarifa1: int, tarifa2: int) -> None:
+        """Raise HepInvalidReading if the readings do not fit omm_check."""
+        if omm_check is not None and (error := omm_check.reading_error(tarifa1, tarifa2)):
+            _LOGGER.debug("Not submitting readings for OMM %s: %s", self._omm_id, error)
+            raise HepInvalidReading(error)
+
+    def _clear_tokens(self) -> None:
+        self._cookies = {}
+        self._headers.pop("Cookie", None)
+        self._check_form_token = ""
+        self._delivery_form_token = ""
 
     async def send_reading(self, reading_date: str, tarifa1: int, tarifa2: int, force_send: bool = False) -> bool:
         """Send reading to the server."""
         try:
-            if self._session is None:
-                async with aiohttp.ClientSession() as session:
-                    return await self._send_reading_with_session(session, reading_date, tarifa1, tarifa2, force_send)
-            else:
-                return await self._send_reading_with_session(self._session, reading_date, tarifa1, tarifa2, force_send)
+            return await self._send_reading_with_session(self._get_session(), reading_date, tarifa1, tarifa2, force_send)
         except Exception as e:
             _LOGGER.error("Sending reading failed: %s", e)
-            return False    
+            return False
 
     async def _send_reading_with_session(self, session, reading_date: str, tarifa1: int, tarifa2: int, force_send: bool = False) -> bool:
         """Send reading to the server with session."""
         try:
-            omm_initialize_check = await self._initialize_with_session(session)
-            if omm_initialize_check:
-                try:
-                    omm_check = await self._check_omm_with_session(session)
-                    if omm_check:
-                        try:
-                            enc = omm_check.enc_value
-                            omm_reading = await self._submit_reading_with_session(session, enc, reading_date, tarifa1, tarifa2, force_send)
-                            if omm_reading:
-                                if omm_reading.status == 1:
-                                    _LOGGER.debug("OMM reading submitted successfully!")
-                                    if (omm_reading.posalji != 0):
-                                        _LOGGER.error("OMM reading submission failed! Try FORCE sending!")
-                                        return False
-                                    return True
-                                else:
-                                    _LOGGER.error("OMM reading submission failed!")
-                                    return False
-                            else:   
-                                _LOGGER.error("OMM reading submission failed!")
-                                return False
-                        except Exception as e:
-                            _LOGGER.error(f"Error submitting reading: {e}")    
-                except Exception as e:
-                    _LOGGER.error(f"Error checking OMM status: {e}")
-            else:
-                _LOGGER.error("OMM initialize returned None")
+            omm_reading = await self._submit_with_tokens(session, reading_date, tarifa1, tarifa2, force_send)
         except Exception as e:
-            _LOGGER.error(f"Error initialize OMM: {e}")        
+            _LOGGER.error("Error submitting reading: %s", e)
+            return False
+        if omm_reading:
+            if omm_reading.status == 1:
+                _LOGGER.debug("OMM reading submitted successfully!")
+                if (omm_reading.posalji != 0):
+                    _LOGGER.error("OMM reading submission failed! Try FORCE sending!")
+                    return False
+                return True
+            else:
+                _LOGGER.error("OMM reading submission failed!")
+                return False
+        else:
+            _LOGGER.error("OMM reading submission failed!")
+            return False
+
+    async def async_submit(self, reading_date: str, tarifa1: int, tarifa2: int, force_send: bool = False) -> Optional[HepReadingSubmissionResult]:
+        """Check the OMM and submit a reading, returning HEP's answer or None if it was not accepted for processing."""
+        return await self._submit_with_tokens(self._get_session(), reading_date, tarifa1, tarifa2, force_send)
+
+    async def _submit_with_tokens(self, session, reading_date: str, tarifa1: int, tarifa2: int, force_send: bool) -> Optional[HepReadingSubmissionResult]:
+        """Check and submit using the cached form tokens, loading the OMM page first if there are none.
+
+        HEP answers a stale or rejected token with an error page instead of
+        JSON. If the check gets one, the page is loaded again and the check
+        retried once with fresh tokens. The submission itself is never sent
+        twice: if it fails, None is returned and the tokens are dropped for
+        the next call. Readings that do not fit the cached OMM check raise
+        HepInvalidReading before any request is sent.
+        """
+        self._validate(self.cached_check, tarifa1, tarifa2)
+        async with self._lock:
+            fresh = False
+            if not self.has_tokens:
+                if not await self._initialize_with_session(session):
+                    return None
+                fresh = True
+            omm_check = await self._try_check(session)
+            if omm_check is None and not fresh:
+                _LOGGER.debug("OMM form tokens rejected, loading the OMM page again")
+                self._clear_tokens()
+                if not await self._initialize_with_session(session):
+                    return None
+                omm_check = await self._try_check(session)
+            if omm_check is None:
+                return None
+            self._check = omm_check.omm_check
+            self._checked_at = time.monotonic()
+            self._validate(self._check, tarifa1, tarifa2)
+            try:
+                omm_reading = await self._submit_reading_with_session(
+                    session, omm_check.enc_value, reading_date, tarifa1, tarifa2, force_send
+                )
+            except ValueError:
+                # An HTML error page where JSON was expected
+                omm_reading = None
+            if omm_reading is None:
+                self._clear_tokens()
+            return omm_reading
+
+    async def _try_check(self, session) -> Optional[HepOmmCheckResult]:
+        """Run the OMM check; None if HEP did not answer it with JSON, usually over a rejected form token."""
+        try:
+            return await self._check_omm_with_session(session)
+        except ValueError:
+            return None
 
     async def initialize(self):
         """Initialize session by visiting the Dostava page to get cookies."""
         try:
-            if self._session is None:
-                async with aiohttp.ClientSession() as session:
-                    return await self._initialize_with_session(session)
-            else:
-                return await self._initialize_with_session(self._session)
+            return await self._initialize_with_session(self._get_session())
         except Exception as e:
             _LOGGER.error(f"Error initialize OMM: {e}")
             return False
 
     async def _initialize_with_session(self, session):
         """Initialize session by visiting the Dostava page to get cookies."""
+        await self._rate_limiter.acquire()
+        start = time.monotonic()
+        received = None
+        status = None
+        size = None
         try:
             url = f"{self._base_url}/Dostava/{self._omm_id}"
 
@@ -341,26 +1084,33 @@ class HepOmmClient:
             headers["Upgrade-Insecure-Requests"] = "1"
 
             async with session.get(url, headers=headers) as response:
+                status = response.status
                 if response.status == 200:
-                    text = await response.text()
-                    
-                    set_cookies = response.headers.getall("Set-Cookie", [])
-                    for cookie_str in set_cookies:
-                        cookie_parts = cookie_str.split(';')[0]
-                        if '=' in cookie_parts:
-                            key, value = cookie_parts.split('=', 1)
-                            self._cookies[key.strip()] = value.strip()
-                    
-                    self._headers["Cookie"] = "; ".join([f"{k}={v}" for k, v in self._cookies.items()])
-                    
-                    check_match = re.search(r'id="Provjera_Omm_Form_Div".*?name="__RequestVerificationToken" type="hidden" value="([^"]+)"', text, re.DOTALL)
-                    if check_match:
-                        self._check_form_token = check_match.group(1)
-                    
-                    delivery_match = re.search(r'id="Dostava_Omm_Div".*?name="__RequestVerificationToken" type="hidden" value="([^"]+)"', text, re.DOTALL)
-                    if delivery_match:
-                        self._delivery_form_token = delivery_match.group(1)
-                        
+                    self._capture_cookies(response)
+
+                    # Read only as far as the second form token
+                    scanner = FormTokenScanner(_CHECK_FORM_ID, _DELIVERY_FORM_ID)
+                    size = 0
+                    async for chunk in iter_chunked(response, HTTP_STREAM_CHUNK_SIZE):
+                        size += len(chunk)
+                        if scanner.feed(chunk):
+                            break
+                    # A short remainder is read anyway so the connection can be reused for the check
+                    remaining = OMM_PAGE_DRAIN_LIMIT
+                    while scanner.done and remaining > 0 and (chunk := await response.content.readany()):
+                        chunk_received(response, chunk)
+                        size += len(chunk)
+                        remaining -= len(chunk)
+                    received = time.monotonic()
+
+                    if _CHECK_FORM_ID in scanner.tokens:
+                        self._check_form_token = scanner.tokens[_CHECK_FORM_ID]
+                    if _DELIVERY_FORM_ID in scanner.tokens:
+                        self._delivery_form_token = scanner.tokens[_DELIVERY_FORM_ID]
+                    if not scanner.done:
+                        _LOGGER.debug("OMM page is missing form tokens, found %s", list(scanner.tokens))
+
+                    self._page_loads += 1
                     return True
                 else:
                     _LOGGER.error("Failed to initialize OMM session: %s", response.status)
@@ -368,21 +1118,24 @@ class HepOmmClient:
         except Exception as e:
             _LOGGER.error("Error initializing OMM session: %s", e)
             return False
+        finally:
+            self._metrics.record("omm_page", status, (received or time.monotonic()) - start, size)
 
     async def check_omm(self):
         """OMM check logic."""
         try:
-            if self._session is None:
-                async with aiohttp.ClientSession() as session:
-                    return await self._check_omm_with_session(session)
-            else:
-                return await self._check_omm_with_session(self._session)
+            return await self._check_omm_with_session(self._get_session())
         except Exception as e:
             _LOGGER.error("Error checking OMM: %s", e)
             return False
     
     async def _check_omm_with_session(self, session) -> HepOmmCheck:
         """OMM check logic."""
+        await self._rate_limiter.acquire()
+        start = time.monotonic()
+        received = None
+        status = None
+        size = None
         try:
             async with async_timeout.timeout(10):
                 url = f"{self._base_url}/Omm/Provjera_Omm"
@@ -413,30 +1166,43 @@ class HepOmmClient:
                     headers=headers
                 )
                 
+                status = response.status
+                self._capture_cookies(response)
                 if response.status == 200:
-                    data = await response.json()
+                    body = await response.read()
+                    received = time.monotonic()
+                    size = len(body)
+                    data = decode_json(body)
                     return HepOmmCheckResult.from_dict(data)
                 else:
-                    _LOGGER.error("OMM check failed with status: %s", response.status)
+                    response.release()
+                    # Usually a rejected form token; the caller reloads the page and retries
+                    _LOGGER.debug("OMM check failed with status: %s", response.status)
                     return None
+        except ValueError:
+            _LOGGER.debug("OMM check did not return JSON")
+            raise
         except Exception as e:
              _LOGGER.error("Error checking OMM: %s", e)
              raise
+        finally:
+            self._metrics.record("omm_check", status, (received or time.monotonic()) - start, size)
 
     async def submit_reading(self, reading_date: str, tarifa1: int, tarifa2: int, force_send: bool = False) -> HepReadingSubmissionResult:
         """Submit reading logic."""
         try:
-            if self._session is None:
-                async with aiohttp.ClientSession() as session:
-                    return await self._submit_reading_with_session(session, reading_date, tarifa1, tarifa2, force_send)
-            else:
-                return await self._submit_reading_with_session(self._session, reading_date, tarifa1, tarifa2, force_send)
+            return await self._submit_reading_with_session(self._get_session(), reading_date, tarifa1, tarifa2, force_send)
         except Exception as e:
             _LOGGER.error("Error submitting reading: %s", e)
             raise
     
     async def _submit_reading_with_session(self, session, enc_value: str, reading_date: str, tarifa1: int, tarifa2: int, force_send: bool = False) -> HepReadingSubmissionResult:
         """Submit reading logic."""
+        await self._rate_limiter.acquire()
+        start = time.monotonic()
+        received = None
+        status = None
+        size = None
         try:
             async with async_timeout.timeout(10):
                 url = f"{self._base_url}/Omm/Dostava"
@@ -472,12 +1238,23 @@ class HepOmmClient:
                     headers=headers
                 )
                 
+                status = response.status
+                self._capture_cookies(response)
                 if response.status == 200:
-                    data = await response.json()
+                    body = await response.read()
+                    received = time.monotonic()
+                    size = len(body)
+                    data = decode_json(body)
                     return HepReadingSubmissionResult.from_dict(data)
                 else:
-                    _LOGGER.error("Reading submission failed with status: %s", response.status)
+                    response.release()
+                    _LOGGER.debug("Reading submission failed with status: %s", response.status)
                     return None
+        except ValueError:
+            _LOGGER.debug("Reading submission did not return JSON")
+            raise
         except Exception as e:
              _LOGGER.error("Error submitting reading: %s", e)
              raise
+        finally:
+            self._metrics.record("omm_submit", status, (received or time.monotonic()) - start, size)
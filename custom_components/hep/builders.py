@@ -0,0 +1,124 @@
+"""Compiled from_dict builders for the HEP models.
+
+Each model declares how its attributes map to JSON keys; @compiled turns
+that map into one generated function per model that reads every key once
+and fills the slots of a new instance directly, skipping the keyword
+handling of the frozen dataclass __init__. Rows of history endpoints are
+built by the thousand on every refresh, so this is the hot path.
+
+Validation is sampled rather than done per row: from_rows checks the
+first row of a list and single objects are checked on every build. A
+mapped key that is missing, or whose value has an unexpected JSON type,
+is recorded in SCHEMA_DRIFT and logged once, so a change on HEP's side
+shows up in the diagnostics before it turns into wrong sensor values. The
+record is dropped again once a checked object has the expected shape.
+"""
+import logging
+from dataclasses import dataclass, fields as dataclass_fields
+from typing import Any, Callable, Dict, Optional, Tuple, Type, Union
+
+_LOGGER = logging.getLogger(__name__)
+
+# Drift seen per model name: missing_keys, unexpected_types and unmapped_keys
+SCHEMA_DRIFT: Dict[str, dict] = {}
+
+
+@dataclass(frozen=True, slots=True)
+class Field:
+    """Where one model attribute comes from in the JSON object."""
+    key: str
+    kind: Union[Type, Tuple[Type, ...], None] = None  # expected JSON type, None if not checked
+    default: Any = None  # used when the key is absent
+    convert: Optional[Callable] = None  # applied to the value or default
+
+
+def _report_drift(name: str, data, field_map: Dict[str, Field]) -> None:
+    """Check one JSON object against a field map and record any drift."""
+    if not isinstance(data, dict):
+        drift = {"missing_keys": [], "unexpected_types": {"": type(data).__name__}, "unmapped_keys": []}
+    else:
+        missing = sorted(field.key for field in field_map.values() if field.key not in data)
+        unexpected = {
+            field.key: type(data[field.key]).__name__
+            for field in field_map.values()
+            if field.kind is not None
+            and data.get(field.key) is not None
+            and not isinstance(data[field.key], field.kind)
+        }
+        if not missing and not unexpected:
+            if SCHEMA_DRIFT.pop(name, None) is not None:
+                _LOGGER.info("HEP response for %s is back to the expected shape", name)
+            return
+        known = {field.key for field in field_map.values()}
+        drift = {
+            "missing_keys": missing,
+            "unexpected_types": unexpected,
+            "unmapped_keys": sorted(key for key in data if key not in known),
+        }
+    if SCHEMA_DRIFT.get(name) != drift:
+        SCHEMA_DRIFT[name] = drift
+        _LOGGER.warning(
+            "HEP response for %s changed shape: missing %s, unexpected types %s",
+            name,
+            drift["missing_keys"],
+            drift["unexpected_types"],
+        )
+
+
+def _compile(cls, field_map: Dict[str, Field]) -> Callable:
+    """Generate the from_dict function of cls from its field map."""
+    names = [field.name for field in dataclass_fields(cls)]
+    if set(names) != set(field_map):
+        raise TypeError(f"Field map of {cls.__name__} does not match its fields")
+
+    namespace = {"_new": object.__new__, "_cls": cls}
+    lines = ["def from_dict(data):", "    get = data.get", "    self = _new(_cls)"]
+    for index, name in enumerate(names):
+        field = field_map[name]
+        value = f"get({field.key!r})"
+        if field.default is not None:
+            namespace[f"_default{index}"] = field.default
+            value = f"get({field.key!r}, _default{index})"
+        if field.convert is not None:
+            namespace[f"_convert{index}"] = field.convert
+            value = f"_convert{index}({value})"
+        # Slot descriptors set the attribute directly, which frozen __setattr__ would refuse
+        namespace[f"_set{index}"] = cls.__dict__[name].__set__
+        lines.append(f"    _set{index}(self, {value})")
+    lines.append("    return self")
+    exec("\n".join(lines), namespace)
+    return namespace["from_dict"]
+
+
+def compiled(field_map: Dict[str, Field], rows: bool = False):
+    """Class decorator adding from_dict, from_rows and validate built from field_map.
+
+    rows marks models that come in long lists: their from_dict skips
+    validation and from_rows validates only the first row. Other models
+    validate on every from_dict.
+    """
+    def decorate(cls):
+        build = _compile(cls, field_map)
+        name = cls.__name__
+
+        def validate(data) -> None:
+            _report_drift(name, data, field_map)
+
+        def from_rows(items) -> tuple:
+            if items:
+                validate(items[0])
+            return tuple([build(item) for item in items])
+
+        if rows:
+            from_dict = build
+        else:
+            def from_dict(data):
+                validate(data)
+                return build(data)
+
+        cls.from_dict = staticmethod(from_dict)
+        cls.from_rows = staticmethod(from_rows)
+        cls.validate = staticmethod(validate)
+        return cls
+
+    return decorate
@@ -24,10 +24,13 @@ async def validate_input(hass: HomeAssistant, data: dict) -> dict:
     """
     hub = HepApiClient(data[CONF_USERNAME], data[CONF_PASSWORD])
 
-    if not await hub.authenticate():
-        raise InvalidAuth
+    try:
+        if not await hub.authenticate():
+            raise InvalidAuth
 
-    user_data = await hub.get_data()
+        user_data = await hub.get_data()
+    finally:
+        await hub.async_close()
     
     # Default title
     title = data[CONF_USERNAME]
@@ -83,7 +86,14 @@ class HepOptionsFlow(config_entries.OptionsFlow):
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
 
-        from .const import CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
+        from .const import (
+            CONF_SCAN_INTERVAL,
+            DEFAULT_SCAN_INTERVAL,
+            CONF_TRACE_REQUESTS,
+            DEFAULT_TRACE_REQUESTS,
+            CONF_HISTORY_MONTHS,
+            DEFAULT_HISTORY_MONTHS,
+        )
         
         return self.async_show_form(
             step_id="init",
@@ -95,6 +105,18 @@ class HepOptionsFlow(config_entries.OptionsFlow):
                             CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
                         ),
                     ): vol.All(vol.Coerce(int), vol.Range(min=1, max=24)),
+                    vol.Optional(
+                        CONF_TRACE_REQUESTS,
+                        default=self.config_entry.options.get(
+                            CONF_TRACE_REQUESTS, DEFAULT_TRACE_REQUESTS
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_HISTORY_MONTHS,
+                        default=self.config_entry.options.get(
+                            CONF_HISTORY_MONTHS, DEFAULT_HISTORY_MONTHS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=120)),
                 }
             ),
         )
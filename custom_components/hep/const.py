@@ -1,13 +1,105 @@
 """Constants for the HEP integration."""
 DOMAIN = "hep"
 
+# hass.data key of the coordinator per config entry id
+DATA_COORDINATORS = f"{DOMAIN}_coordinators"
+# hass.data key of the HepOmmClientRegistry shared by the OMM services
+DATA_OMM_CLIENTS = f"{DOMAIN}_omm_clients"
+# hass.data key of the HepSubmissionQueue shared by the OMM services
+DATA_OMM_QUEUE = f"{DOMAIN}_omm_queue"
+# hass.data key of the id of the config entry that owns the shared OMM sensors
+DATA_OMM_SENSORS_ENTRY = f"{DOMAIN}_omm_sensors_entry"
+
 # Configuration
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_SCAN_INTERVAL = "scan_interval"
+CONF_TRACE_REQUESTS = "trace_requests"
+CONF_HISTORY_MONTHS = "history_months"
 
 # Defaults
 DEFAULT_SCAN_INTERVAL = 24  # hours
+DEFAULT_TRACE_REQUESTS = False
+DEFAULT_HISTORY_MONTHS = 0  # keep all the history HEP returns
 
 # Attribution
 ATTRIBUTION = "Data provided by HEP Elektra ODS"
+
+# HTTP connection pool
+HTTP_POOL_LIMIT = 20
+HTTP_POOL_LIMIT_PER_HOST = 8
+HTTP_KEEPALIVE_TIMEOUT = 60  # seconds
+HTTP_DNS_CACHE_TTL = 300  # seconds
+# History responses are parsed while they download, this much at a time
+HTTP_STREAM_CHUNK_SIZE = 64 * 1024  # bytes
+
+# Authentication session
+AUTH_SESSION_LIFETIME = 1200  # seconds, assumed when the login token carries no expiry
+AUTH_RENEW_MARGIN = 120  # seconds before expiry to renew the session in the background
+
+# Refresh
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+
+# Request retries and circuit breaker
+RETRY_ATTEMPTS = 3  # tries per GET, including the first
+RETRY_BACKOFF_BASE = 1.0  # seconds, doubled per retry, full jitter
+RETRY_BACKOFF_MAX = 10.0  # seconds
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive transient failures that open a host's circuit
+CIRCUIT_RESET_TIMEOUT = 300  # seconds an open circuit fails fast before letting one trial through
+FAILED_REFRESH_RETRY_DELAY = 900  # seconds until endpoints that failed are tried again
+
+# Per-endpoint refresh intervals (hours). An endpoint is fetched on a scan
+# tick only once its interval has elapsed; 0 means every scan tick.
+ENDPOINT_USER = "user"  # /korisnik/prijava, carries the meter readings
+ENDPOINT_BILLING = "billing"  # /promet
+ENDPOINT_CONSUMPTION = "consumption"  # /potrosnja
+ENDPOINT_WARNINGS = "warnings"  # /opomene
+ENDPOINT_PRICES = "prices"  # /obracun/cjenik
+DEFAULT_ENDPOINT_INTERVALS = {
+    ENDPOINT_USER: 0,
+    ENDPOINT_WARNINGS: 6,
+    ENDPOINT_BILLING: 24,
+    ENDPOINT_CONSUMPTION: 24,
+    ENDPOINT_PRICES: 168,
+}
+REFRESH_SCHEDULE_TOLERANCE = 300  # seconds an endpoint may be fetched early to align with a tick
+# Fetched while the coordinator is degraded: meter readings, balance and warnings
+ESSENTIAL_ENDPOINTS = (ENDPOINT_USER, ENDPOINT_BILLING, ENDPOINT_WARNINGS)
+
+# Snapshot cache
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 10  # seconds, coalesces saves from back-to-back refreshes
+
+# Request metrics
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds, upper bounds of the histogram buckets
+API_METRIC_ENDPOINTS = ("prijava", "cjenik", "promet", "potrosnja", "opomene")
+OMM_METRIC_ENDPOINTS = ("omm_page", "omm_check", "omm_submit")
+
+# Request tracing
+TRACE_BUFFER_SIZE = 200  # requests kept for diagnostics, oldest dropped first
+
+# OMM submissions
+OMM_CLIENT_CACHE_SIZE = 16  # OMMs whose cookies and form tokens are kept between submissions
+OMM_PAGE_DRAIN_LIMIT = 64 * 1024  # bytes of the OMM page still read after its tokens to keep the connection
+OMM_BATCH_CONCURRENCY = 4  # OMMs of a batch submitted at the same time
+OMM_RATE_LIMIT = 5.0  # requests per second to the OMM portal host, shared by all OMM clients
+OMM_RATE_BURST = 5  # requests that may go at once before the rate limit spaces them
+OMM_CHECK_TTL = 6 * 3600  # seconds an OMM's tariff count and reading ranges are used to validate readings locally
+# Outcome of each reading of a batch submission
+OMM_RESULT_ACCEPTED = "accepted"
+OMM_RESULT_NEEDS_FORCE = "needs_force"  # HEP already has a reading for the date
+OMM_RESULT_REJECTED = "rejected"
+OMM_RESULT_FAILED = "failed"  # HEP could not be reached or gave no valid answer, worth retrying
+# Outcome of each reading of a dry run, answered from the cached OMM checks
+OMM_RESULT_VALID = "valid"
+OMM_RESULT_UNCHECKED = "unchecked"  # no fresh check cached for the OMM
+
+# OMM submission queue
+OMM_QUEUE_STORAGE_VERSION = 1
+OMM_QUEUE_RETRY_BASE = 60  # seconds before the first retry of a failed flush, doubled per failed flush
+OMM_QUEUE_RETRY_MAX = 3600  # seconds
+OMM_QUEUE_SUBMITTED_TTL = 31 * 24 * 3600  # seconds an accepted reading's OMM and date are remembered
+# State of the last flush
+OMM_QUEUE_IDLE = "idle"  # nothing flushed yet
+OMM_QUEUE_OK = "ok"  # every reading got an answer from HEP
+OMM_QUEUE_RETRYING = "retrying"  # some readings failed and a retry is scheduled
@@ -1,19 +1,53 @@
 """DataUpdateCoordinator for HEP integration."""
+import asyncio
 import logging
+import time
 from datetime import timedelta
+from typing import Callable
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL,
+    AUTH_RENEW_MARGIN,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_ENDPOINT_INTERVALS,
+    REFRESH_SCHEDULE_TOLERANCE,
+    ESSENTIAL_ENDPOINTS,
+    FAILED_REFRESH_RETRY_DELAY,
+    ENDPOINT_USER,
+    ENDPOINT_BILLING,
+    ENDPOINT_CONSUMPTION,
+    ENDPOINT_WARNINGS,
+    ENDPOINT_PRICES,
+)
+from .api import HepCircuitOpen
+from .models import HepAccountSnapshot, HepPriceTable, HepSnapshot, HepWarningIndex
 
 _LOGGER = logging.getLogger(__name__)
 
 class HepDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching HEP data."""
 
-    def __init__(self, hass: HomeAssistant, client, scan_interval: int = None):
-        """Initialize."""
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client,
+        scan_interval: int = None,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        endpoint_intervals: dict = None,
+        store=None,
+    ):
+        """Initialize.
+
+        scan_interval is the tick; endpoint_intervals (hours per endpoint, see
+        DEFAULT_ENDPOINT_INTERVALS) decide which endpoints are fetched on a tick.
+        store (a HepSnapshotStore) persists every good snapshot for the next startup.
+        """
         if scan_interval is None:
             scan_interval = DEFAULT_SCAN_INTERVAL
             
@@ -22,14 +56,154 @@ class HepDataUpdateCoordinator(DataUpdateCoordinator):
             _LOGGER,
             name=DOMAIN,
             update_interval=timedelta(hours=scan_interval),
+            # A refresh that returns the previous snapshot does not notify entities
+            always_update=False,
         )
         self.client = client
+        self._store = store
+        self._unsub_session_renewal = None
+        self._unsub_failed_retry = None
+        self._request_semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self._endpoint_intervals = {**DEFAULT_ENDPOINT_INTERVALS, **(endpoint_intervals or {})}
+        # Monotonic time of the last successful fetch per leg ("prices", "billing/<kupac_id>", ...)
+        self._last_fetched = {}
+        # Duration in seconds of each endpoint fetch in the last refresh
+        self.last_refresh_timings = {}
+        # Legs that failed in the last refresh; they keep serving their last good data
+        self.failed_endpoints = []
+        # Duration in seconds of the whole last refresh, login included
+        self.last_refresh_duration = None
+        self._refresh_listeners = []
+        # Entity state writes performed and skipped because nothing changed
+        self.state_writes = 0
+        self.state_writes_skipped = 0
+
+    async def async_restore_snapshot(self) -> bool:
+        """Serve the cached snapshot until the first refresh replaces it.
+
+        Returns False if there is no usable cache. Every endpoint stays due,
+        so the next refresh revalidates all of it.
+        """
+        if self._store is None:
+            return False
+        snapshot = await self._store.async_load()
+        if snapshot is None:
+            return False
+        self.data = snapshot
+        _LOGGER.debug("Restored HEP snapshot from %s", snapshot.updated_at)
+        return True
+
+    def _is_due(self, endpoint: str, last_fetched, now: float) -> bool:
+        """Return True if an endpoint last fetched at last_fetched should be fetched on this tick."""
+        if last_fetched is None:
+            return True
+        interval = max(self._endpoint_intervals[endpoint] * 3600, self.update_interval.total_seconds())
+        return now - last_fetched >= interval - REFRESH_SCHEDULE_TOLERANCE
+
+    @callback
+    def _schedule_session_renewal(self) -> None:
+        """Log in again shortly before the next refresh if the session or the user data will be stale by then."""
+        if self._unsub_session_renewal:
+            self._unsub_session_renewal()
+            self._unsub_session_renewal = None
+
+        interval = self.update_interval.total_seconds()
+        expires_in = self.client.session_expires_in
+        user_due = self._is_due(ENDPOINT_USER, self.client.last_login, time.monotonic() + interval)
+        if expires_in is not None and expires_in > interval and not user_due:
+            return
+
+        @callback
+        def _renew(_now) -> None:
+            self._unsub_session_renewal = None
+            self.client.async_renew_in_background()
+
+        self._unsub_session_renewal = async_call_later(
+            self.hass, max(interval - AUTH_RENEW_MARGIN, 0), _renew
+        )
+
+    @property
+    def degraded(self) -> bool:
+        """True while HEP is failing: the last refresh had failed endpoints or the circuit is not closed.
+
+        A degraded refresh fetches only ESSENTIAL_ENDPOINTS.
+        """
+        return bool(self.failed_endpoints) or self.client.circuit_breaker.state != "closed"
+
+    @callback
+    def _schedule_failed_retry(self) -> None:
+        """Try again well before the next scan tick, which can be a day away."""
+        if self._unsub_failed_retry or FAILED_REFRESH_RETRY_DELAY >= self.update_interval.total_seconds():
+            return
+
+        @callback
+        def _retry(_now) -> None:
+            self._unsub_failed_retry = None
+            self.hass.async_create_task(self.async_request_refresh())
+
+        self._unsub_failed_retry = async_call_later(self.hass, FAILED_REFRESH_RETRY_DELAY, _retry)
+
+    async def async_shutdown(self) -> None:
+        """Cancel the pending session renewal and retry."""
+        if self._unsub_session_renewal:
+            self._unsub_session_renewal()
+            self._unsub_session_renewal = None
+        if self._unsub_failed_retry:
+            self._unsub_failed_retry()
+            self._unsub_failed_retry = None
+        await super().async_shutdown()
+
+    async def _async_fetch(self, name: str, fetch, *args):
+        """Fetch one endpoint under the concurrency cap.
+
+        Failures are logged and turned into None so one endpoint cannot fail the whole refresh.
+        """
+        async with self._request_semaphore:
+            start = time.monotonic()
+            try:
+                return await fetch(*args)
+            except HepCircuitOpen:
+                _LOGGER.debug("Skipped %s, HEP circuit is open", name)
+                return None
+            except Exception as e:
+                _LOGGER.error("Failed to fetch %s data: %s", name, e, exc_info=True)
+                return None
+            finally:
+                self.last_refresh_timings[name] = time.monotonic() - start
+
+    @callback
+    def async_add_refresh_listener(self, update_callback) -> Callable[[], None]:
+        """Call update_callback after every refresh, also those that changed no data."""
+        self._refresh_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._refresh_listeners.remove(update_callback)
+
+        return remove_listener
 
     async def _async_update_data(self):
-        """Fetch data from API."""
+        """Fetch data from API, timing the whole refresh."""
+        start = time.monotonic()
         try:
-            # Re-authenticate to get fresh session cookies
-            if not await self.client.authenticate():
+            return await self._async_update_snapshot()
+        finally:
+            self.last_refresh_duration = time.monotonic() - start
+            for update_callback in list(self._refresh_listeners):
+                update_callback()
+
+    async def _async_update_snapshot(self):
+        """Fetch the due endpoints and build the next snapshot."""
+        try:
+            now = time.monotonic()
+
+            # The login response carries the user data, so log in again when it is
+            # due; otherwise reuse the login session while it is valid
+            if self._is_due(ENDPOINT_USER, self.client.last_login, now):
+                authenticated = await self.client.authenticate()
+            else:
+                authenticated = await self.client.async_ensure_authenticated()
+            if not authenticated:
                 raise UpdateFailed("Authentication failed")
             
             # Fetch user data (already fetched during authenticate, but this ensures consistency)
@@ -37,43 +211,148 @@ class HepDataUpdateCoordinator(DataUpdateCoordinator):
             if not user_data:
                 raise UpdateFailed("No user data returned from API")
             
-            # Fetch additional data for first account
-            billing_data = None
-            consumption_data = None
-            warnings_data = None
-            prices_data = None
-            
-            if user_data.accounts:
-                kupac_id = user_data.accounts[0].kupac_id
-            if user_data.accounts:
-                kupac_id = user_data.accounts[0].kupac_id
-                
-                try:
-                    billing_data = await self.client.get_billing(kupac_id)
-                except Exception as e:
-                    _LOGGER.error("Failed to fetch billing data: %s", e, exc_info=True)
-                
-                try:
-                    consumption_data = await self.client.get_consumption(kupac_id)
-                except Exception as e:
-                    _LOGGER.error("Failed to fetch consumption data: %s", e, exc_info=True)
-                
-                try:
-                    warnings_data = await self.client.get_warnings(kupac_id)
-                except Exception as e:
-                    _LOGGER.error("Failed to fetch warnings data: %s", e, exc_info=True)
-                
-                try:
-                    prices_data = await self.client.get_prices()
-                except Exception as e:
-                    _LOGGER.error("Failed to fetch prices data: %s", e, exc_info=True)
-            
-            return {
-                "user": user_data,
-                "billing": billing_data,
-                "consumption": consumption_data,
-                "warnings": warnings_data,
-                "prices": prices_data,
-            }
+            # Fetch the endpoints that are due for every account plus the shared
+            # price list in one concurrent pass; the semaphore bounds how many run at once
+            previous = self.data
+            # The login response carries a new token every time, so compare the
+            # parsed user instead and keep the previous objects when it is unchanged
+            if previous and previous.user == user_data:
+                user_data = previous.user
+            # While HEP is failing, leave out the endpoints that can wait
+            degraded = self.degraded
+            if degraded:
+                _LOGGER.info("HEP degraded, fetching only %s", ", ".join(ESSENTIAL_ENDPOINTS))
+
+            def wanted(endpoint: str, key: str) -> bool:
+                if degraded and endpoint not in ESSENTIAL_ENDPOINTS:
+                    return False
+                return self._is_due(endpoint, self._last_fetched.get(key), now)
+
+            legs = []
+            if wanted(ENDPOINT_PRICES, ENDPOINT_PRICES):
+                legs.append((ENDPOINT_PRICES, None, self.client.get_prices))
+            for account in user_data.accounts:
+                kupac_id = account.kupac_id
+                for endpoint, fetch in (
+                    (ENDPOINT_BILLING, self.client.get_billing),
+                    (ENDPOINT_CONSUMPTION, self.client.get_consumption),
+                    (ENDPOINT_WARNINGS, self.client.get_warnings),
+                ):
+                    if wanted(endpoint, f"{endpoint}/{kupac_id}"):
+                        legs.append((endpoint, kupac_id, fetch))
+
+            self.last_refresh_timings = {}
+            refresh_start = time.monotonic()
+            results = await asyncio.gather(*(
+                self._async_fetch(endpoint, fetch)
+                if kupac_id is None
+                else self._async_fetch(f"{endpoint}/{kupac_id}", fetch, kupac_id)
+                for endpoint, kupac_id, fetch in legs
+            ))
+            self.last_refresh_timings["total"] = time.monotonic() - refresh_start
+            _LOGGER.debug("Refreshed %d endpoints, timings: %s", len(legs), self.last_refresh_timings)
+
+            # Endpoints that were not due or failed keep their previous data
+            prices_data = previous.prices if previous else None
+            fetched = {}
+            failed = []
+            for (endpoint, kupac_id, _fetch), result in zip(legs, results):
+                key = endpoint if kupac_id is None else f"{endpoint}/{kupac_id}"
+                if result is None:
+                    failed.append(key)
+                    continue
+                self._last_fetched[key] = now
+                if kupac_id is None:
+                    prices_data = result
+                else:
+                    # History lists are stored as tuples so the snapshot stays immutable
+                    fetched[key] = tuple(result) if isinstance(result, list) else result
+
+            # Resolve each tariff model's price table once per price refresh and
+            # share it between accounts; unchanged prices reuse the previous tables
+            previous_tables = {}
+            if previous and previous.prices is prices_data:
+                previous_tables = {
+                    view.price_table.tarifni_model: view.price_table
+                    for view in previous.accounts.values()
+                    if view.price_table is not None
+                }
+            price_tables = {}
+
+            time_zone = dt_util.get_time_zone(self.hass.config.time_zone) or dt_util.DEFAULT_TIME_ZONE
+            updated_at = dt_util.utcnow()
+            accounts_data = {}
+            for account in user_data.accounts:
+                kupac_id = account.kupac_id
+                old = previous.account(kupac_id) if previous else None
+                price_table = None
+                if prices_data is not None:
+                    price_table = price_tables.get(account.tarifni_model)
+                    if price_table is None:
+                        price_table = previous_tables.get(account.tarifni_model) or HepPriceTable.resolve(
+                            prices_data, account.tarifni_model
+                        )
+                        price_tables[account.tarifni_model] = price_table
+                endpoint_data = {}
+                for endpoint in (ENDPOINT_BILLING, ENDPOINT_CONSUMPTION, ENDPOINT_WARNINGS):
+                    key = f"{endpoint}/{kupac_id}"
+                    if key in fetched:
+                        endpoint_data[endpoint] = fetched[key]
+                    else:
+                        endpoint_data[endpoint] = getattr(old, endpoint) if old else None
+                # Warning dates are parsed once, when the warnings themselves change
+                warnings_data = endpoint_data[ENDPOINT_WARNINGS]
+                if old and warnings_data is old.warnings:
+                    warning_index = old.warning_index
+                elif warnings_data is not None:
+                    warning_index = HepWarningIndex.from_warnings(warnings_data, time_zone)
+                else:
+                    warning_index = None
+
+                # The client returns the same objects for unchanged payloads
+                if (
+                    old
+                    and old.account is account
+                    and old.price_table is price_table
+                    and all(getattr(old, endpoint) is data for endpoint, data in endpoint_data.items())
+                ):
+                    accounts_data[kupac_id] = old
+                    continue
+
+                accounts_data[kupac_id] = HepAccountSnapshot(
+                    account=account,
+                    warning_index=warning_index,
+                    price_table=price_table,
+                    updated_at=updated_at,
+                    **endpoint_data,
+                )
+
+            self._schedule_session_renewal()
+            self.failed_endpoints = failed
+            if failed:
+                _LOGGER.warning("Serving last good data for failed endpoints: %s", ", ".join(failed))
+                self._schedule_failed_retry()
+
+            if (
+                previous
+                and not previous.from_cache
+                and previous.user is user_data
+                and previous.prices is prices_data
+                and accounts_data.keys() == previous.accounts.keys()
+                and all(view is previous.accounts[kupac_id] for kupac_id, view in accounts_data.items())
+            ):
+                _LOGGER.debug("HEP data unchanged, keeping the previous snapshot")
+                return previous
+
+            snapshot = HepSnapshot(
+                user=user_data,
+                prices=prices_data,
+                accounts=accounts_data,
+                updated_at=updated_at,
+            )
+            if self._store is not None:
+                self._store.async_save(snapshot)
+            return snapshot
         except Exception as err:
+            self._schedule_failed_retry()
             raise UpdateFailed(f"Error communicating with API: {err}")
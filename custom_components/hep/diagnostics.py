@@ -0,0 +1,44 @@
+"""Diagnostics support for HEP."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_COORDINATORS, DATA_OMM_QUEUE
+from .builders import SCHEMA_DRIFT
+from .metrics import OMM_METRICS
+from .tracing import OMM_TRACER
+
+TO_REDACT = {"omm_id"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return refresh and state write statistics for a config entry."""
+    coordinator = hass.data.get(DATA_COORDINATORS, {}).get(entry.entry_id)
+    if coordinator is None:
+        return {}
+
+    snapshot = coordinator.data
+    diagnostics = {
+        "last_update_success": coordinator.last_update_success,
+        "accounts": len(snapshot.accounts) if snapshot else 0,
+        "data_updated_at": snapshot.updated_at.isoformat() if snapshot and snapshot.updated_at else None,
+        "from_cache": snapshot.from_cache if snapshot else None,
+        "last_refresh_duration": coordinator.last_refresh_duration,
+        "last_refresh_timings": coordinator.last_refresh_timings,
+        "failed_endpoints": coordinator.failed_endpoints,
+        "degraded": coordinator.degraded,
+        "circuit_state": coordinator.client.circuit_breaker.state,
+        "state_writes": coordinator.state_writes,
+        "state_writes_skipped": coordinator.state_writes_skipped,
+        "api_metrics": coordinator.client.metrics.as_dict(),
+        "omm_metrics": OMM_METRICS.as_dict(),
+        "schema_drift": dict(SCHEMA_DRIFT),
+    }
+    queue = hass.data.get(DATA_OMM_QUEUE)
+    if queue is not None:
+        diagnostics["omm_queue"] = async_redact_data(queue.as_dict(), TO_REDACT)
+    tracer = coordinator.client.tracer
+    if tracer is not None:
+        diagnostics["request_traces"] = tracer.as_list()
+        diagnostics["omm_request_traces"] = OMM_TRACER.as_list()
+    return diagnostics
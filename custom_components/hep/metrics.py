@@ -0,0 +1,132 @@
+"""Per-endpoint request instrumentation for HEP clients."""
+from bisect import bisect_left
+from typing import Callable, Dict, Optional
+
+from .const import LATENCY_BUCKETS
+
+
+class HepEndpointMetrics:
+    """Latency histogram, response sizes, status codes and retries of one endpoint.
+
+    Latencies go into the fixed LATENCY_BUCKETS histogram, so memory stays
+    constant however many requests are recorded; percentiles are read off
+    the bucket bounds.
+    """
+
+    __slots__ = (
+        "requests",
+        "failures",
+        "retries",
+        "status_codes",
+        "buckets",
+        "latency_sum",
+        "last_latency",
+        "last_bytes",
+        "bytes_total",
+    )
+
+    def __init__(self):
+        """Initialize."""
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.status_codes: Dict[str, int] = {}
+        # One count per bucket plus one for latencies above the last bound
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.last_latency: Optional[float] = None
+        self.last_bytes: Optional[int] = None
+        self.bytes_total = 0
+
+    def record(self, status: Optional[int], latency: float, size: Optional[int]) -> None:
+        """Record one response; status None means the request raised before a response."""
+        self.requests += 1
+        key = str(status) if status is not None else "error"
+        self.status_codes[key] = self.status_codes.get(key, 0) + 1
+        if status is None or status == 429 or status >= 500:
+            self.failures += 1
+        self.buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.latency_sum += latency
+        self.last_latency = latency
+        if size is not None:
+            self.last_bytes = size
+            self.bytes_total += size
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound in seconds of the bucket holding the given percentile, inf if above the last bucket."""
+        if not self.requests:
+            return None
+        rank = fraction * self.requests
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else float("inf")
+        return float("inf")
+
+    def as_dict(self) -> dict:
+        """Summary for state attributes and diagnostics, latencies in milliseconds."""
+        def ms(seconds: Optional[float]):
+            return round(seconds * 1000, 1) if seconds is not None else None
+
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "status_codes": dict(self.status_codes),
+            "last_latency_ms": ms(self.last_latency),
+            "mean_latency_ms": ms(self.latency_sum / self.requests) if self.requests else None,
+            "p50_latency_ms": ms(self.percentile(0.50)),
+            "p95_latency_ms": ms(self.percentile(0.95)),
+            "latency_histogram_ms": {
+                f"le_{ms(bound)}": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)
+            } | {"inf": self.buckets[-1]},
+            "last_bytes": self.last_bytes,
+            "bytes_total": self.bytes_total,
+        }
+
+
+class HepRequestMetrics:
+    """Metrics of every endpoint one client talks to, by endpoint name."""
+
+    def __init__(self):
+        """Initialize."""
+        self.endpoints: Dict[str, HepEndpointMetrics] = {}
+        self._listeners = []
+
+    def endpoint(self, name: str) -> HepEndpointMetrics:
+        """Return the metrics of an endpoint, creating them on first use."""
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = HepEndpointMetrics()
+        return metrics
+
+    def record(self, name: str, status: Optional[int], latency: float, size: Optional[int] = None) -> None:
+        """Record one response of an endpoint."""
+        self.endpoint(name).record(status, latency, size)
+        self._notify(name)
+
+    def record_retry(self, name: str) -> None:
+        """Record that a request to an endpoint is being retried."""
+        self.endpoint(name).retries += 1
+        self._notify(name)
+
+    def add_listener(self, update_callback: Callable[[str], None]) -> Callable[[], None]:
+        """Call update_callback with the endpoint name whenever an endpoint records something."""
+        self._listeners.append(update_callback)
+
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    def _notify(self, name: str) -> None:
+        for update_callback in list(self._listeners):
+            update_callback(name)
+
+    def as_dict(self) -> dict:
+        return {name: metrics.as_dict() for name, metrics in self.endpoints.items()}
+
+
+# OMM portal requests are not tied to a config entry, so every HepOmmClient records into one recorder
+OMM_METRICS = HepRequestMetrics()
@@ -1,8 +1,52 @@
-"""Data models for HEP integration."""
+"""Data models for HEP integration.
+
+Models are slotted and frozen: they are rebuilt on every refresh and never
+mutated, and history endpoints can return thousands of rows. Models built
+from HEP responses declare their JSON field map; from_dict is compiled
+from it, see builders.py.
+"""
+import sys
+from bisect import bisect_left
 from dataclasses import dataclass
-from typing import List, Optional
+from datetime import date, datetime, tzinfo
+from typing import Dict, Iterable, Optional, Tuple
+
+from .builders import Field, compiled
+
+
+def _intern(value):
+    """Intern a repeated string so equal values across rows share one object."""
+    return sys.intern(value) if isinstance(value, str) else value
+
 
-@dataclass
+def _strip(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def _month_start(day: date, months: int = 0) -> date:
+    """Return the first day of the month `months` away from day's month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+@compiled({
+    "korisnik_id": Field("korisnikId", int),
+    "dp": Field("dp", str, convert=_intern),
+    "sifra": Field("sifra", str),
+    "naziv": Field("naziv", str),
+    "adresa": Field("adresa", str),
+    "mjesto": Field("mjesto", str, convert=_intern),
+    "oib": Field("oib", str),
+    "tarifni_model": Field("tarifniModel", str, convert=_intern),
+    "broj_brojila": Field("brojBrojila", str),
+    "br_tarifa1": Field("brTarifa1", (int, float), 0),
+    "br_tarifa2": Field("brTarifa2", (int, float), 0),
+    "br_tarifa3": Field("brTarifa3", (int, float), 0),
+    "datum_web_ocitanja": Field("datumWebOcitanja", str),
+    "ugovorni_racun": Field("ugovorniRacun", str, "", _strip),
+    "pog_mjesto": Field("pogMjesto", str),
+    "kupac_id": Field("kupacId", int),
+}, rows=True)
+@dataclass(frozen=True, slots=True)
 class HepAccount:
     """Class representing a HEP account (Kupac)."""
     korisnik_id: int
@@ -22,64 +66,39 @@ class HepAccount:
     pog_mjesto: str
     kupac_id: int
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepAccount":
-        """Create an instance from a dictionary."""
-        return cls(
-            korisnik_id=data.get("korisnikId"),
-            dp=data.get("dp"),
-            sifra=data.get("sifra"),
-            naziv=data.get("naziv"),
-            adresa=data.get("adresa"),
-            mjesto=data.get("mjesto"),
-            oib=data.get("oib"),
-            tarifni_model=data.get("tarifniModel"),
-            broj_brojila=data.get("brojBrojila"),
-            br_tarifa1=data.get("brTarifa1", 0),
-            br_tarifa2=data.get("brTarifa2", 0),
-            br_tarifa3=data.get("brTarifa3", 0),
-            datum_web_ocitanja=data.get("datumWebOcitanja"),
-            ugovorni_racun=data.get("ugovorniRacun", "").strip(),
-            pog_mjesto=data.get("pogMjesto"),
-            kupac_id=data.get("kupacId"),
-        )
-
-@dataclass
+@compiled({
+    "email": Field("mail", str),
+    "first_name": Field("ime", str),
+    "last_name": Field("prezime", str),
+    "accounts": Field("kupci", list, (), HepAccount.from_rows),
+})
+@dataclass(frozen=True, slots=True)
 class HepUser:
     """Class representing a HEP user."""
     email: str
     first_name: str
     last_name: str
-    accounts: List[HepAccount]
-
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepUser":
-        """Create an instance from a dictionary."""
-        accounts_data = data.get("kupci", [])
-        accounts = [HepAccount.from_dict(acc) for acc in accounts_data]
-        return cls(
-            email=data.get("mail"),
-            first_name=data.get("ime"),
-            last_name=data.get("prezime"),
-            accounts=accounts
-        )
+    accounts: Tuple[HepAccount, ...]
 
-@dataclass
+@compiled({
+    "vt": Field("vt", (int, float), 0.0),
+    "nt": Field("nt", (int, float), 0.0),
+    "snaga": Field("snaga", (int, float), 0.0),
+})
+@dataclass(frozen=True, slots=True)
 class HepPriceItem:
     """Price item (vt, nt, snaga)."""
     vt: float
     nt: float
     snaga: float
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepPriceItem":
-        return cls(
-            vt=data.get("vt", 0.0),
-            nt=data.get("nt", 0.0),
-            snaga=data.get("snaga", 0.0),
-        )
-
-@dataclass
+@compiled({
+    "proizvodnja": Field("proizvodnja", dict, {}, HepPriceItem.from_dict),
+    "prijenos": Field("prijenos", dict, {}, HepPriceItem.from_dict),
+    "distribucija": Field("distribucija", dict, {}, HepPriceItem.from_dict),
+    "mjerna_usluga": Field("mjernaUsluga", (int, float), 0.0),
+})
+@dataclass(frozen=True, slots=True)
 class HepTariffModel:
     """Tariff model (plavi, bijeli, crveni)."""
     proizvodnja: HepPriceItem
@@ -87,16 +106,15 @@ class HepTariffModel:
     distribucija: HepPriceItem
     mjerna_usluga: float
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepTariffModel":
-        return cls(
-            proizvodnja=HepPriceItem.from_dict(data.get("proizvodnja", {})),
-            prijenos=HepPriceItem.from_dict(data.get("prijenos", {})),
-            distribucija=HepPriceItem.from_dict(data.get("distribucija", {})),
-            mjerna_usluga=data.get("mjernaUsluga", 0.0),
-        )
-
-@dataclass
+@compiled({
+    "oie": Field("oie", (int, float), 0.0),
+    "pdv": Field("pdv", (int, float), 0.0),
+    "opskrba": Field("opskrba", (int, float), 0.0),
+    "plavi": Field("plavi", dict, {}, HepTariffModel.from_dict),
+    "bijeli": Field("bijeli", dict, {}, HepTariffModel.from_dict),
+    "crveni": Field("crveni", dict, {}, HepTariffModel.from_dict),
+})
+@dataclass(frozen=True, slots=True)
 class HepPrices:
     """HEP Prices."""
     oie: float
@@ -106,18 +124,91 @@ class HepPrices:
     bijeli: HepTariffModel
     crveni: HepTariffModel
 
+    def tariff_model_for(self, tarifni_model: Optional[str]) -> HepTariffModel:
+        """Return the tariff model matching an account's tarifni_model, bijeli by default."""
+        tariff_model = tarifni_model.lower() if tarifni_model else "bijeli"
+        if "bijeli" in tariff_model:
+            return self.bijeli
+        if "plavi" in tariff_model:
+            return self.plavi
+        if "crveni" in tariff_model:
+            return self.crveni
+        return self.bijeli
+
+@dataclass(frozen=True, slots=True)
+class HepComponentPrice:
+    """Resolved price of one tariff component (vt, nt or snaga) for a tariff model."""
+    proizvodnja: float
+    prijenos: float
+    distribucija: float
+    oie: float
+    net: float
+    gross: float
+
+@dataclass(frozen=True, slots=True)
+class HepPriceTable:
+    """Prices resolved for one account's tariff model, computed once per price refresh.
+
+    net sums production, transmission, distribution and, for energy (vt, nt),
+    the renewable energy fee; gross adds PDV. Opskrba is a fixed supply fee
+    rather than a per-kWh price, so it is kept separately.
+    """
+    tarifni_model: Optional[str]
+    vt: HepComponentPrice
+    nt: HepComponentPrice
+    snaga: HepComponentPrice
+    mjerna_usluga: float
+    opskrba: float
+    opskrba_gross: float
+    pdv: float
+    oie: float
+
     @classmethod
-    def from_dict(cls, data: dict) -> "HepPrices":
+    def resolve(cls, prices: HepPrices, tarifni_model: Optional[str]) -> "HepPriceTable":
+        model = prices.tariff_model_for(tarifni_model)
+        # PDV may come as a fraction (0.13) or a percentage (13)
+        vat = prices.pdv / 100 if prices.pdv > 1 else prices.pdv
+
+        def component(attribute: str, oie: float) -> HepComponentPrice:
+            proizvodnja = getattr(model.proizvodnja, attribute, 0.0)
+            prijenos = getattr(model.prijenos, attribute, 0.0)
+            distribucija = getattr(model.distribucija, attribute, 0.0)
+            net = proizvodnja + prijenos + distribucija + oie
+            return HepComponentPrice(
+                proizvodnja=proizvodnja,
+                prijenos=prijenos,
+                distribucija=distribucija,
+                oie=oie,
+                net=net,
+                gross=net * (1 + vat),
+            )
+
         return cls(
-            oie=data.get("oie", 0.0),
-            pdv=data.get("pdv", 0.0),
-            opskrba=data.get("opskrba", 0.0),
-            plavi=HepTariffModel.from_dict(data.get("plavi", {})),
-            bijeli=HepTariffModel.from_dict(data.get("bijeli", {})),
-            crveni=HepTariffModel.from_dict(data.get("crveni", {})),
+            tarifni_model=tarifni_model,
+            vt=component("vt", prices.oie),
+            nt=component("nt", prices.oie),
+            snaga=component("snaga", 0.0),
+            mjerna_usluga=model.mjerna_usluga,
+            opskrba=prices.opskrba,
+            opskrba_gross=prices.opskrba * (1 + vat),
+            pdv=prices.pdv,
+            oie=prices.oie,
         )
 
-@dataclass
+@compiled({
+    "kupac_id": Field("kupacId", int),
+    "datum": Field("datum", str),
+    "opis": Field("opis", str, convert=_intern),
+    "duguje": Field("duguje", (int, float), 0.0),
+    "potrazuje": Field("potrazuje", (int, float), 0.0),
+    "saldo": Field("saldo", (int, float), 0.0),
+    "dospijeva": Field("dospijeva", str),
+    "pnb": Field("pnb", str),
+    "iznos_ispis": Field("iznosIspis", (int, float), 0.0),
+    "racun": Field("racun", str),
+    "status": Field("status", str, convert=_intern),
+}, rows=True)
+@dataclass(frozen=True, slots=True)
 class HepBill:
     """Bill item (promet)."""
     kupac_id: int
@@ -132,53 +223,37 @@ class HepBill:
     racun: str
     status: str
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepBill":
-        return cls(
-            kupac_id=data.get("kupacId"),
-            datum=data.get("datum"),
-            opis=data.get("opis"),
-            duguje=data.get("duguje", 0.0),
-            potrazuje=data.get("potrazuje", 0.0),
-            saldo=data.get("saldo", 0.0),
-            dospijeva=data.get("dospijeva"),
-            pnb=data.get("pnb"),
-            iznos_ispis=data.get("iznosIspis", 0.0),
-            racun=data.get("racun"),
-            status=data.get("status"),
-        )
-
-@dataclass
+@compiled({
+    "iznos": Field("iznos", (int, float), 0.0),
+    "opis": Field("opis", str, convert=_intern),
+    "iznos_val": Field("iznosVal", str),
+})
+@dataclass(frozen=True, slots=True)
 class HepBalance:
     """Balance info (saldo)."""
     iznos: float
     opis: str
     iznos_val: str
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepBalance":
-        return cls(
-            iznos=data.get("iznos", 0.0),
-            opis=data.get("opis"),
-            iznos_val=data.get("iznosVal"),
-        )
-
-@dataclass
+@compiled({
+    "bills": Field("promet", list, (), HepBill.from_rows),
+    "balance": Field("saldo", dict, {}, HepBalance.from_dict),
+})
+@dataclass(frozen=True, slots=True)
 class HepBillingInfo:
     """Billing info container."""
-    bills: List[HepBill]
+    bills: Tuple[HepBill, ...]
     balance: HepBalance
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepBillingInfo":
-        bills_data = data.get("promet", [])
-        bills = [HepBill.from_dict(b) for b in bills_data]
-        return cls(
-            bills=bills,
-            balance=HepBalance.from_dict(data.get("saldo", {}))
-        )
-
-@dataclass
+@compiled({
+    "razdoblje": Field("razdoblje", str),
+    "tarifa1": Field("tarifa1", (int, float), 0),
+    "tarifa2": Field("tarifa2", (int, float), 0),
+    "tarifa3": Field("tarifa3", (int, float), 0),
+    "proizv1": Field("proizv1", (int, float), 0),
+    "proizv2": Field("proizv2", (int, float), 0),
+}, rows=True)
+@dataclass(frozen=True, slots=True)
 class HepConsumption:
     """Consumption info (potrosnja)."""
     razdoblje: str
@@ -188,18 +263,13 @@ class HepConsumption:
     proizv1: int
     proizv2: int
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepConsumption":
-        return cls(
-            razdoblje=data.get("razdoblje"),
-            tarifa1=data.get("tarifa1", 0),
-            tarifa2=data.get("tarifa2", 0),
-            tarifa3=data.get("tarifa3", 0),
-            proizv1=data.get("proizv1", 0),
-            proizv2=data.get("proizv2", 0),
-        )
-
-@dataclass
+@compiled({
+    "datum_izdavanja": Field("datumIzdavanja", str),
+    "broj_dokumenta": Field("brojDokumenta", str),
+    "razina": Field("razina", str, convert=_intern),
+    "stanje": Field("stanje", (int, float), 0.0, float),
+}, rows=True)
+@dataclass(frozen=True, slots=True)
 class HepWarning:
     """Warning/Notification info (opomena)."""
     datum_izdavanja: str
@@ -207,29 +277,67 @@ class HepWarning:
     razina: str
     stanje: float
 
+@dataclass(frozen=True, slots=True)
+class HepWarningIndex:
+    """Warning issue dates as sorted local calendar dates.
+
+    A warning is active while it was issued between the start of the previous
+    month and the end of the next month, so the answer only changes when a
+    month starts.
+    """
+    dates: Tuple[date, ...]
+
     @classmethod
-    def from_dict(cls, data: dict) -> "HepWarning":
-        return cls(
-            datum_izdavanja=data.get("datumIzdavanja"),
-            broj_dokumenta=data.get("brojDokumenta"),
-            razina=data.get("razina"),
-            stanje=float(data.get("stanje", 0.0)),
-        )
+    def from_warnings(cls, warnings: Iterable[HepWarning], tz: tzinfo) -> "HepWarningIndex":
+        """Parse issue dates once, converting timezone-aware ones to tz; unparsable dates are skipped."""
+        dates = []
+        for warning in warnings:
+            if not warning.datum_izdavanja:
+                continue
+            try:
+                issued = datetime.fromisoformat(warning.datum_izdavanja.replace("Z", "+00:00"))
+            except ValueError:
+                continue
+            if issued.tzinfo is not None:
+                issued = issued.astimezone(tz)
+            dates.append(issued.date())
+        dates.sort()
+        return cls(dates=tuple(dates))
+
+    def is_active(self, today: date) -> bool:
+        """Return True if any warning falls between the previous and the next month of today."""
+        start = _month_start(today, -1)
+        end = _month_start(today, 2)
+        index = bisect_left(self.dates, start)
+        return index < len(self.dates) and self.dates[index] < end
+
+    @staticmethod
+    def next_change(today: date) -> date:
+        """Return the next day on which is_active can change: the start of the next month."""
+        return _month_start(today, 1)
 
-@dataclass
+@compiled({
+    "status": Field("Status", int, 0),
+    "opis": Field("Opis", str, ""),
+})
+@dataclass(frozen=True, slots=True)
 class HepOmmCheckStatus:
     """Status of OMM check."""
     status: int
     opis: str
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepOmmCheckStatus":
-        return cls(
-            status=data.get("Status", 0),
-            opis=data.get("Opis", ""),
-        )
-
-@dataclass
+@compiled({
+    "br_tarifa": Field("Br_Tarifa", int, 0),
+    "omm": Field("Omm", str, ""),
+    "br_tarifa_1": Field("Br_Tarifa_1", int, 0),
+    "tarifa1_od": Field("Tarifa1_Od", int, 0),
+    "tarifa1_do": Field("Tarifa1_Do", int, 0),
+    "br_tarifa_2": Field("Br_Tarifa_2", int, 0),
+    "tarifa2_od": Field("Tarifa2_Od", int, 0),
+    "tarifa2_do": Field("Tarifa2_Do", int, 0),
+    "status": Field("Status", dict, {}, HepOmmCheckStatus.from_dict),
+})
+@dataclass(frozen=True, slots=True)
 class HepOmmCheck:
     """OMM Check result (Provjera_OmmDto)."""
     br_tarifa: int
@@ -242,44 +350,79 @@ class HepOmmCheck:
     tarifa2_do: int
     status: HepOmmCheckStatus
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepOmmCheck":
-        return cls(
-            br_tarifa=data.get("Br_Tarifa", 0),
-            omm=data.get("Omm", ""),
-            br_tarifa_1=data.get("Br_Tarifa_1", 0),
-            tarifa1_od=data.get("Tarifa1_Od", 0),
-            tarifa1_do=data.get("Tarifa1_Do", 0),
-            br_tarifa_2=data.get("Br_Tarifa_2", 0),
-            tarifa2_od=data.get("Tarifa2_Od", 0),
-            tarifa2_do=data.get("Tarifa2_Do", 0),
-            status=HepOmmCheckStatus.from_dict(data.get("Status", {})),
-        )
+    def reading_error(self, tarifa1: int, tarifa2: int) -> Optional[str]:
+        """Why HEP would refuse the readings, None if they fit the tariff count and ranges.
 
-@dataclass
+        Tariff 2 is only checked on OMMs that have it; a range of 0 to 0 is
+        treated as unknown.
+        """
+        tariffs = [("tarifa1", tarifa1, self.tarifa1_od, self.tarifa1_do)]
+        if self.br_tarifa >= 2:
+            if not tarifa2:
+                return f"OMM {self.omm} has {self.br_tarifa} tariffs, tarifa2 is required"
+            tariffs.append(("tarifa2", tarifa2, self.tarifa2_od, self.tarifa2_do))
+        for name, value, low, high in tariffs:
+            if high and not low <= value <= high:
+                return f"{name} {value} is outside the expected range {low} - {high}"
+        return None
+
+@compiled({
+    "omm_check": Field("Provjera_OmmDto", dict, {}, HepOmmCheck.from_dict),
+    "enc_value": Field("encValue", str, ""),
+})
+@dataclass(frozen=True, slots=True)
 class HepOmmCheckResult:
     """Result of OMM check including encryption value."""
     omm_check: HepOmmCheck
     enc_value: str
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepOmmCheckResult":
-        return cls(
-            omm_check=HepOmmCheck.from_dict(data.get("Provjera_OmmDto", {})),
-            enc_value=data.get("encValue", ""),
-        )
-
-@dataclass
+@compiled({
+    "status": Field("Status", int, 0),
+    "posalji": Field("Posalji", int, 0),
+    "opis": Field("Opis", str, ""),
+})
+@dataclass(frozen=True, slots=True)
 class HepReadingSubmissionResult:
     """Result of reading submission (Dostava)."""
     status: int
     posalji: int
     opis: str
 
-    @classmethod
-    def from_dict(cls, data: dict) -> "HepReadingSubmissionResult":
-        return cls(
-            status=data.get("Status", 0),
-            posalji=data.get("Posalji", 0),
-            opis=data.get("Opis", ""),
-        )
+@dataclass(frozen=True, slots=True)
+class HepOmmSubmission:
+    """Outcome of one reading of a batch submission, with HEP's description (opis)."""
+    omm_id: str
+    result: str
+    opis: str
+
+@dataclass(frozen=True, slots=True)
+class HepAccountSnapshot:
+    """Per-account view of a coordinator refresh.
+
+    The view is rebuilt only when one of its inputs changed, and updated_at
+    is when that last happened.
+    """
+    account: HepAccount
+    billing: Optional[HepBillingInfo]
+    consumption: Optional[Tuple[HepConsumption, ...]]
+    warnings: Optional[Tuple[HepWarning, ...]]
+    warning_index: Optional[HepWarningIndex]
+    price_table: Optional[HepPriceTable]
+    updated_at: Optional[datetime] = None
+
+@dataclass(frozen=True, slots=True)
+class HepSnapshot:
+    """Immutable result of one coordinator refresh, indexed by kupac_id.
+
+    updated_at is when the data last changed; from_cache is True while it is
+    the persisted copy restored at startup.
+    """
+    user: HepUser
+    prices: Optional[HepPrices]
+    accounts: Dict[int, HepAccountSnapshot]
+    updated_at: Optional[datetime] = None
+    from_cache: bool = False
+
+    def account(self, kupac_id: int) -> Optional[HepAccountSnapshot]:
+        """Return the view of one account, or None if it is no longer on the login."""
+        return self.accounts.get(kupac_id)
@@ -3,15 +3,29 @@ import logging
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy, CURRENCY_EURO
-from homeassistant.core import HomeAssistant
+from homeassistant.const import UnitOfEnergy, UnitOfTime, CURRENCY_EURO, EntityCategory
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_point_in_time
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import DeviceInfo
-
-from .const import DOMAIN
-from .models import HepAccount
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_COORDINATORS,
+    DATA_OMM_QUEUE,
+    DATA_OMM_SENSORS_ENTRY,
+    API_METRIC_ENDPOINTS,
+    OMM_METRIC_ENDPOINTS,
+    OMM_QUEUE_IDLE,
+    OMM_QUEUE_OK,
+    OMM_QUEUE_RETRYING,
+)
+from .metrics import HepRequestMetrics, OMM_METRICS
+from .models import HepAccount, HepAccountSnapshot, HepWarningIndex
 from .coordinator import HepDataUpdateCoordinator
+from .store import HepSnapshotStore
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,15 +42,26 @@ async def async_setup_entry(
     # Get scan interval from options, fallback to default
     scan_interval = entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
 
-    coordinator = HepDataUpdateCoordinator(hass, client, scan_interval)
+    coordinator = HepDataUpdateCoordinator(
+        hass, client, scan_interval, store=HepSnapshotStore(hass, entry.entry_id)
+    )
+    entry.async_on_unload(coordinator.async_shutdown)
+    hass.data.setdefault(DATA_COORDINATORS, {})[entry.entry_id] = coordinator
+    entry.async_on_unload(lambda: hass.data[DATA_COORDINATORS].pop(entry.entry_id, None))
     
-    # Force immediate data fetch on setup (including when integration is reloaded)
-    # This ensures fresh data is available immediately after reload
-    await coordinator.async_config_entry_first_refresh()
+    if await coordinator.async_restore_snapshot():
+        # Entities come up from the cached snapshot right away and the
+        # refresh replaces it in the background, without holding up startup
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} revalidate {entry.entry_id}"
+        )
+    else:
+        # No cache yet: force immediate data fetch on setup
+        await coordinator.async_config_entry_first_refresh()
 
     entities = []
-    if coordinator.data and coordinator.data.get("user") and coordinator.data.get("user").accounts:
-        for account in coordinator.data["user"].accounts:
+    if coordinator.data and coordinator.data.user.accounts:
+        for account in coordinator.data.user.accounts:
             # Current meter readings
             entities.append(HepMeterReadingSensor(coordinator, account, "Tarifa 1", "br_tarifa1"))
             entities.append(HepMeterReadingSensor(coordinator, account, "Tarifa 2", "br_tarifa2"))
@@ -54,13 +79,123 @@ async def async_setup_entry(
             
             # Warning binary sensor
             entities.append(HepWarningBinarySensor(coordinator, account))
+
+        # Diagnostics cover the whole config entry, so they go on the first account's device
+        first_account = coordinator.data.user.accounts[0]
+        entities.append(HepRefreshDurationSensor(coordinator, first_account))
+        for endpoint in API_METRIC_ENDPOINTS:
+            entities.append(HepEndpointMetricSensor(coordinator, first_account, client.metrics, endpoint))
     else:
         _LOGGER.error("No user data available in coordinator. Data structure: %s", coordinator.data)
 
+    # The OMM portal is shared by every config entry, so its sensors are
+    # created once, by the first entry set up, on a device of their own
+    if hass.data.setdefault(DATA_OMM_SENSORS_ENTRY, entry.entry_id) == entry.entry_id:
+        entry.async_on_unload(lambda: hass.data.pop(DATA_OMM_SENSORS_ENTRY, None))
+        for endpoint in OMM_METRIC_ENDPOINTS:
+            entities.append(HepOmmEndpointMetricSensor(OMM_METRICS, endpoint))
+        queue = hass.data.get(DATA_OMM_QUEUE)
+        if queue is not None:
+            entities.append(HepQueueDepthSensor(queue))
+            entities.append(HepQueueStatusSensor(queue))
+
     async_add_entities(entities)
 
 
-class HepBaseSensor(CoordinatorEntity, SensorEntity):
+def _staleness_attributes(coordinator, snapshot: HepAccountSnapshot | None) -> dict:
+    """Describe how current an account's data is: stale while it is the cached copy or the last refresh failed."""
+    if snapshot is None:
+        return {}
+    return {
+        "data_updated_at": snapshot.updated_at.isoformat() if snapshot.updated_at else None,
+        "stale": coordinator.data.from_cache or not coordinator.last_update_success,
+    }
+
+
+def _account_device_info(account: HepAccount) -> DeviceInfo:
+    """One device per account groups all of its sensors."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, str(account.kupac_id))},
+        name=f"OMM: {account.broj_brojila}",
+        manufacturer="HEP Elektra ODS",
+        model="Electricity Account",
+        configuration_url="https://mojracun.hep.hr",
+    )
+
+
+def _omm_device_info() -> DeviceInfo:
+    """One device for the OMM portal, shared by every config entry."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, "omm_portal")},
+        name="HEP OMM Portal",
+        manufacturer="HEP Elektra ODS",
+        model="OMM Reading Portal",
+        configuration_url="https://mojamreza.hep.hr",
+    )
+
+
+def _get_account_snapshot(coordinator, kupac_id: int) -> HepAccountSnapshot | None:
+    """Get an account's view of the latest coordinator snapshot, a single dict lookup."""
+    if coordinator.data is None:
+        return None
+    return coordinator.data.accounts.get(kupac_id)
+
+
+class HepCoordinatorEntity(CoordinatorEntity):
+    """Coordinator entity that writes its state only when it changed.
+
+    A coordinator update that leaves the entity's (available, state,
+    attributes) fingerprint as it was never reaches the state machine or
+    the recorder. The coordinator counts performed and skipped writes.
+    """
+
+    _account: HepAccount
+    _state_fingerprint = None
+    _state_inputs = None
+
+    def _current_inputs(self) -> tuple:
+        """Everything the state is derived from, compared by identity."""
+        return (
+            _get_account_snapshot(self.coordinator, self._account.kupac_id),
+            self.coordinator.data.from_cache if self.coordinator.data else None,
+            self.coordinator.last_update_success,
+        )
+
+    @callback
+    def _remember_state(self) -> None:
+        self._state_inputs = self._current_inputs()
+        self._state_fingerprint = (self.available, self.state, self.extra_state_attributes)
+
+    @callback
+    def _async_write_state_if_changed(self) -> None:
+        """Write the state unless its fingerprint is unchanged since the last write."""
+        fingerprint = (self.available, self.state, self.extra_state_attributes)
+        if fingerprint == self._state_fingerprint:
+            self.coordinator.state_writes_skipped += 1
+            return
+        self._state_fingerprint = fingerprint
+        self.coordinator.state_writes += 1
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state the platform is about to write."""
+        await super().async_added_to_hass()
+        self._remember_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if this entity's data changed."""
+        inputs = self._current_inputs()
+        if self._state_inputs is not None and all(
+            new is old for new, old in zip(inputs, self._state_inputs)
+        ):
+            self.coordinator.state_writes_skipped += 1
+            return
+        self._state_inputs = inputs
+        self._async_write_state_if_changed()
+
+
+class HepBaseSensor(HepCoordinatorEntity, SensorEntity):
     """Base class for HEP sensors."""
 
     def __init__(self, coordinator, account: HepAccount, name: str):
@@ -71,23 +206,30 @@ class HepBaseSensor(CoordinatorEntity, SensorEntity):
         self._attr_unique_id = f"hep_{account.kupac_id}_{name.lower().replace(' ', '_')}"
         
         # Device info - group all sensors under one device per account
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, str(account.kupac_id))},
-            name=f"OMM: {account.broj_brojila}",
-            manufacturer="HEP Elektra ODS",
-            model="Electricity Account",
-            configuration_url="https://mojracun.hep.hr",
-        )
+        self._attr_device_info = _account_device_info(account)
+
+    def _get_account_snapshot(self) -> HepAccountSnapshot | None:
+        """Get this account's view of the latest coordinator snapshot."""
+        return _get_account_snapshot(self.coordinator, self._account.kupac_id)
 
-    def _get_account_data(self):
+    def _get_account_data(self) -> HepAccount | None:
         """Get account data from coordinator."""
-        if not self.coordinator.data or not self.coordinator.data.get("user"):
-            return None
-        
-        for account in self.coordinator.data["user"].accounts:
-            if account.kupac_id == self._account.kupac_id:
-                return account
-        return None
+        snapshot = self._get_account_snapshot()
+        return snapshot.account if snapshot else None
+
+    @property
+    def available(self) -> bool:
+        """Stay available on the last good data while a refresh fails."""
+        return self._get_account_snapshot() is not None
+
+    def _account_attributes(self) -> dict:
+        """Return the sensor specific attributes."""
+        return {}
+
+    @property
+    def extra_state_attributes(self):
+        """Return extra attributes."""
+        return {**self._account_attributes(), **_staleness_attributes(self.coordinator, self._get_account_snapshot())}
 
 
 class HepMeterReadingSensor(HepBaseSensor):
@@ -110,9 +252,8 @@ class HepMeterReadingSensor(HepBaseSensor):
             return getattr(account, self._attribute, None)
         return None
 
-    @property
-    def extra_state_attributes(self):
-        """Return extra attributes."""
+    def _account_attributes(self) -> dict:
+        """Return the sensor specific attributes."""
         account = self._get_account_data()
         if not account:
             return {}
@@ -138,24 +279,22 @@ class HepBalanceSensor(HepBaseSensor):
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        if not self.coordinator.data or not self.coordinator.data.get("billing"):
+        snapshot = self._get_account_snapshot()
+        billing = snapshot.billing if snapshot else None
+        if not billing:
             _LOGGER.debug("Balance sensor: No billing data in coordinator")
             return None
         
-        billing = self.coordinator.data["billing"]
-        if billing and billing.balance:
+        if billing.balance:
             _LOGGER.debug("Balance sensor value: %s", billing.balance.iznos)
             return billing.balance.iznos
         _LOGGER.debug("Balance sensor: billing or balance is None")
         return None
 
-    @property
-    def extra_state_attributes(self):
-        """Return extra attributes."""
-        if not self.coordinator.data or not self.coordinator.data.get("billing"):
-            return {}
-        
-        billing = self.coordinator.data["billing"]
+    def _account_attributes(self) -> dict:
+        """Return the sensor specific attributes."""
+        snapshot = self._get_account_snapshot()
+        billing = snapshot.billing if snapshot else None
         if not billing or not billing.balance:
             return {}
         
@@ -188,72 +327,37 @@ class HepPricingSensor(HepBaseSensor):
         self._attr_native_unit_of_measurement = f"{CURRENCY_EURO}/kWh"
         self._attr_suggested_display_precision = 6
 
+    def _get_component_price(self):
+        """Get this sensor's component from the account's precomputed price table."""
+        snapshot = self._get_account_snapshot()
+        if not snapshot or not snapshot.price_table:
+            return None, None
+        return snapshot.price_table, getattr(snapshot.price_table, self._attribute, None)
+
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        if not self.coordinator.data or not self.coordinator.data.get("prices"):
-            return None
-        
-        prices = self.coordinator.data["prices"]
-        account = self._get_account_data()
-        
-        if not prices or not account:
+        _table, component = self._get_component_price()
+        if component is None:
             return None
         
-        # Determine tariff model (bijeli, plavi, crveni)
-        tariff_model = account.tarifni_model.lower() if account.tarifni_model else "bijeli"
-        if "bijeli" in tariff_model:
-            model = prices.bijeli
-        elif "plavi" in tariff_model:
-            model = prices.plavi
-        elif "crveni" in tariff_model:
-            model = prices.crveni
-        else:
-            model = prices.bijeli
-        
-        # Calculate total price
-        proizvodnja = getattr(model.proizvodnja, self._attribute, 0.0)
-        prijenos = getattr(model.prijenos, self._attribute, 0.0)
-        distribucija = getattr(model.distribucija, self._attribute, 0.0)
-        
-        total = proizvodnja + prijenos + distribucija + prices.oie
-        
-        return round(total, 6)
+        return round(component.net, 6)
 
-    @property
-    def extra_state_attributes(self):
-        """Return extra attributes."""
-        if not self.coordinator.data or not self.coordinator.data.get("prices"):
+    def _account_attributes(self) -> dict:
+        """Return the sensor specific attributes."""
+        table, component = self._get_component_price()
+        if component is None:
             return {}
         
-        prices = self.coordinator.data["prices"]
-        account = self._get_account_data()
-        
-        if not prices or not account:
-            return {}
-        
-        tariff_model = account.tarifni_model.lower() if account.tarifni_model else "bijeli"
-        if "bijeli" in tariff_model:
-            model = prices.bijeli
-        elif "plavi" in tariff_model:
-            model = prices.plavi
-        elif "crveni" in tariff_model:
-            model = prices.crveni
-        else:
-            model = prices.bijeli
-        
-        proizvodnja = getattr(model.proizvodnja, self._attribute, 0.0)
-        prijenos = getattr(model.prijenos, self._attribute, 0.0)
-        distribucija = getattr(model.distribucija, self._attribute, 0.0)
-        
         return {
-            "tariff_model": account.tarifni_model,
-            "production": f"{proizvodnja:.6f}",
-            "transmission": f"{prijenos:.6f}",
-            "distribution": f"{distribucija:.6f}",
-            "renewable_energy_fee": f"{prices.oie:.6f}",
-            "supply": f"{prices.opskrba:.6f}",
-            "vat_rate": f"{prices.pdv:.6f}",
+            "tariff_model": table.tarifni_model,
+            "production": f"{component.proizvodnja:.6f}",
+            "transmission": f"{component.prijenos:.6f}",
+            "distribution": f"{component.distribucija:.6f}",
+            "price_with_vat": f"{component.gross:.6f}",
+            "renewable_energy_fee": f"{table.oie:.6f}",
+            "supply": f"{table.opskrba:.6f}",
+            "vat_rate": f"{table.pdv:.6f}",
         }
 
 
@@ -272,23 +376,18 @@ class HepConsumptionHistorySensor(HepBaseSensor):
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        if not self.coordinator.data or not self.coordinator.data.get("consumption"):
-            return None
-        
-        consumption_list = self.coordinator.data["consumption"]
+        snapshot = self._get_account_snapshot()
+        consumption_list = snapshot.consumption if snapshot else None
         if consumption_list and len(consumption_list) > 0:
             latest = consumption_list[0]
             return getattr(latest, self._attribute, 0)
         
         return None
 
-    @property
-    def extra_state_attributes(self):
-        """Return extra attributes."""
-        if not self.coordinator.data or not self.coordinator.data.get("consumption"):
-            return {}
-        
-        consumption_list = self.coordinator.data["consumption"]
+    def _account_attributes(self) -> dict:
+        """Return the sensor specific attributes."""
+        snapshot = self._get_account_snapshot()
+        consumption_list = snapshot.consumption if snapshot else None
         if not consumption_list or len(consumption_list) == 0:
             return {}
         
@@ -303,7 +402,7 @@ class HepConsumptionHistorySensor(HepBaseSensor):
         }
 
 
-class HepWarningBinarySensor(CoordinatorEntity, BinarySensorEntity):
+class HepWarningBinarySensor(HepCoordinatorEntity, BinarySensorEntity):
     """Binary sensor for payment warnings."""
 
     def __init__(self, coordinator, account: HepAccount):
@@ -313,76 +412,72 @@ class HepWarningBinarySensor(CoordinatorEntity, BinarySensorEntity):
         self._attr_name = "Payment Warning" # Just the sensor name, no prefix
         self._attr_unique_id = f"hep_{account.kupac_id}_payment_warning"
         self._attr_device_class = BinarySensorDeviceClass.PROBLEM
+        self._attr_is_on = False
+        self._unsub_boundary = None
         
         # Device info
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, str(account.kupac_id))},
-            name=f"OMM: {account.broj_brojila}",
-            manufacturer="HEP Elektra ODS",
-            model="Electricity Account",
-            configuration_url="https://mojracun.hep.hr",
+        self._attr_device_info = _account_device_info(account)
+
+    def _update_is_on(self) -> None:
+        """Recompute the state from the pre-parsed warning dates.
+
+        Only ON if a warning was issued between the start of the previous month
+        and the end of the next month, in local time.
+        """
+        snapshot = _get_account_snapshot(self.coordinator, self._account.kupac_id)
+        index = snapshot.warning_index if snapshot else None
+        self._attr_is_on = bool(index and index.is_active(dt_util.now().date()))
+
+    @callback
+    def _schedule_boundary_update(self) -> None:
+        """Flip the state when the month changes, even if no refresh happens then."""
+        next_change = HepWarningIndex.next_change(dt_util.now().date())
+        self._unsub_boundary = async_track_point_in_time(
+            self.hass, self._handle_boundary, dt_util.start_of_local_day(next_change)
         )
 
+    @callback
+    def _handle_boundary(self, _now) -> None:
+        """Re-evaluate at the month boundary and arm the next one."""
+        self._update_is_on()
+        self._async_write_state_if_changed()
+        self._schedule_boundary_update()
+
+    @callback
+    def _cancel_boundary_update(self) -> None:
+        if self._unsub_boundary:
+            self._unsub_boundary()
+            self._unsub_boundary = None
+
+    async def async_added_to_hass(self) -> None:
+        """Compute the initial state and arm the month boundary timer."""
+        self._update_is_on()
+        await super().async_added_to_hass()
+        self._schedule_boundary_update()
+        self.async_on_remove(self._cancel_boundary_update)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Recompute the state only when new data arrives."""
+        self._update_is_on()
+        super()._handle_coordinator_update()
+
     @property
-    def is_on(self):
-        """Return true if there are warnings."""
-        if not self.coordinator.data or not self.coordinator.data.get("warnings"):
-            return False
-        
-        warnings = self.coordinator.data["warnings"]
-        if not warnings:
-            return False
-            
-        # Filter warnings: only show ON if warning date is between current month -1 and current month +1
-        try:
-            now = datetime.now()
-            # Start of current month
-            current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            # Start of previous month
-            prev_month_end = current_month_start - timedelta(days=1)
-            start_date = prev_month_end.replace(day=1)
-            
-            # End of next month
-            # Add 32 days to current month start to get into next month
-            next_month_start = (current_month_start + timedelta(days=32)).replace(day=1)
-            # Add 32 days to next month start to get into month after next
-            month_after_next_start = (next_month_start + timedelta(days=32)).replace(day=1)
-            # Subtract 1 day to get end of next month
-            end_date = month_after_next_start - timedelta(days=1)
-            
-            for w in warnings:
-                if not w.datum_izdavanja:
-                    continue
-                    
-                # Parse date (handle Z suffix)
-                dt_str = w.datum_izdavanja.replace("Z", "+00:00")
-                w_date = datetime.fromisoformat(dt_str)
-                
-                # Compare dates (ignoring time and timezone for simplicity in month check)
-                if start_date.date() <= w_date.date() <= end_date.date():
-                    return True
-                    
-            return False
-            
-        except Exception as e:
-            _LOGGER.error("Error processing warning dates: %s", e)
-            # Fallback: if we can't parse, but there are warnings, maybe default to True or False?
-            # Let's default to False to avoid false positives if logic fails
-            return False
+    def available(self) -> bool:
+        """Stay available on the last good data while a refresh fails."""
+        return _get_account_snapshot(self.coordinator, self._account.kupac_id) is not None
 
     @property
     def extra_state_attributes(self):
         """Return extra attributes."""
-        if not self.coordinator.data or not self.coordinator.data.get("warnings"):
-            return {}
-        
-        warnings = self.coordinator.data["warnings"]
+        snapshot = _get_account_snapshot(self.coordinator, self._account.kupac_id)
+        warnings = snapshot.warnings if snapshot else None
         if not warnings or len(warnings) == 0:
-            return {}
+            return _staleness_attributes(self.coordinator, snapshot)
         
         attrs = {
             "warning_count": len(warnings),
+            **_staleness_attributes(self.coordinator, snapshot),
         }
         
         # Add latest warning details
@@ -394,3 +489,197 @@ class HepWarningBinarySensor(CoordinatorEntity, BinarySensorEntity):
             attrs["latest_warning_document"] = latest.broj_dokumenta
         
         return attrs
+
+
+def _last_latency_ms(metrics: HepRequestMetrics, endpoint: str):
+    """Latency of an endpoint's last request in milliseconds, None before its first request."""
+    endpoint_metrics = metrics.endpoints.get(endpoint)
+    if endpoint_metrics is None or endpoint_metrics.last_latency is None:
+        return None
+    return round(endpoint_metrics.last_latency * 1000, 1)
+
+
+class HepDiagnosticSensor(SensorEntity):
+    """Diagnostic sensor updated after every refresh, whether or not the data changed."""
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator, account: HepAccount, name: str, unique_suffix: str):
+        """Initialize the diagnostic sensor."""
+        self.coordinator = coordinator
+        self._attr_name = name
+        self._attr_unique_id = f"hep_{account.kupac_id}_{unique_suffix}"
+        self._attr_device_info = _account_device_info(account)
+
+    async def async_added_to_hass(self) -> None:
+        """Write the state after every refresh."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.async_add_refresh_listener(self.async_write_ha_state))
+
+
+class HepRefreshDurationSensor(HepDiagnosticSensor):
+    """Duration of the last coordinator refresh."""
+
+    def __init__(self, coordinator, account: HepAccount):
+        """Initialize the refresh duration sensor."""
+        super().__init__(coordinator, account, "Refresh Duration", "refresh_duration")
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTime.SECONDS
+        self._attr_suggested_display_precision = 2
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        duration = self.coordinator.last_refresh_duration
+        return round(duration, 3) if duration is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Return extra attributes."""
+        return {
+            "endpoint_timings_ms": {
+                name: round(seconds * 1000, 1) for name, seconds in self.coordinator.last_refresh_timings.items()
+            },
+            "failed_endpoints": list(self.coordinator.failed_endpoints),
+            "degraded": self.coordinator.degraded,
+        }
+
+
+class HepEndpointMetricSensor(HepDiagnosticSensor):
+    """Latency of one HEP endpoint, with its histogram, sizes, status codes and retries as attributes."""
+
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, account: HepAccount, metrics: HepRequestMetrics, endpoint: str):
+        """Initialize the endpoint metric sensor."""
+        super().__init__(coordinator, account, f"API {endpoint} Latency", f"api_{endpoint}_latency")
+        self._metrics = metrics
+        self._endpoint = endpoint
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+        self._attr_suggested_display_precision = 0
+
+    @property
+    def native_value(self):
+        """Return the latency of the last request in milliseconds."""
+        return _last_latency_ms(self._metrics, self._endpoint)
+
+    @property
+    def extra_state_attributes(self):
+        """Return extra attributes."""
+        metrics = self._metrics.endpoints.get(self._endpoint)
+        return metrics.as_dict() if metrics else {}
+
+
+class HepOmmSensor(SensorEntity):
+    """Diagnostic sensor of the OMM portal, on the device shared by every config entry."""
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, name: str, unique_suffix: str):
+        """Initialize the OMM sensor."""
+        self._attr_name = name
+        self._attr_unique_id = f"hep_{unique_suffix}"
+        self._attr_device_info = _omm_device_info()
+
+
+class HepOmmEndpointMetricSensor(HepOmmSensor):
+    """Latency of one OMM portal endpoint, updated whenever it records a request."""
+
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, metrics: HepRequestMetrics, endpoint: str):
+        """Initialize the OMM endpoint metric sensor."""
+        super().__init__(f"API {endpoint} Latency", f"{endpoint}_latency")
+        self._metrics = metrics
+        self._endpoint = endpoint
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+        self._attr_suggested_display_precision = 0
+
+    async def async_added_to_hass(self) -> None:
+        """Write the state after every request to the endpoint."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._metrics.add_listener(self._handle_metrics_update))
+
+    @callback
+    def _handle_metrics_update(self, endpoint: str) -> None:
+        if endpoint == self._endpoint:
+            self.async_write_ha_state()
+
+    @property
+    def native_value(self):
+        """Return the latency of the last request in milliseconds."""
+        return _last_latency_ms(self._metrics, self._endpoint)
+
+    @property
+    def extra_state_attributes(self):
+        """Return extra attributes."""
+        metrics = self._metrics.endpoints.get(self._endpoint)
+        return metrics.as_dict() if metrics else {}
+
+
+def _without_omm_ids(items) -> list:
+    """Queue readings or results without their OMM ids, which are kept out of the recorder like diagnostics."""
+    return [{key: value for key, value in item.items() if key != "omm_id"} for item in items]
+
+
+class HepQueueSensor(HepOmmSensor):
+    """Diagnostic sensor of the OMM submission queue, updated whenever the queue changes."""
+
+    def __init__(self, queue, name: str, unique_suffix: str):
+        """Initialize the queue sensor."""
+        super().__init__(name, unique_suffix)
+        self._queue = queue
+
+    async def async_added_to_hass(self) -> None:
+        """Write the state after every queue change."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._queue.async_add_listener(self.async_write_ha_state))
+
+
+class HepQueueDepthSensor(HepQueueSensor):
+    """Number of OMM readings waiting to be submitted."""
+
+    def __init__(self, queue):
+        """Initialize the queue depth sensor."""
+        super().__init__(queue, "OMM Queue Depth", "omm_queue_depth")
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        """Return the number of queued readings."""
+        return len(self._queue)
+
+    @property
+    def extra_state_attributes(self):
+        """Return extra attributes."""
+        return {"readings": _without_omm_ids(self._queue.as_dict()["readings"])}
+
+
+class HepQueueStatusSensor(HepQueueSensor):
+    """Outcome of the last OMM queue flush: idle, ok or retrying."""
+
+    def __init__(self, queue):
+        """Initialize the queue status sensor."""
+        super().__init__(queue, "OMM Queue Last Flush", "omm_queue_last_flush")
+        self._attr_device_class = SensorDeviceClass.ENUM
+        self._attr_options = [OMM_QUEUE_IDLE, OMM_QUEUE_OK, OMM_QUEUE_RETRYING]
+
+    @property
+    def native_value(self):
+        """Return the status of the last flush."""
+        return self._queue.status
+
+    @property
+    def extra_state_attributes(self):
+        """Return extra attributes."""
+        summary = self._queue.as_dict()
+        attributes = {key: summary[key] for key in ("last_flush_at", "next_flush_at", "failed_flushes")}
+        attributes["last_results"] = _without_omm_ids(summary["last_results"])
+        return attributes
@@ -0,0 +1,190 @@
+"""Persistent cache of the last good coordinator snapshot.
+
+Entities are created from the cached snapshot at setup and the coordinator
+revalidates in the background, so a slow or unreachable HEP API does not
+hold up Home Assistant startup.
+
+Flat models (accounts, bills, consumption and warning rows) are stored as
+positional rows with one field-name header per model; a cache written by a
+version with different fields is discarded rather than migrated, since the
+next refresh rebuilds it anyway. Price tables and warning indexes are
+derived data and are recomputed on load.
+"""
+import logging
+from dataclasses import astuple, asdict, fields
+from datetime import tzinfo
+from typing import Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, SNAPSHOT_STORAGE_VERSION, SNAPSHOT_SAVE_DELAY
+from .models import (
+    HepAccount,
+    HepAccountSnapshot,
+    HepBalance,
+    HepBill,
+    HepBillingInfo,
+    HepConsumption,
+    HepPriceItem,
+    HepPrices,
+    HepPriceTable,
+    HepSnapshot,
+    HepTariffModel,
+    HepUser,
+    HepWarning,
+    HepWarningIndex,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_ROW_MODELS = {
+    "account": HepAccount,
+    "bill": HepBill,
+    "consumption": HepConsumption,
+    "warning": HepWarning,
+}
+
+
+def _row_fields() -> dict:
+    return {name: [field.name for field in fields(model)] for name, model in _ROW_MODELS.items()}
+
+
+def _rows(items) -> Optional[list]:
+    return None if items is None else [astuple(item) for item in items]
+
+
+def _from_rows(model, rows) -> Optional[tuple]:
+    return None if rows is None else tuple([model(*row) for row in rows])
+
+
+def _prices_from_dict(data: dict) -> HepPrices:
+    def tariff_model(model: dict) -> HepTariffModel:
+        return HepTariffModel(
+            proizvodnja=HepPriceItem(**model["proizvodnja"]),
+            prijenos=HepPriceItem(**model["prijenos"]),
+            distribucija=HepPriceItem(**model["distribucija"]),
+            mjerna_usluga=model["mjerna_usluga"],
+        )
+
+    return HepPrices(
+        oie=data["oie"],
+        pdv=data["pdv"],
+        opskrba=data["opskrba"],
+        plavi=tariff_model(data["plavi"]),
+        bijeli=tariff_model(data["bijeli"]),
+        crveni=tariff_model(data["crveni"]),
+    )
+
+
+def snapshot_to_dict(snapshot: HepSnapshot) -> dict:
+    """Serialize a snapshot to a compact JSON-compatible dict."""
+    accounts = []
+    for view in snapshot.accounts.values():
+        billing = view.billing
+        accounts.append({
+            "kupac_id": view.account.kupac_id,
+            "updated_at": view.updated_at.isoformat() if view.updated_at else None,
+            "bills": _rows(billing.bills) if billing else None,
+            "balance": asdict(billing.balance) if billing else None,
+            "consumption": _rows(view.consumption),
+            "warnings": _rows(view.warnings),
+        })
+    return {
+        "fields": _row_fields(),
+        "updated_at": snapshot.updated_at.isoformat() if snapshot.updated_at else None,
+        "user": {
+            "email": snapshot.user.email,
+            "first_name": snapshot.user.first_name,
+            "last_name": snapshot.user.last_name,
+            "accounts": _rows(snapshot.user.accounts),
+        },
+        "prices": asdict(snapshot.prices) if snapshot.prices else None,
+        "accounts": accounts,
+    }
+
+
+def snapshot_from_dict(data: dict, time_zone: tzinfo) -> Optional[HepSnapshot]:
+    """Rebuild a snapshot, or return None if it was written with different model fields."""
+    if data.get("fields") != _row_fields():
+        return None
+
+    user_data = data["user"]
+    user = HepUser(
+        email=user_data["email"],
+        first_name=user_data["first_name"],
+        last_name=user_data["last_name"],
+        accounts=_from_rows(HepAccount, user_data["accounts"]),
+    )
+    prices = _prices_from_dict(data["prices"]) if data["prices"] else None
+    updated_at = dt_util.parse_datetime(data["updated_at"]) if data["updated_at"] else None
+    cached_accounts = {item["kupac_id"]: item for item in data["accounts"]}
+
+    price_tables = {}
+    accounts = {}
+    for account in user.accounts:
+        item = cached_accounts.get(account.kupac_id, {})
+        billing = None
+        if item.get("bills") is not None:
+            billing = HepBillingInfo(
+                bills=_from_rows(HepBill, item["bills"]),
+                balance=HepBalance(**item["balance"]),
+            )
+        warnings = _from_rows(HepWarning, item.get("warnings"))
+        price_table = None
+        if prices is not None:
+            price_table = price_tables.get(account.tarifni_model)
+            if price_table is None:
+                price_table = price_tables[account.tarifni_model] = HepPriceTable.resolve(
+                    prices, account.tarifni_model
+                )
+        accounts[account.kupac_id] = HepAccountSnapshot(
+            account=account,
+            billing=billing,
+            consumption=_from_rows(HepConsumption, item.get("consumption")),
+            warnings=warnings,
+            warning_index=HepWarningIndex.from_warnings(warnings, time_zone) if warnings is not None else None,
+            price_table=price_table,
+            updated_at=dt_util.parse_datetime(item["updated_at"]) if item.get("updated_at") else updated_at,
+        )
+
+    return HepSnapshot(
+        user=user,
+        prices=prices,
+        accounts=accounts,
+        updated_at=updated_at,
+        from_cache=True,
+    )
+
+
+class HepSnapshotStore:
+    """Keeps the last good snapshot of one config entry in HA storage."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        """Initialize."""
+        self._hass = hass
+        self._store = Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+
+    async def async_load(self) -> Optional[HepSnapshot]:
+        """Load the cached snapshot, or None if there is none or it cannot be used."""
+        try:
+            data = await self._store.async_load()
+            if not data:
+                return None
+            time_zone = dt_util.get_time_zone(self._hass.config.time_zone) or dt_util.DEFAULT_TIME_ZONE
+            snapshot = snapshot_from_dict(data, time_zone)
+        except Exception as e:
+            _LOGGER.warning("Discarding unreadable HEP snapshot cache: %s", e)
+            return None
+        if snapshot is None:
+            _LOGGER.debug("Discarding HEP snapshot cache written with different model fields")
+        return snapshot
+
+    def async_save(self, snapshot: HepSnapshot) -> None:
+        """Schedule a save; saves within SNAPSHOT_SAVE_DELAY are coalesced and serialized once."""
+        self._store.async_delay_save(lambda: snapshot_to_dict(snapshot), SNAPSHOT_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Delete the cache, when the config entry is removed."""
+        await self._store.async_remove()
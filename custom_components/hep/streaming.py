@@ -0,0 +1,227 @@
+"""Incremental parsing of large responses.
+
+The history endpoints return one long array, either as the whole body
+(/potrosnja) or as one member of an object (/promet). JsonArrayStream is
+fed the body chunk by chunk and hands back the array's elements as soon
+as each one is complete, so only the current element is ever held
+undecoded and the body never has to be buffered whole.
+
+The OMM page is HTML of which only two form tokens are needed;
+FormTokenScanner picks them out while the page is read and tells when
+the rest of it can be skipped.
+"""
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterator, Optional
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+# Characters that may continue a number whose digits so far decoded fine
+_NUMBER_TAIL = ".eE+-"
+
+
+class JsonArrayStream:
+    """Push parser for a JSON array, or for an object holding one under key.
+
+    feed() yields the array elements completed by a chunk, one at a time,
+    and must be exhausted before the next chunk is fed; other members of
+    the enclosing object are decoded whole into `members`. close() raises
+    ValueError if the document is incomplete or malformed.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        """Initialize."""
+        self._key = key
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "array_start" if key is None else "object_start"
+        self._member = None
+        self.members = {}
+        self.done = False
+
+    def feed(self, chunk: bytes) -> Iterator[Any]:
+        """Parse a chunk of the body, yielding the elements it completed."""
+        self._buffer = self._buffer[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self) -> list:
+        """Parse whatever is left once the body has been read completely."""
+        self._buffer = self._buffer[self._pos:] + self._utf8.decode(b"", final=True)
+        self._pos = 0
+        items = list(self._parse(final=True))
+        if not self.done:
+            raise ValueError(f"Truncated JSON document, parser stopped in state {self._state}")
+        if _WHITESPACE.match(self._buffer, self._pos).end() != len(self._buffer):
+            raise ValueError("Extra data after JSON document")
+        return items
+
+    def _char(self) -> Optional[str]:
+        """Skip whitespace and return the next character, None if the buffer is exhausted."""
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+        return self._buffer[self._pos] if self._pos < len(self._buffer) else None
+
+    def _value(self, final: bool):
+        """Decode the value at the current position; raises IndexError if it may be incomplete."""
+        try:
+            value, end = _DECODER.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            raise IndexError from None
+        # A number at the very end of the buffer may continue in the next
+        # chunk, also when only its fraction or exponent is cut off ("12." or "1e+")
+        if not final and (
+            end == len(self._buffer)
+            or (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and not self._buffer[end:].strip(_NUMBER_TAIL)
+            )
+        ):
+            raise IndexError
+        self._pos = end
+        return value
+
+    def _expect(self, char: str, allowed: str) -> None:
+        if char not in allowed:
+            raise ValueError(f"Unexpected {char!r} at state {self._state}, expected one of {allowed!r}")
+        self._pos += 1
+
+    def _parse(self, final: bool) -> Iterator[Any]:
+        while not self.done:
+            char = self._char()
+            if char is None:
+                break
+            state = self._state
+            try:
+                if state == "array_start":
+                    self._expect(char, "[")
+                    self._state = "array_first"
+                elif state == "array_first":
+                    if char == "]":
+                        self._pos += 1
+                        self._end_array()
+                    else:
+                        self._state = "array_item"
+                elif state == "array_item":
+                    item = self._value(final)
+                    self._state = "array_next"
+                    yield item
+                elif state == "array_next":
+                    self._expect(char, ",]")
+                    if char == "]":
+                        self._end_array()
+                    else:
+                        self._state = "array_item"
+                elif state == "object_start":
+                    self._expect(char, "{")
+                    self._state = "object_first"
+                elif state == "object_first":
+                    if char == "}":
+                        self._pos += 1
+                        self.done = True
+                    else:
+                        self._state = "member_key"
+                elif state == "member_key":
+                    if char != '"':
+                        raise ValueError(f"Unexpected {char!r} where a member name was expected")
+                    self._member = self._value(final)
+                    self._state = "member_colon"
+                elif state == "member_colon":
+                    self._expect(char, ":")
+                    self._state = "member_value"
+                elif state == "member_value":
+                    if self._member == self._key and char == "[":
+                        self._pos += 1
+                        self._state = "array_first"
+                    else:
+                        self.members[self._member] = self._value(final)
+                        self._state = "member_next"
+                elif state == "member_next":
+                    self._expect(char, ",}")
+                    if char == "}":
+                        self.done = True
+                    else:
+                        self._state = "member_key"
+            except IndexError:
+                # The current value continues in the next chunk
+                break
+
+    def _end_array(self) -> None:
+        if self._key is None:
+            self.done = True
+        else:
+            self._state = "member_next"
+
+
+_TOKEN_FIELD = b'name="__RequestVerificationToken" type="hidden" value="'
+
+
+class FormTokenScanner:
+    """Finds the anti-forgery token of forms in an HTML page fed chunk by chunk.
+
+    The token of an element is the value of the first hidden
+    __RequestVerificationToken input after the element's id attribute.
+    The page is searched once, front to back, with plain substring
+    searches, so no part of it is scanned twice however it is laid out.
+    feed() returns True as soon as every element has its token.
+    """
+
+    def __init__(self, *element_ids: str):
+        """Initialize."""
+        self._markers = {f'id="{element_id}"'.encode(): element_id for element_id in element_ids}
+        # Elements whose id was seen, waiting for the next token input
+        self._waiting = []
+        # Enough of the previous chunk to find a needle split across chunks
+        self._keep = max(len(needle) for needle in (_TOKEN_FIELD, *self._markers)) - 1
+        self._buffer = b""
+        self.tokens: Dict[str, str] = {}
+
+    @property
+    def done(self) -> bool:
+        return not self._markers and not self._waiting
+
+    def feed(self, chunk: bytes) -> bool:
+        """Scan a chunk of the page; True once every token has been found."""
+        buffer = self._buffer + chunk
+        pos = 0
+        while not self.done:
+            index, needle = self._next_needle(buffer, pos)
+            if index < 0:
+                pos = max(pos, len(buffer) - self._keep)
+                break
+            if needle is _TOKEN_FIELD:
+                start = index + len(_TOKEN_FIELD)
+                end = buffer.find(b'"', start)
+                if end < 0:
+                    # The value continues in the next chunk
+                    pos = index
+                    break
+                token = buffer[start:end].decode("ascii", "replace")
+                for element_id in self._waiting:
+                    self.tokens[element_id] = token
+                self._waiting = []
+                pos = end + 1
+            else:
+                self._waiting.append(self._markers.pop(needle))
+                pos = index + len(needle)
+        self._buffer = buffer[pos:]
+        return self.done
+
+    def _next_needle(self, buffer: bytes, pos: int):
+        """Return the position and needle of the earliest id or, if one is waiting, token input from pos."""
+        found = -1
+        found_needle = None
+        needles = list(self._markers)
+        if self._waiting:
+            needles.append(_TOKEN_FIELD)
+        for needle in needles:
+            # Only an earlier match matters once one is found
+            index = buffer.find(needle, pos, found + len(needle) if found >= 0 else None)
+            if index >= 0 and (found < 0 or index < found):
+                found = index
+                found_needle = needle
+        return found, found_needle
@@ -0,0 +1,274 @@
+"""Durable queue of OMM readings waiting to be submitted.
+
+Readings are written to HA storage as soon as they are queued, so queuing
+returns without waiting for HEP and nothing is lost while the portal is
+down or Home Assistant restarts. A background flush submits them through
+the OMM client registry. Readings HEP gave no answer for stay queued and
+the flush is retried with exponential backoff; any answer from HEP,
+accepted or not, takes the reading off the queue.
+
+The queue holds one reading per OMM and reading date: queuing another one
+for the same day replaces the waiting one. The OMMs and dates of accepted
+readings are stored too, and another reading for them is only queued or
+sent when it is forced, so once HEP has accepted a reading for a date no
+other one is sent for it without force.
+"""
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import HepOmmClientRegistry
+from .const import (
+    DOMAIN,
+    OMM_QUEUE_STORAGE_VERSION,
+    OMM_QUEUE_RETRY_BASE,
+    OMM_QUEUE_RETRY_MAX,
+    OMM_QUEUE_SUBMITTED_TTL,
+    OMM_QUEUE_IDLE,
+    OMM_QUEUE_OK,
+    OMM_QUEUE_RETRYING,
+    OMM_RESULT_ACCEPTED,
+    OMM_RESULT_FAILED,
+    OMM_RESULT_NEEDS_FORCE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _key(omm_id: str, reading_date: str) -> str:
+    return f"{omm_id}/{reading_date}"
+
+
+def _retry_delay(failed_flushes: int) -> float:
+    """Exponential backoff with jitter after failed_flushes failed flushes in a row."""
+    delay = min(OMM_QUEUE_RETRY_MAX, OMM_QUEUE_RETRY_BASE * 2 ** (failed_flushes - 1))
+    return random.uniform(delay / 2, delay)
+
+
+class HepSubmissionQueue:
+    """OMM readings kept in HA storage until HEP has answered them.
+
+    Readings are plain dicts so they are stored as they are: omm_id,
+    reading_date, tarifa1, tarifa2, force, queued_at, attempts and
+    last_error. Accepted readings are remembered by OMM and date, with
+    the time HEP accepted them, for OMM_QUEUE_SUBMITTED_TTL.
+    """
+
+    def __init__(self, hass: HomeAssistant, clients: Callable[[], HepOmmClientRegistry]):
+        """Initialize; clients returns the registry the readings are submitted through."""
+        self._hass = hass
+        self._clients = clients
+        self._store = Store(hass, OMM_QUEUE_STORAGE_VERSION, f"{DOMAIN}.omm_queue")
+        self._readings: Dict[str, dict] = {}
+        self._submitted: Dict[str, str] = {}
+        self._listeners = []
+        self._flush_task = None
+        self._flush_again = False
+        self._unsub_retry = None
+        self.failed_flushes = 0
+        self.status = OMM_QUEUE_IDLE
+        self.last_flush_at: Optional[datetime] = None
+        self.next_flush_at: Optional[datetime] = None
+        # Readings HEP answered in the last flush, with its result and opis
+        self.last_results: List[dict] = []
+
+    def __len__(self) -> int:
+        return len(self._readings)
+
+    @property
+    def readings(self) -> List[dict]:
+        """Queued readings, oldest first."""
+        return list(self._readings.values())
+
+    async def async_load(self) -> None:
+        """Load the readings left over from before a restart and start flushing them."""
+        try:
+            data = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.warning("Discarding unreadable OMM submission queue: %s", e)
+            data = None
+        for reading in (data or {}).get("readings", []):
+            self._readings[_key(reading["omm_id"], reading["reading_date"])] = reading
+        self._submitted = dict((data or {}).get("submitted", {}))
+        self._forget_old_submissions()
+        if self._readings:
+            _LOGGER.info("Resuming %d queued OMM readings", len(self._readings))
+            self.async_flush()
+
+    async def async_enqueue(self, omm_id: str, reading_date: str, tarifa1: int, tarifa2: int, force_send: bool = False) -> bool:
+        """Store a reading, replacing a waiting one of the same OMM and date, and flush in the background.
+
+        Returns False without queuing anything if HEP already accepted a
+        reading of the OMM for the date, unless force_send is set.
+        """
+        key = _key(omm_id, reading_date)
+        if key in self._submitted and not force_send:
+            _LOGGER.debug("A reading of OMM %s for %s was already accepted, not queuing another", omm_id, reading_date)
+            return False
+        if key in self._readings:
+            # Takes the place of the waiting reading, keeping its position in the queue
+            _LOGGER.debug("Replacing the queued reading of OMM %s for %s", omm_id, reading_date)
+        self._readings[key] = {
+            "omm_id": omm_id,
+            "reading_date": reading_date,
+            "tarifa1": tarifa1,
+            "tarifa2": tarifa2,
+            "force": force_send,
+            "queued_at": dt_util.utcnow().isoformat(),
+            "attempts": 0,
+            "last_error": None,
+        }
+        await self._async_save()
+        self._notify()
+        self.async_flush()
+        return True
+
+    @callback
+    def async_flush(self) -> None:
+        """Flush in the background now, or once more after the flush in progress."""
+        if self._flush_task is not None:
+            self._flush_again = True
+            return
+        self._cancel_retry()
+        self._flush_task = self._hass.async_create_background_task(
+            self._async_flush(), f"{DOMAIN} flush OMM submission queue"
+        )
+
+    async def _async_flush(self) -> None:
+        try:
+            self._flush_again = True
+            while self._flush_again:
+                self._flush_again = False
+                await self._async_flush_once()
+        finally:
+            self._flush_task = None
+        if self.status == OMM_QUEUE_RETRYING:
+            self._schedule_retry()
+
+    async def _async_flush_once(self) -> None:
+        """Submit every queued reading once."""
+        if not self._readings:
+            return
+        by_date: Dict[str, list] = {}
+        for key, reading in self._readings.items():
+            by_date.setdefault(reading["reading_date"], []).append((key, reading))
+
+        results = []
+        failed = 0
+        for reading_date, items in by_date.items():
+            outcomes = await self._clients().async_submit_batch(
+                [(reading["omm_id"], reading["tarifa1"], reading["tarifa2"], reading["force"]) for _key, reading in items],
+                reading_date,
+            )
+            for (key, reading), outcome in zip(items, outcomes):
+                if outcome.result == OMM_RESULT_ACCEPTED:
+                    self._submitted[key] = dt_util.utcnow().isoformat()
+                current = self._readings.get(key)
+                if current is not reading:
+                    # Replaced while it was being submitted; the new one goes in the next pass,
+                    # unless this one was accepted and the new one is not forced
+                    if outcome.result == OMM_RESULT_ACCEPTED and current is not None and not current["force"]:
+                        del self._readings[key]
+                        results.append(self._result(current, OMM_RESULT_NEEDS_FORCE, "Already submitted for this date"))
+                    continue
+                if outcome.result == OMM_RESULT_FAILED:
+                    failed += 1
+                    reading["attempts"] += 1
+                    reading["last_error"] = outcome.opis
+                    continue
+                del self._readings[key]
+                results.append(self._result(reading, outcome.result, outcome.opis))
+
+        self.failed_flushes = self.failed_flushes + 1 if failed else 0
+        self.status = OMM_QUEUE_RETRYING if failed else OMM_QUEUE_OK
+        self.last_flush_at = dt_util.utcnow()
+        self.last_results = results
+        self._forget_old_submissions()
+        _LOGGER.debug("Flushed OMM submission queue: %d answered, %d failed", len(results), failed)
+        await self._async_save()
+        self._notify()
+
+    @staticmethod
+    def _result(reading: dict, result: str, opis: str) -> dict:
+        return {"omm_id": reading["omm_id"], "reading_date": reading["reading_date"], "result": result, "opis": opis}
+
+    def _forget_old_submissions(self) -> None:
+        cutoff = dt_util.utcnow() - timedelta(seconds=OMM_QUEUE_SUBMITTED_TTL)
+        self._submitted = {
+            key: accepted_at
+            for key, accepted_at in self._submitted.items()
+            if datetime.fromisoformat(accepted_at) >= cutoff
+        }
+
+    @callback
+    def _schedule_retry(self) -> None:
+        delay = _retry_delay(self.failed_flushes)
+        self.next_flush_at = dt_util.utcnow() + timedelta(seconds=delay)
+
+        @callback
+        def _retry(_now) -> None:
+            self._unsub_retry = None
+            self.next_flush_at = None
+            self.async_flush()
+
+        self._unsub_retry = async_call_later(self._hass, delay, _retry)
+        self._notify()
+
+    @callback
+    def _cancel_retry(self) -> None:
+        if self._unsub_retry:
+            self._unsub_retry()
+            self._unsub_retry = None
+        self.next_flush_at = None
+
+    async def _async_save(self) -> None:
+        # Saved right away rather than delayed: a queued reading must survive a crash
+        await self._store.async_save({"readings": list(self._readings.values()), "submitted": self._submitted})
+
+    async def async_shutdown(self) -> None:
+        """Stop flushing; queued readings stay stored for the next start."""
+        self._cancel_retry()
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+    async def async_remove(self) -> None:
+        """Delete the stored queue, when the integration is removed."""
+        await self._store.async_remove()
+
+    @callback
+    def async_add_listener(self, update_callback) -> Callable[[], None]:
+        """Call update_callback whenever the queue or the flush status changes."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _notify(self) -> None:
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def as_dict(self) -> dict:
+        """Summary for state attributes and diagnostics."""
+        return {
+            "depth": len(self._readings),
+            "status": self.status,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None,
+            "next_flush_at": self.next_flush_at.isoformat() if self.next_flush_at else None,
+            "last_results": list(self.last_results),
+            "readings": [
+                {key: reading[key] for key in ("omm_id", "reading_date", "queued_at", "attempts", "last_error")}
+                for reading in self._readings.values()
+            ],
+        }
@@ -0,0 +1,158 @@
+"""Opt-in per-request phase tracing for HEP clients.
+
+Built on aiohttp's TraceConfig: each request records when DNS resolution,
+connection setup, sending the request, the first response byte and the
+last body chunk happened, so network latency can be told apart from HEP
+server latency. Traces go into a bounded ring buffer that is included in
+the config entry diagnostics.
+
+aiohttp only reports body chunks read with ClientResponse.read(); bodies
+read as a stream must be read through iter_chunked() or report their
+chunks with chunk_received() to get a body phase.
+
+aiohttp reports connection setup as one phase, so "connect" covers the
+TCP and TLS handshakes together; DNS time is reported separately and not
+included in it.
+"""
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+from weakref import WeakKeyDictionary
+
+import aiohttp
+
+from .const import TRACE_BUFFER_SIZE
+
+
+# Traces of responses whose body has not been read yet, for chunks read as a stream
+_RESPONSE_TRACES = WeakKeyDictionary()
+
+
+def chunk_received(response, chunk: bytes) -> None:
+    """Record a body chunk of response read as a stream into the traces of the request."""
+    for ctx in _RESPONSE_TRACES.get(response, ()):
+        _record_chunk(ctx, chunk)
+
+
+async def iter_chunked(response, size: int) -> AsyncIterator[bytes]:
+    """Iterate over the body of response in chunks of up to size bytes, recording them into its traces."""
+    async for chunk in response.content.iter_chunked(size):
+        chunk_received(response, chunk)
+        yield chunk
+
+
+def _record_chunk(ctx, chunk: bytes) -> None:
+    ctx.body_end = time.monotonic()
+    ctx.body_bytes += len(chunk)
+
+
+def _masked_url(url) -> str:
+    """URL without its query string and with numeric path segments, such as kupac and OMM ids, masked."""
+    path = "/".join("{id}" if segment.isdigit() else segment for segment in url.path.split("/"))
+    return f"{url.origin()}{path}"
+
+
+def _ms(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return round((end - start) * 1000, 1)
+
+
+class HepRequestTracer:
+    """Keeps the phase timings of the last TRACE_BUFFER_SIZE requests."""
+
+    def __init__(self, size: int = TRACE_BUFFER_SIZE):
+        """Initialize."""
+        self._traces = deque(maxlen=size)
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_start.append(self._on_request_start)
+        self.trace_config.on_dns_resolvehost_start.append(self._on_dns_start)
+        self.trace_config.on_dns_resolvehost_end.append(self._on_dns_end)
+        self.trace_config.on_connection_create_start.append(self._on_connect_start)
+        self.trace_config.on_connection_create_end.append(self._on_connect_end)
+        self.trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+        self.trace_config.on_request_headers_sent.append(self._on_headers_sent)
+        self.trace_config.on_request_end.append(self._on_request_end)
+        self.trace_config.on_request_exception.append(self._on_request_exception)
+        self.trace_config.on_response_chunk_received.append(self._on_chunk_received)
+
+    def as_list(self) -> list:
+        """Traces oldest first, phases in milliseconds."""
+        return [self._summary(trace) for trace in self._traces]
+
+    def clear(self) -> None:
+        self._traces.clear()
+
+    @staticmethod
+    def _summary(ctx) -> dict:
+        # Connection setup includes the DNS lookup; report it without
+        connect = _ms(ctx.connect_start, ctx.connect_end)
+        dns = _ms(ctx.dns_start, ctx.dns_end)
+        if connect is not None and dns is not None:
+            connect = round(connect - dns, 1)
+        return {
+            "started_at": ctx.started_at,
+            "method": ctx.method,
+            "url": ctx.url,
+            "status": ctx.status,
+            "error": ctx.error,
+            "reused_connection": ctx.reused,
+            "dns_ms": dns,
+            "connect_ms": connect,
+            "send_ms": _ms(ctx.connect_end or ctx.start, ctx.headers_sent),
+            "ttfb_ms": _ms(ctx.headers_sent, ctx.response_start),
+            "body_ms": _ms(ctx.response_start, ctx.body_end),
+            "body_bytes": ctx.body_bytes,
+            "total_ms": _ms(ctx.start, ctx.body_end or ctx.response_start or ctx.failed_at),
+        }
+
+    async def _on_request_start(self, session, ctx, params) -> None:
+        ctx.start = time.monotonic()
+        ctx.started_at = time.time()
+        ctx.method = params.method
+        # Identifiers are kept out of diagnostics
+        ctx.url = _masked_url(params.url)
+        ctx.status = None
+        ctx.error = None
+        ctx.reused = False
+        ctx.dns_start = ctx.dns_end = None
+        ctx.connect_start = ctx.connect_end = None
+        ctx.headers_sent = ctx.response_start = ctx.body_end = ctx.failed_at = None
+        ctx.body_bytes = 0
+
+    async def _on_dns_start(self, session, ctx, params) -> None:
+        ctx.dns_start = time.monotonic()
+
+    async def _on_dns_end(self, session, ctx, params) -> None:
+        ctx.dns_end = time.monotonic()
+
+    async def _on_connect_start(self, session, ctx, params) -> None:
+        ctx.connect_start = time.monotonic()
+
+    async def _on_connect_end(self, session, ctx, params) -> None:
+        ctx.connect_end = time.monotonic()
+
+    async def _on_connection_reused(self, session, ctx, params) -> None:
+        ctx.reused = True
+
+    async def _on_headers_sent(self, session, ctx, params) -> None:
+        ctx.headers_sent = time.monotonic()
+
+    async def _on_request_end(self, session, ctx, params) -> None:
+        # Fired once the response headers are in; body chunks may follow
+        ctx.response_start = time.monotonic()
+        ctx.status = params.response.status
+        _RESPONSE_TRACES.setdefault(params.response, []).append(ctx)
+        self._traces.append(ctx)
+
+    async def _on_request_exception(self, session, ctx, params) -> None:
+        ctx.failed_at = time.monotonic()
+        ctx.error = type(params.exception).__name__
+        self._traces.append(ctx)
+
+    async def _on_chunk_received(self, session, ctx, params) -> None:
+        _record_chunk(ctx, params.chunk)
+
+
+# OMM portal requests are not tied to a config entry, so every HepOmmClient traces into one tracer
+OMM_TRACER = HepRequestTracer()
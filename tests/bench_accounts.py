@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to find custom_components
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# The coordinator needs a real Home Assistant install, unlike the API-only scripts
+from homeassistant.core import HomeAssistant
+
+from custom_components.hep.api import HepApiClient
+from custom_components.hep.coordinator import HepDataUpdateCoordinator
+from hep_simulator import HepSimulator
+
+logging.basicConfig(level=logging.WARNING)
+logging.getLogger("custom_components.hep").setLevel(logging.WARNING)
+
+ACCOUNT_COUNTS = [1, 10, 50]
+REFRESHES = 10
+LATENCY = 0.02  # seconds per request
+
+
+async def run(hass, accounts, max_concurrent_requests):
+    simulator = HepSimulator(accounts=accounts, latency=LATENCY)
+    base_url = await simulator.start()
+    client = HepApiClient("kupac@example.com", "secret", base_url=base_url)
+    coordinator = HepDataUpdateCoordinator(hass, client, max_concurrent_requests=max_concurrent_requests)
+    durations = []
+    try:
+        # Warm up the login session and the connection pool
+        await coordinator.async_refresh()
+        simulator.reset_stats()
+        for _ in range(REFRESHES):
+            # Make every endpoint due so each refresh is a full one
+            coordinator._last_fetched.clear()
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            durations.append(time.perf_counter() - start)
+        assert len(coordinator.data.accounts) == accounts
+    finally:
+        await coordinator.async_shutdown()
+        await client.async_close()
+        await simulator.stop()
+
+    print(
+        f"accounts={accounts:<3} concurrency={max_concurrent_requests:<2} "
+        f"requests/refresh={simulator.request_count // REFRESHES:<4} "
+        f"mean={statistics.mean(durations) * 1000:.1f}ms "
+        f"max={max(durations) * 1000:.1f}ms"
+    )
+
+
+async def main():
+    print("--- HEP Multi-Account Refresh Benchmark ---")
+    hass = HomeAssistant(tempfile.mkdtemp())
+    try:
+        for accounts in ACCOUNT_COUNTS:
+            await run(hass, accounts, 1)
+            await run(hass, accounts, 8)
+            await run(hass, accounts, 32)
+    finally:
+        await hass.async_stop(force=True)
+    print("--- Benchmark Finished ---")
+
+if __name__ == "__main__":
+    asyncio.run(main())
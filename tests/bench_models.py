@@ -0,0 +1,304 @@
+"""Model parsing benchmark with synthetic payloads.
+
+Times JSON decode plus from_dict construction for every model the
+coordinator builds on a refresh, at several history sizes, and measures
+the memory retained per constructed row, decoding with the same decoder
+the API client uses.
+
+Row construction alone is compared against keyword constructors written
+out by hand, the way models were built before their from_dict was
+compiled from field maps. For the history endpoints it also compares the
+decode time of the stdlib decoder against orjson, when installed, and the
+peak memory of parsing the whole body against streaming it in chunks
+with a row cap.
+
+Exits non-zero when a measurement exceeds its regression threshold, so
+it can gate changes to models.py.
+
+    python tests/bench_models.py
+    python tests/bench_models.py --no-check
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from unittest.mock import MagicMock
+
+# Mock Home Assistant modules
+sys.modules["homeassistant"] = MagicMock()
+sys.modules["homeassistant.core"] = MagicMock()
+sys.modules["homeassistant.config_entries"] = MagicMock()
+sys.modules["homeassistant.const"] = MagicMock()
+sys.modules["homeassistant.exceptions"] = MagicMock()
+sys.modules["homeassistant.helpers"] = MagicMock()
+sys.modules["homeassistant.helpers.aiohttp_client"] = MagicMock()
+sys.modules["homeassistant.helpers.event"] = MagicMock()
+sys.modules["homeassistant.helpers.storage"] = MagicMock()
+sys.modules["homeassistant.util"] = MagicMock()
+sys.modules["homeassistant.helpers.config_validation"] = MagicMock()
+
+# Add parent directory to path to find custom_components
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Import after mocking
+from custom_components.hep.api import decode_json
+from custom_components.hep.models import HepUser, HepBill, HepBillingInfo, HepConsumption, HepWarning, HepPrices, _intern
+from custom_components.hep.streaming import JsonArrayStream
+from hep_simulator import make_user, make_billing, make_consumption, make_warnings, make_prices
+
+SCALES = [10, 100, 1000, 5000]
+
+# Regression thresholds, generous enough for slow CI machines.
+# Microseconds per row for decode + construction, and bytes retained per row.
+MAX_MICROSECONDS_PER_ROW = {
+    "promet": 25.0,
+    "potrosnja": 15.0,
+    "opomene": 15.0,
+    "prijava": 30.0,
+}
+MAX_MICROSECONDS_CJENIK = 100.0
+MAX_BYTES_PER_ROW = {
+    "promet": 700,
+    "potrosnja": 400,
+    "opomene": 400,
+    "prijava": 1100,
+}
+# Compiled builders must stay at least this much faster than handwritten constructors,
+# as the median of BUILDER_ROUNDS rounds timing the two back to back
+MIN_BUILDER_SPEEDUP = 1.3
+BUILDER_ROUNDS = 41
+# Streaming with a row cap must not grow with the body; bytes at peak.
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_MAX_ROWS = 24
+MAX_STREAM_PEAK_BYTES = 512 * 1024
+
+
+def build_payloads(rows):
+    """Serialized responses for every endpoint, sized to rows."""
+    return {
+        "prijava": (json.dumps(make_user(rows)).encode(), HepUser.from_dict),
+        "promet": (json.dumps(make_billing(500000, rows)).encode(), HepBillingInfo.from_dict),
+        "potrosnja": (
+            json.dumps(make_consumption(rows)).encode(),
+            lambda data: [HepConsumption.from_dict(item) for item in data],
+        ),
+        "opomene": (
+            json.dumps(make_warnings(rows)).encode(),
+            lambda data: [HepWarning.from_dict(item) for item in data],
+        ),
+    }
+
+
+def time_parse(body, build, repeat):
+    """Best-of-repeat seconds for one json decode + model build."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build(decode_json(body))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def retained_bytes(body, build):
+    """Bytes still allocated after building the models, with the decoded dicts released."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(decode_json(body))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def handwritten_bill(data):
+    return HepBill(
+        kupac_id=data.get("kupacId"),
+        datum=data.get("datum"),
+        opis=_intern(data.get("opis")),
+        duguje=data.get("duguje", 0.0),
+        potrazuje=data.get("potrazuje", 0.0),
+        saldo=data.get("saldo", 0.0),
+        dospijeva=data.get("dospijeva"),
+        pnb=data.get("pnb"),
+        iznos_ispis=data.get("iznosIspis", 0.0),
+        racun=data.get("racun"),
+        status=_intern(data.get("status")),
+    )
+
+
+def handwritten_consumption(data):
+    return HepConsumption(
+        razdoblje=data.get("razdoblje"),
+        tarifa1=data.get("tarifa1", 0),
+        tarifa2=data.get("tarifa2", 0),
+        tarifa3=data.get("tarifa3", 0),
+        proizv1=data.get("proizv1", 0),
+        proizv2=data.get("proizv2", 0),
+    )
+
+
+def handwritten_warning(data):
+    return HepWarning(
+        datum_izdavanja=data.get("datumIzdavanja"),
+        broj_dokumenta=data.get("brojDokumenta"),
+        razina=_intern(data.get("razina")),
+        stanje=float(data.get("stanje", 0.0)),
+    )
+
+
+def time_rows(items, build, repeat):
+    """Best-of-repeat seconds for building one model per decoded row."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        [build(item) for item in items]
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def builder_speedup(items, handwritten, compiled, rounds):
+    """Median handwritten and compiled seconds, and the median of their ratio per round.
+
+    The two run back to back in every round, so a noisy moment slows
+    both rather than skewing the ratio.
+    """
+    slow, fast, ratios = [], [], []
+    for _ in range(rounds):
+        slow.append(time_rows(items, handwritten, 1))
+        fast.append(time_rows(items, compiled, 1))
+        ratios.append(slow[-1] / fast[-1])
+    return statistics.median(slow), statistics.median(fast), statistics.median(ratios)
+
+
+def time_decode(body, loads, repeat):
+    """Best-of-repeat seconds for decoding body alone."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loads(body)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_bytes(parse):
+    """Peak bytes allocated while parse() runs."""
+    gc.collect()
+    tracemalloc.start()
+    parse()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def stream_rows(body, key, row, max_rows=None):
+    """Feed body to a JsonArrayStream in chunks, building at most max_rows rows."""
+    stream = JsonArrayStream(key)
+    rows = []
+    for start in range(0, len(body), STREAM_CHUNK_SIZE):
+        for item in stream.feed(body[start:start + STREAM_CHUNK_SIZE]):
+            if max_rows is None or len(rows) < max_rows:
+                rows.append(row(item))
+    stream.close()
+    return rows
+
+
+def build_history_payloads(rows):
+    """Serialized history responses with the stream key and row builder of each."""
+    return {
+        "promet": (json.dumps(make_billing(500000, rows)).encode(), "promet", HepBill.from_dict, HepBillingInfo.from_dict),
+        "potrosnja": (
+            json.dumps(make_consumption(rows)).encode(),
+            None,
+            HepConsumption.from_dict,
+            lambda data: [HepConsumption.from_dict(item) for item in data],
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HEP model parsing benchmark")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--no-check", action="store_true", help="report only, skip thresholds")
+    args = parser.parse_args()
+
+    print("--- HEP Model Parsing Benchmark ---")
+    failures = []
+
+    for rows in SCALES:
+        for endpoint, (body, build) in build_payloads(rows).items():
+            seconds = time_parse(body, build, args.repeat)
+            per_row_us = seconds / rows * 1e6
+            per_row_bytes = retained_bytes(body, build) / rows
+            print(
+                f"{endpoint:<10} rows={rows:<5} payload={len(body) / 1024:8.1f}KiB "
+                f"total={seconds * 1000:8.2f}ms per_row={per_row_us:6.2f}us "
+                f"retained_per_row={per_row_bytes:7.0f}B"
+            )
+            if per_row_us > MAX_MICROSECONDS_PER_ROW[endpoint]:
+                failures.append(f"{endpoint} rows={rows}: {per_row_us:.2f}us/row > {MAX_MICROSECONDS_PER_ROW[endpoint]}")
+            if per_row_bytes > MAX_BYTES_PER_ROW[endpoint]:
+                failures.append(f"{endpoint} rows={rows}: {per_row_bytes:.0f}B/row > {MAX_BYTES_PER_ROW[endpoint]}")
+
+    rows = SCALES[-1]
+    for endpoint, items, handwritten, compiled in (
+        ("promet", make_billing(500000, rows)["promet"], handwritten_bill, HepBill.from_dict),
+        ("potrosnja", make_consumption(rows), handwritten_consumption, HepConsumption.from_dict),
+        ("opomene", make_warnings(rows), handwritten_warning, HepWarning.from_dict),
+    ):
+        assert [handwritten(item) for item in items] == [compiled(item) for item in items]
+        slow, fast, speedup = builder_speedup(items, handwritten, compiled, BUILDER_ROUNDS)
+        print(
+            f"{endpoint:<10} rows={rows:<5} build handwritten={slow * 1000:7.2f}ms "
+            f"compiled={fast * 1000:7.2f}ms speedup={speedup:4.1f}x"
+        )
+        if speedup < MIN_BUILDER_SPEEDUP:
+            failures.append(f"{endpoint}: compiled builder only {speedup:.2f}x faster < {MIN_BUILDER_SPEEDUP}")
+
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+        print("orjson not installed, decode comparison skipped")
+    if orjson is not None:
+        for rows in SCALES[-2:]:
+            for endpoint, (body, *_) in build_history_payloads(rows).items():
+                stdlib = time_decode(body, json.loads, args.repeat)
+                fast = time_decode(body, orjson.loads, args.repeat)
+                print(
+                    f"{endpoint:<10} rows={rows:<5} decode json={stdlib * 1000:7.2f}ms "
+                    f"orjson={fast * 1000:7.2f}ms speedup={stdlib / fast:4.1f}x"
+                )
+
+    for rows in SCALES:
+        for endpoint, (body, key, row, build) in build_history_payloads(rows).items():
+            buffered = peak_bytes(lambda: build(decode_json(body)))
+            streamed = peak_bytes(lambda: stream_rows(body, key, row))
+            capped = peak_bytes(lambda: stream_rows(body, key, row, STREAM_MAX_ROWS))
+            print(
+                f"{endpoint:<10} rows={rows:<5} peak buffered={buffered / 1024:8.1f}KiB "
+                f"streamed={streamed / 1024:8.1f}KiB streamed_cap{STREAM_MAX_ROWS}={capped / 1024:6.1f}KiB"
+            )
+            if capped > MAX_STREAM_PEAK_BYTES:
+                failures.append(f"{endpoint} rows={rows}: capped stream peak {capped}B > {MAX_STREAM_PEAK_BYTES}")
+
+    body = json.dumps(make_prices()).encode()
+    seconds = time_parse(body, HepPrices.from_dict, args.repeat * 10)
+    print(f"{'cjenik':<10} payload={len(body) / 1024:8.1f}KiB total={seconds * 1e6:8.2f}us")
+    if seconds * 1e6 > MAX_MICROSECONDS_CJENIK:
+        failures.append(f"cjenik: {seconds * 1e6:.2f}us > {MAX_MICROSECONDS_CJENIK}")
+
+    if failures and not args.no_check:
+        print("\nRegression thresholds exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("--- Benchmark Finished ---")
+
+if __name__ == "__main__":
+    main()
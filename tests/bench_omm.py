@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from unittest.mock import MagicMock
+
+# Mock Home Assistant modules
+sys.modules["homeassistant"] = MagicMock()
+sys.modules["homeassistant.core"] = MagicMock()
+sys.modules["homeassistant.config_entries"] = MagicMock()
+sys.modules["homeassistant.const"] = MagicMock()
+sys.modules["homeassistant.exceptions"] = MagicMock()
+sys.modules["homeassistant.helpers"] = MagicMock()
+sys.modules["homeassistant.helpers.aiohttp_client"] = MagicMock()
+sys.modules["homeassistant.helpers.event"] = MagicMock()
+sys.modules["homeassistant.helpers.storage"] = MagicMock()
+sys.modules["homeassistant.util"] = MagicMock()
+sys.modules["homeassistant.helpers.config_validation"] = MagicMock()
+
+# Add parent directory to path to find custom_components
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Import after mocking
+from custom_components.hep.api import HepOmmClient, HepOmmClientRegistry, HepRateLimiter
+from hep_simulator import HepSimulator
+
+logging.basicConfig(level=logging.WARNING)
+logging.getLogger("custom_components.hep.api").setLevel(logging.WARNING)
+
+SUBMISSIONS = 30
+OMM_IDS = ["1000001", "1000002", "1000003"]
+LATENCY = 0.01  # seconds per request
+CONNECT_LATENCY = 0.03  # seconds per new connection, stands in for TCP + TLS setup
+MIN_SPEEDUP = 1.5
+BATCH_SIZE = 24
+BATCH_CONCURRENCY = 4
+MIN_BATCH_SPEEDUP = 2.5
+RATE_LIMIT = 40.0  # requests per second for the rate limited batch
+RATE_BURST = 5
+# High enough never to delay, for measuring everything but the rate limit
+UNLIMITED = HepRateLimiter(rate=10000.0, burst=10000)
+
+
+def reading_date(index: int) -> str:
+    return f"{index % 28 + 1:02d}.{index // 28 % 12 + 1:02d}.2026"
+
+
+async def run(simulator, name, submit, expire_every=None):
+    simulator.reset_stats()
+    simulator.expire_omm_tokens()
+    durations = []
+    accepted = 0
+    for index in range(SUBMISSIONS):
+        if expire_every and index and index % expire_every == 0:
+            simulator.expire_omm_tokens()
+        start = time.perf_counter()
+        if await submit(OMM_IDS[index % len(OMM_IDS)], index):
+            accepted += 1
+        durations.append(time.perf_counter() - start)
+
+    durations.sort()
+    print(
+        f"{name:<9} submissions={SUBMISSIONS} accepted={accepted} "
+        f"requests={simulator.request_count} "
+        f"page_loads={simulator.requests.get('omm_page', 0)} "
+        f"connections={len(simulator.connections)} "
+        f"mean={statistics.mean(durations) * 1000:.1f}ms "
+        f"p95={durations[int(len(durations) * 0.95) - 1] * 1000:.1f}ms"
+    )
+    return accepted, statistics.mean(durations)
+
+
+async def run_cached_checks(simulator, registry):
+    """Validate readings against the checks cached by earlier submissions; returns the requests sent."""
+    simulator.reset_stats()
+    out_of_range = [(omm_id, 99999, 12000, True) for omm_id in OMM_IDS]
+    rejected = await registry.async_submit_batch(out_of_range, "01.06.2026")
+    dry_run = await registry.async_submit_batch(
+        [(omm_id, 26500, 12000, False) for omm_id in OMM_IDS] + [("9999999", 26500, 12000, False)],
+        "01.06.2026",
+        dry_run=True,
+    )
+    print(
+        f"{'local':<9} out_of_range={[result.result for result in rejected]} "
+        f"dry_run={[result.result for result in dry_run]} requests={simulator.request_count}"
+    )
+    if [result.result for result in rejected] != ["rejected"] * len(OMM_IDS):
+        print(f"FAIL: out of range readings were not rejected: {rejected}")
+        sys.exit(1)
+    if [result.result for result in dry_run] != ["valid"] * len(OMM_IDS) + ["unchecked"]:
+        print(f"FAIL: unexpected dry run results: {dry_run}")
+        sys.exit(1)
+    return simulator.request_count
+
+
+async def run_batch(simulator, name, rate_limiter, concurrency):
+    """Submit BATCH_SIZE new OMMs in one batch; returns the duration and how many were accepted."""
+    simulator.reset_stats()
+    simulator.expire_omm_tokens()
+    registry = HepOmmClientRegistry(size=BATCH_SIZE, base_url=simulator.omm_url, rate_limiter=rate_limiter)
+    readings = [(str(2000000 + index), 26500, 12000, True) for index in range(BATCH_SIZE)]
+    try:
+        start = time.perf_counter()
+        results = await registry.async_submit_batch(readings, "01.06.2026", concurrency=concurrency)
+        duration = time.perf_counter() - start
+    finally:
+        await registry.async_close()
+
+    accepted = sum(1 for result in results if result.result == "accepted")
+    print(
+        f"{name:<11} omms={BATCH_SIZE} accepted={accepted} requests={simulator.request_count} "
+        f"connections={len(simulator.connections)} total={duration * 1000:.0f}ms"
+    )
+    return duration, accepted
+
+
+async def main():
+    print("--- HEP OMM Submission Benchmark ---")
+    simulator = HepSimulator(latency=LATENCY, connect_latency=CONNECT_LATENCY)
+    await simulator.start()
+    try:
+        async def legacy_submit(omm_id, index):
+            """One submission the way the service used to do it: a new client, session and page load per call."""
+            client = HepOmmClient(omm_id, base_url=simulator.omm_url, rate_limiter=UNLIMITED)
+            try:
+                return await client.send_reading(reading_date(index), 26500, 12000)
+            finally:
+                await client.async_close()
+
+        legacy_accepted, legacy_mean = await run(simulator, "legacy", legacy_submit)
+
+        registry = HepOmmClientRegistry(base_url=simulator.omm_url, rate_limiter=UNLIMITED)
+
+        async def cached_submit(omm_id, index):
+            """One submission through the registry, reusing the client of the OMM."""
+            return await registry.get(omm_id).send_reading(reading_date(index), 26500, 12000, force_send=True)
+
+        try:
+            cached_accepted, cached_mean = await run(simulator, "cached", cached_submit)
+            # Tokens going stale every few submissions must cost one page load, not a failed submission
+            expired_accepted, _ = await run(simulator, "expiring", cached_submit, expire_every=5)
+            local_requests = await run_cached_checks(simulator, registry)
+        finally:
+            await registry.async_close()
+
+        sequential_time, _ = await run_batch(simulator, "batch x1", UNLIMITED, 1)
+        batch_time, batch_accepted = await run_batch(simulator, f"batch x{BATCH_CONCURRENCY}", UNLIMITED, BATCH_CONCURRENCY)
+        limited_time, limited_accepted = await run_batch(
+            simulator, f"limited x{BATCH_CONCURRENCY}", HepRateLimiter(RATE_LIMIT, RATE_BURST), BATCH_CONCURRENCY
+        )
+    finally:
+        await simulator.stop()
+
+    speedup = legacy_mean / cached_mean
+    batch_speedup = sequential_time / batch_time
+    # Every batch reading costs a page load, a check and a submission
+    limited_rate = (BATCH_SIZE * 3 - RATE_BURST) / limited_time
+    print(f"Speedup: {speedup:.2f}x, batch speedup: {batch_speedup:.2f}x, limited rate: {limited_rate:.1f} requests/s")
+    failures = []
+    if legacy_accepted != SUBMISSIONS or cached_accepted != SUBMISSIONS or expired_accepted != SUBMISSIONS:
+        failures.append("not every submission was accepted")
+    if batch_accepted != BATCH_SIZE or limited_accepted != BATCH_SIZE:
+        failures.append("not every batch reading was accepted")
+    if speedup < MIN_SPEEDUP:
+        failures.append(f"speedup below {MIN_SPEEDUP}x")
+    if batch_speedup < MIN_BATCH_SPEEDUP:
+        failures.append(f"batch speedup below {MIN_BATCH_SPEEDUP}x")
+    if local_requests:
+        failures.append("local validation sent requests")
+    if limited_rate > RATE_LIMIT * 1.05:
+        failures.append(f"rate limit of {RATE_LIMIT} requests/s exceeded")
+    if failures:
+        print("FAIL: " + ", ".join(failures))
+        sys.exit(1)
+    print("--- Benchmark Finished ---")
+
+if __name__ == "__main__":
+    asyncio.run(main())
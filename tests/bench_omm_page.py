@@ -0,0 +1,114 @@
+import os
+import re
+import sys
+import time
+from unittest.mock import MagicMock
+
+# Mock Home Assistant modules
+sys.modules["homeassistant"] = MagicMock()
+sys.modules["homeassistant.core"] = MagicMock()
+sys.modules["homeassistant.config_entries"] = MagicMock()
+sys.modules["homeassistant.const"] = MagicMock()
+sys.modules["homeassistant.exceptions"] = MagicMock()
+sys.modules["homeassistant.helpers"] = MagicMock()
+sys.modules["homeassistant.helpers.aiohttp_client"] = MagicMock()
+sys.modules["homeassistant.helpers.event"] = MagicMock()
+sys.modules["homeassistant.helpers.storage"] = MagicMock()
+sys.modules["homeassistant.util"] = MagicMock()
+sys.modules["homeassistant.helpers.config_validation"] = MagicMock()
+
+# Add parent directory to path to find custom_components
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Import after mocking
+from custom_components.hep.streaming import FormTokenScanner
+from hep_simulator import make_omm_page
+
+CHUNK_SIZE = 16 * 1024  # bytes per network read
+CHECK_TOKEN = "c" * 92
+DELIVERY_TOKEN = "d" * 92
+MIN_PATHOLOGICAL_SPEEDUP = 10
+
+
+def regex_tokens(page: bytes) -> dict:
+    """The extraction _initialize_with_session used to do on the whole decoded page."""
+    text = page.decode()
+    tokens = {}
+    check_match = re.search(r'id="Provjera_Omm_Form_Div".*?name="__RequestVerificationToken" type="hidden" value="([^"]+)"', text, re.DOTALL)
+    if check_match:
+        tokens["Provjera_Omm_Form_Div"] = check_match.group(1)
+    delivery_match = re.search(r'id="Dostava_Omm_Div".*?name="__RequestVerificationToken" type="hidden" value="([^"]+)"', text, re.DOTALL)
+    if delivery_match:
+        tokens["Dostava_Omm_Div"] = delivery_match.group(1)
+    return tokens
+
+
+def scanner_tokens(page: bytes, chunk_size: int = CHUNK_SIZE):
+    """Feed the page chunk by chunk the way the client reads it; returns the tokens and bytes read."""
+    scanner = FormTokenScanner("Provjera_Omm_Form_Div", "Dostava_Omm_Div")
+    read = 0
+    for offset in range(0, len(page), chunk_size):
+        chunk = page[offset:offset + chunk_size]
+        read += len(chunk)
+        if scanner.feed(chunk):
+            break
+    return scanner.tokens, read
+
+
+def pathological_page(size: int) -> bytes:
+    """A page that names both form elements over and over but holds no token, like an error or maintenance page."""
+    block = '<div id="Provjera_Omm_Form_Div"></div><div id="Dostava_Omm_Div"></div><p>Servis nije dostupan</p>'
+    return ("<html><body>" + block * (size // len(block)) + "</body></html>").encode()
+
+
+def measure(function, page, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function(page)
+    return (time.perf_counter() - start) / repeats, result
+
+
+def check_equivalence(pages):
+    """The scanner must find what the regexes find, wherever the chunks split the page."""
+    for name, page in pages.items():
+        expected = regex_tokens(page)
+        for chunk_size in (1, 7, 64, 4096, CHUNK_SIZE):
+            if len(page) // chunk_size > 100000:
+                continue
+            tokens, _ = scanner_tokens(page, chunk_size)
+            if tokens != expected:
+                print(f"FAIL: {name} with {chunk_size} byte chunks found {tokens}, expected {expected}")
+                sys.exit(1)
+
+
+def main():
+    print("--- HEP OMM Page Token Extraction Benchmark ---")
+    pages = {
+        "real 60KiB": make_omm_page("1000001", CHECK_TOKEN, DELIVERY_TOKEN),
+        "1MiB forms at 10%": make_omm_page("1000001", CHECK_TOKEN, DELIVERY_TOKEN, 1024 * 1024, forms_at=0.1),
+        "1MiB forms at end": make_omm_page("1000001", CHECK_TOKEN, DELIVERY_TOKEN, 1024 * 1024, forms_at=1.0),
+        "pathological 200KiB": pathological_page(200 * 1024),
+    }
+    check_equivalence({**pages, "small": make_omm_page("1000001", CHECK_TOKEN, DELIVERY_TOKEN, 2048)})
+    print("Equivalence: scanner matches the regexes for every chunk size")
+
+    pathological_speedup = None
+    for name, page in pages.items():
+        repeats = 1 if name.startswith("pathological") else 50
+        regex_time, _ = measure(regex_tokens, page, repeats)
+        scanner_time, (tokens, read) = measure(scanner_tokens, page, repeats)
+        speedup = regex_time / scanner_time
+        if name.startswith("pathological"):
+            pathological_speedup = speedup
+        print(
+            f"{name:<20} size={len(page) / 1024:.0f}KiB read={read / 1024:.0f}KiB tokens={len(tokens)} "
+            f"regex={regex_time * 1000:.2f}ms scanner={scanner_time * 1000:.2f}ms speedup={speedup:.1f}x"
+        )
+
+    if pathological_speedup < MIN_PATHOLOGICAL_SPEEDUP:
+        print(f"FAIL: pathological page speedup below {MIN_PATHOLOGICAL_SPEEDUP}x")
+        sys.exit(1)
+    print("--- Benchmark Finished ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Refresh load benchmark against the local HEP simulator.
+
+Drives HepApiClient directly and HepDataUpdateCoordinator end to end and
+reports refresh latency percentiles, requests, errors and connections opened.
+Needs a Home Assistant install for the coordinator run.
+
+    python tests/bench_refresh.py --accounts 5 --refreshes 200 --latency 0.02 --jitter 0.02 --error-rate 0.01
+    python tests/bench_refresh.py --rows 2000 --etag
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to find custom_components
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.hep.api import HepApiClient
+from custom_components.hep.coordinator import HepDataUpdateCoordinator
+from hep_simulator import HepSimulator
+
+logging.basicConfig(level=logging.CRITICAL)
+logging.getLogger("custom_components.hep").setLevel(logging.CRITICAL)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(int(round(fraction * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def report(name, durations, simulator):
+    durations = sorted(durations)
+    print(
+        f"{name:<12} refreshes={len(durations)} "
+        f"p50={percentile(durations, 0.50) * 1000:.1f}ms "
+        f"p95={percentile(durations, 0.95) * 1000:.1f}ms "
+        f"p99={percentile(durations, 0.99) * 1000:.1f}ms "
+        f"requests={simulator.request_count} errors={simulator.errors} "
+        f"not_modified={simulator.not_modified} connections={len(simulator.connections)}"
+    )
+    print(f"{'':<12} per endpoint: {dict(sorted(simulator.requests.items()))}")
+
+
+async def bench_client(simulator, base_url, args):
+    """One refresh = every endpoint of every account through the client, one call at a time."""
+    client = HepApiClient("kupac@example.com", "secret", base_url=base_url)
+    durations = []
+    try:
+        await client.authenticate()
+        simulator.reset_stats()
+        for _ in range(args.refreshes):
+            start = time.perf_counter()
+            await client.async_ensure_authenticated()
+            user_data = await client.get_data()
+            try:
+                await client.get_prices()
+            except Exception:
+                pass
+            for account in user_data.accounts:
+                for call in (client.get_billing, client.get_consumption, client.get_warnings):
+                    try:
+                        await call(account.kupac_id)
+                    except Exception:
+                        pass
+            durations.append(time.perf_counter() - start)
+    finally:
+        await client.async_close()
+    report("client", durations, simulator)
+
+
+async def bench_coordinator(hass, simulator, base_url, args):
+    """One refresh = a full coordinator refresh with every endpoint due."""
+    client = HepApiClient("kupac@example.com", "secret", base_url=base_url)
+    coordinator = HepDataUpdateCoordinator(hass, client, max_concurrent_requests=args.concurrency)
+    durations = []
+    try:
+        await coordinator.async_refresh()
+        simulator.reset_stats()
+        for _ in range(args.refreshes):
+            coordinator._last_fetched.clear()
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            durations.append(time.perf_counter() - start)
+    finally:
+        await coordinator.async_shutdown()
+        await client.async_close()
+    report("coordinator", durations, simulator)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="HEP refresh load benchmark")
+    parser.add_argument("--accounts", type=int, default=1)
+    parser.add_argument("--refreshes", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--connect-latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rows", type=int, default=24, help="rows in promet and potrosnja")
+    parser.add_argument("--etag", action="store_true", help="simulator answers conditional requests with 304")
+    args = parser.parse_args()
+
+    print("--- HEP Refresh Load Benchmark ---")
+    simulator = HepSimulator(
+        accounts=args.accounts,
+        latency=args.latency,
+        jitter=args.jitter,
+        connect_latency=args.connect_latency,
+        error_rate=args.error_rate,
+        billing_rows=args.rows,
+        consumption_rows=args.rows,
+        etag=args.etag,
+    )
+    base_url = await simulator.start()
+    hass = HomeAssistant(tempfile.mkdtemp())
+    try:
+        await bench_client(simulator, base_url, args)
+        await bench_coordinator(hass, simulator, base_url, args)
+    finally:
+        await hass.async_stop(force=True)
+        await simulator.stop()
+    print("--- Benchmark Finished ---")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+import asyncio
+import aiohttp
+import logging
+import os
+import statistics
+import sys
+import time
+from unittest.mock import MagicMock
+
+# Mock Home Assistant modules
+sys.modules["homeassistant"] = MagicMock()
+sys.modules["homeassistant.core"] = MagicMock()
+sys.modules["homeassistant.config_entries"] = MagicMock()
+sys.modules["homeassistant.const"] = MagicMock()
+sys.modules["homeassistant.exceptions"] = MagicMock()
+sys.modules["homeassistant.helpers"] = MagicMock()
+sys.modules["homeassistant.helpers.aiohttp_client"] = MagicMock()
+sys.modules["homeassistant.helpers.event"] = MagicMock()
+sys.modules["homeassistant.helpers.storage"] = MagicMock()
+sys.modules["homeassistant.util"] = MagicMock()
+sys.modules["homeassistant.helpers.config_validation"] = MagicMock()
+
+# Add parent directory to path to find custom_components
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Import after mocking
+from custom_components.hep.api import HepApiClient
+from hep_simulator import HepSimulator
+
+logging.basicConfig(level=logging.WARNING)
+logging.getLogger("custom_components.hep.api").setLevel(logging.WARNING)
+
+REFRESHES = 50
+LATENCY = 0.002  # seconds per request
+CONNECT_LATENCY = 0.02  # seconds per new connection, stands in for TCP + TLS setup
+
+
+async def legacy_refresh(client, kupac_id):
+    """One refresh the way the client used to do it: a throwaway session per call."""
+    calls = [
+        lambda session: client._authenticate_with_session(session),
+        lambda session: client._get_billing_with_session(session, kupac_id),
+        lambda session: client._get_consumption_with_session(session, kupac_id),
+        lambda session: client._get_warnings_with_session(session, kupac_id),
+        lambda session: client._get_prices_with_session(session),
+    ]
+    for call in calls:
+        async with aiohttp.ClientSession() as session:
+            await call(session)
+
+
+async def pooled_refresh(client, kupac_id):
+    """One refresh on the client's long-lived pooled session."""
+    await client.authenticate()
+    await client.get_billing(kupac_id)
+    await client.get_consumption(kupac_id)
+    await client.get_warnings(kupac_id)
+    await client.get_prices()
+
+
+async def reused_refresh(client, kupac_id):
+    """One refresh on the pooled session, logging in only when the session has expired."""
+    await client.async_ensure_authenticated()
+    await client.get_billing(kupac_id)
+    await client.get_consumption(kupac_id)
+    await client.get_warnings(kupac_id)
+    await client.get_prices()
+
+
+async def run(simulator, base_url, name, refresh):
+    client = HepApiClient("kupac@example.com", "secret", base_url=base_url)
+    simulator.reset_stats()
+    kupac_id = 500000
+    durations = []
+    try:
+        for _ in range(REFRESHES):
+            start = time.perf_counter()
+            await refresh(client, kupac_id)
+            durations.append(time.perf_counter() - start)
+    finally:
+        await client.async_close()
+
+    durations.sort()
+    print(
+        f"{name:<8} refreshes={REFRESHES} requests={simulator.request_count} "
+        f"connections={len(simulator.connections)} "
+        f"mean={statistics.mean(durations) * 1000:.1f}ms "
+        f"p95={durations[int(len(durations) * 0.95) - 1] * 1000:.1f}ms"
+    )
+
+
+async def main():
+    print("--- HEP Session Pooling Benchmark ---")
+    simulator = HepSimulator(latency=LATENCY, connect_latency=CONNECT_LATENCY)
+    base_url = await simulator.start()
+    try:
+        await run(simulator, base_url, "legacy", legacy_refresh)
+        await run(simulator, base_url, "pooled", pooled_refresh)
+        await run(simulator, base_url, "reused", reused_refresh)
+    finally:
+        await simulator.stop()
+    print("--- Benchmark Finished ---")
+
+if __name__ == "__main__":
+    asyncio.run(main())
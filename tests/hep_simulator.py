@@ -0,0 +1,396 @@
+"""Local stand-in for the HEP mojracun API and the mojamreza OMM portal, used by the benchmark scripts.
+
+Run it on its own to point a HepApiClient or HepOmmClient at it by hand:
+
+    python tests/hep_simulator.py --port 8080 --accounts 3 --latency 0.2
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import secrets
+
+from aiohttp import web
+
+API_PREFIX = "/elektra/v1/api"
+SESSION_COOKIE = "ASP.NET_SessionId"
+ANTIFORGERY_COOKIE = "__RequestVerificationToken"
+
+
+def make_account(index: int) -> dict:
+    """Build one account (kupac) as returned by /korisnik/prijava."""
+    return {
+        "korisnikId": 1000 + index,
+        "dp": "Elektra Zagreb",
+        "sifra": f"{index:010d}",
+        "naziv": f"Kupac {index}",
+        "adresa": f"Ulica {index}",
+        "mjesto": "Zagreb",
+        "oib": f"{index:011d}",
+        "tarifniModel": "Bijeli",
+        "brojBrojila": f"{index:010d}",
+        "brTarifa1": 26124 + index,
+        "brTarifa2": 11854 + index,
+        "brTarifa3": 0,
+        "datumWebOcitanja": "2025-11-30T00:00:00",
+        "ugovorniRacun": f" {index:012d} ",
+        "pogMjesto": f"{index:08d}",
+        "kupacId": 500000 + index,
+    }
+
+
+def make_user(accounts: int = 1) -> dict:
+    """Build the /korisnik/prijava response."""
+    return {
+        "mail": "kupac@example.com",
+        "ime": "Ivan",
+        "prezime": "Horvat",
+        "token": "simulated-token",
+        "kupci": [make_account(i) for i in range(accounts)],
+    }
+
+
+def make_prices() -> dict:
+    """Build the /obracun/cjenik response."""
+    item = {"vt": 0.0842, "nt": 0.0413, "snaga": 0.0}
+    model = {"proizvodnja": item, "prijenos": item, "distribucija": item, "mjernaUsluga": 1.39}
+    return {"oie": 0.0013, "pdv": 0.13, "opskrba": 0.98, "plavi": model, "bijeli": model, "crveni": model}
+
+
+def make_billing(kupac_id: int, rows: int = 24) -> dict:
+    """Build the /promet/{kupac_id} response."""
+    return {
+        "promet": [
+            {
+                "kupacId": kupac_id,
+                "datum": f"{2025 - i // 12}-{12 - i % 12:02d}-01T00:00:00",
+                "opis": "Račun za električnu energiju",
+                "duguje": 42.17,
+                "potrazuje": 42.17,
+                "saldo": 0.0,
+                "dospijeva": f"{2025 - i // 12}-{12 - i % 12:02d}-15T00:00:00",
+                "pnb": f"{kupac_id}-{i}",
+                "iznosIspis": 42.17,
+                "racun": f"R-{kupac_id}-{i}",
+                "status": "Plaćeno",
+            }
+            for i in range(rows)
+        ],
+        "saldo": {"iznos": 0.0, "opis": "Stanje računa", "iznosVal": "0,00 EUR"},
+    }
+
+
+def make_consumption(rows: int = 24) -> list:
+    """Build the /potrosnja/{kupac_id} response."""
+    return [
+        {
+            "razdoblje": f"{12 - i % 12:02d}.{2025 - i // 12}",
+            "tarifa1": 210 + i,
+            "tarifa2": 95 + i,
+            "tarifa3": 0,
+            "proizv1": 0,
+            "proizv2": 0,
+        }
+        for i in range(rows)
+    ]
+
+
+def make_warnings(rows: int = 1) -> list:
+    """Build the /opomene/{kupac_id} response."""
+    return [
+        {
+            "datumIzdavanja": "2025-11-05T00:00:00Z",
+            "brojDokumenta": f"OP-{i}",
+            "razina": "Prva opomena",
+            "stanje": 42.17,
+        }
+        for i in range(rows)
+    ]
+
+
+def make_omm_page(omm_id: str, check_token: str, delivery_token: str, size: int = 60 * 1024, forms_at: float = 0.5) -> bytes:
+    """Build the /Dostava/{omm_id} page, padded with markup to about size bytes like the real portal page.
+
+    forms_at places the forms as a fraction of the padding; the portal has them in the middle.
+    """
+    head = "<!DOCTYPE html><html><head><title>Dostava očitanja</title>" + "".join(
+        f'<link rel="stylesheet" href="/Content/site{i}.css" />' for i in range(20)
+    ) + "</head><body>"
+    forms = (
+        '<div id="Provjera_Omm_Form_Div" class="form">'
+        '<form action="/Omm/Provjera_Omm" method="post">'
+        f'<input name="__RequestVerificationToken" type="hidden" value="{check_token}" />'
+        f'<input id="Provjera_OmmVM_Omm" name="Provjera_OmmVM.Omm" type="text" value="{omm_id}" />'
+        "</form></div>"
+        '<div id="Dostava_Omm_Div" class="form">'
+        '<form action="/Omm/Dostava" method="post">'
+        f'<input name="__RequestVerificationToken" type="hidden" value="{delivery_token}" />'
+        '<input id="DostavaVM_Tarifa1" name="DostavaVM.Tarifa1" type="text" value="" />'
+        "</form></div>"
+    )
+    filler = '<div class="row"><div class="col-md-12"><p class="text-muted">Elektra</p></div></div>'
+    padding = filler * max(0, (size - len(head) - len(forms)) // len(filler))
+    split = int(len(padding) // len(filler) * forms_at) * len(filler)
+    return (head + padding[:split] + forms + padding[split:] + "</body></html>").encode()
+
+
+def make_omm_check(omm_id: str, enc_value: str) -> dict:
+    """Build the /Omm/Provjera_Omm response."""
+    return {
+        "Provjera_OmmDto": {
+            "Br_Tarifa": 2,
+            "Omm": omm_id,
+            "Br_Tarifa_1": 1,
+            "Tarifa1_Od": 26000,
+            "Tarifa1_Do": 27000,
+            "Br_Tarifa_2": 2,
+            "Tarifa2_Od": 11800,
+            "Tarifa2_Do": 12500,
+            "Status": {"Status": 1, "Opis": "OK"},
+        },
+        "encValue": enc_value,
+    }
+
+
+class HepSimulator:
+    """Serve canned HEP responses on localhost and count connections and requests."""
+
+    def __init__(
+        self,
+        accounts: int = 1,
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        billing_rows: int = 24,
+        consumption_rows: int = 24,
+        warning_rows: int = 1,
+        etag: bool = False,
+        omm_page_size: int = 60 * 1024,
+        seed: int = 0,
+    ):
+        """Initialize the simulator.
+
+        latency is added to every request, plus a uniform random 0..jitter.
+        connect_latency is added to the first request on each new connection as
+        a stand-in for TCP and TLS setup cost. error_rate is the share of data
+        requests answered with HTTP 500. The *_rows arguments size the history
+        payloads. With etag, data responses carry an ETag and a matching
+        If-None-Match is answered with 304 Not Modified. Endpoints named in
+        statuses are answered with that HTTP status instead.
+
+        The OMM portal issues a session cookie and two form tokens with every
+        page load; check and submit answer a token that does not belong to
+        the session with an HTTP 500 error page, like ASP.NET MVC.
+        omm_page_size sizes the page.
+        """
+        self.accounts = accounts
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.etag = etag
+        self.statuses = {}
+        self.requests = {}
+        self.errors = 0
+        self.not_modified = 0
+        self.connections = set()
+        self._random = random.Random(seed)
+        self._runner = None
+        self.omm_url = None
+        self.omm_page_size = omm_page_size
+        self._api_session = "simulated-session"
+        # OMM portal session cookie -> (check token, delivery token, encValue)
+        self._omm_sessions = {}
+        # (omm_id, reading date) -> (tarifa1, tarifa2)
+        self.omm_readings = {}
+        self._user = json.dumps(make_user(accounts)).encode()
+        self._prices = json.dumps(make_prices()).encode()
+        self._consumption = json.dumps(make_consumption(consumption_rows)).encode()
+        self._warnings = json.dumps(make_warnings(warning_rows)).encode()
+        self._billing = {
+            account["kupacId"]: json.dumps(make_billing(account["kupacId"], billing_rows)).encode()
+            for account in make_user(accounts)["kupci"]
+        }
+
+    def reset_stats(self):
+        """Clear request, error and connection counters."""
+        self.requests = {}
+        self.errors = 0
+        self.not_modified = 0
+        self.connections = set()
+
+    @property
+    def request_count(self) -> int:
+        """Total number of requests served."""
+        return sum(self.requests.values())
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        """Count requests and connections and apply simulated latency and errors."""
+        peer = request.transport.get_extra_info("peername") if request.transport else None
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if peer not in self.connections:
+            self.connections.add(peer)
+            delay += self.connect_latency
+
+        endpoint = request.match_info.route.name or request.path
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+        if delay:
+            await asyncio.sleep(delay)
+        if endpoint in self.statuses:
+            return web.Response(status=self.statuses[endpoint])
+        if endpoint != "prijava" and self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=500)
+        return await handler(request)
+
+    def expire_api_session(self):
+        """Reject the current login session, as after HEP's session timeout."""
+        self._api_session = secrets.token_hex(12)
+
+    def _authorized(self, request) -> bool:
+        return request.cookies.get(SESSION_COOKIE) == self._api_session
+
+    def _json(self, body: bytes, request=None):
+        if self.etag and request is not None:
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                self.not_modified += 1
+                return web.Response(status=304, headers={"ETag": etag})
+            return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+        return web.Response(body=body, content_type="application/json")
+
+    async def _login(self, request):
+        response = self._json(self._user)
+        response.set_cookie(SESSION_COOKIE, self._api_session)
+        return response
+
+    async def _prices_handler(self, request):
+        if not self._authorized(request):
+            return web.Response(status=401)
+        return self._json(self._prices, request)
+
+    async def _billing_handler(self, request):
+        if not self._authorized(request):
+            return web.Response(status=401)
+        body = self._billing.get(int(request.match_info["kupac_id"]))
+        if body is None:
+            return web.Response(status=404)
+        return self._json(body, request)
+
+    async def _consumption_handler(self, request):
+        if not self._authorized(request):
+            return web.Response(status=401)
+        return self._json(self._consumption, request)
+
+    async def _warnings_handler(self, request):
+        if not self._authorized(request):
+            return web.Response(status=401)
+        return self._json(self._warnings, request)
+
+    def expire_omm_tokens(self):
+        """Forget every OMM portal session, as after the portal's session timeout."""
+        self._omm_sessions = {}
+
+    def _antiforgery_error(self):
+        return web.Response(
+            status=500,
+            text="<html><body>The anti-forgery token could not be decrypted.</body></html>",
+            content_type="text/html",
+        )
+
+    async def _omm_page(self, request):
+        cookie = secrets.token_hex(12)
+        check_token, delivery_token, enc_value = (secrets.token_urlsafe(64) for _ in range(3))
+        self._omm_sessions[cookie] = (check_token, delivery_token, enc_value)
+        page = make_omm_page(request.match_info["omm_id"], check_token, delivery_token, self.omm_page_size)
+        response = web.Response(body=page, content_type="text/html")
+        response.set_cookie(SESSION_COOKIE, cookie)
+        response.set_cookie(ANTIFORGERY_COOKIE, secrets.token_hex(16))
+        return response
+
+    async def _omm_check(self, request):
+        form = await request.post()
+        session = self._omm_sessions.get(request.cookies.get(SESSION_COOKIE))
+        if session is None or form.get("__RequestVerificationToken") != session[0]:
+            return self._antiforgery_error()
+        return self._json(json.dumps(make_omm_check(form.get("Provjera_OmmVM.Omm"), session[2])).encode())
+
+    async def _omm_submit(self, request):
+        form = await request.post()
+        session = self._omm_sessions.get(request.cookies.get(SESSION_COOKIE))
+        if session is None or form.get("__RequestVerificationToken") != session[1]:
+            return self._antiforgery_error()
+        if form.get("encValue") != session[2]:
+            return self._json(json.dumps({"Status": 0, "Posalji": 0, "Opis": "Neispravan zahtjev"}).encode())
+        key = (form.get("DostavaVM.Omm"), form.get("DostavaVM.Datum_Ocitanja"))
+        if key in self.omm_readings and form.get("DostavaVM.Posalji") != "1":
+            return self._json(json.dumps({"Status": 1, "Posalji": 1, "Opis": "Očitanje za taj datum već postoji"}).encode())
+        self.omm_readings[key] = (form.get("DostavaVM.Tarifa1"), form.get("DostavaVM.Tarifa2"))
+        return self._json(json.dumps({"Status": 1, "Posalji": 0, "Opis": "Očitanje je zaprimljeno"}).encode())
+
+    async def start(self, host: str = "localhost", port: int = 0) -> str:
+        """Start serving and return the API base URL; the OMM portal is served at omm_url.
+
+        Bind to a host name rather than an IP, aiohttp's cookie jar ignores
+        cookies from IP addresses.
+        """
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post(f"{API_PREFIX}/korisnik/prijava", self._login, name="prijava")
+        app.router.add_get(f"{API_PREFIX}/obracun/cjenik", self._prices_handler, name="cjenik")
+        app.router.add_get(f"{API_PREFIX}/promet/{{kupac_id}}", self._billing_handler, name="promet")
+        app.router.add_get(f"{API_PREFIX}/potrosnja/{{kupac_id}}", self._consumption_handler, name="potrosnja")
+        app.router.add_get(f"{API_PREFIX}/opomene/{{kupac_id}}", self._warnings_handler, name="opomene")
+        app.router.add_get("/Dostava/{omm_id}", self._omm_page, name="omm_page")
+        app.router.add_post("/Omm/Provjera_Omm", self._omm_check, name="omm_check")
+        app.router.add_post("/Omm/Dostava", self._omm_submit, name="omm_submit")
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.omm_url = f"http://{host}:{bound_port}"
+        return f"http://{host}:{bound_port}{API_PREFIX}"
+
+    async def stop(self):
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Local HEP API simulator")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--accounts", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rows", type=int, default=24, help="rows in promet and potrosnja")
+    parser.add_argument("--etag", action="store_true", help="answer conditional requests with 304")
+    args = parser.parse_args()
+
+    simulator = HepSimulator(
+        accounts=args.accounts,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        billing_rows=args.rows,
+        consumption_rows=args.rows,
+        etag=args.etag,
+    )
+    base_url = await simulator.start(port=args.port)
+    print(f"HEP simulator serving {base_url} (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
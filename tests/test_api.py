@@ -13,6 +13,9 @@ sys.modules["homeassistant.config_entries"] = MagicMock()
 sys.modules["homeassistant.const"] = MagicMock()
 sys.modules["homeassistant.helpers"] = MagicMock()
 sys.modules["homeassistant.helpers.aiohttp_client"] = MagicMock()
+sys.modules["homeassistant.helpers.event"] = MagicMock()
+sys.modules["homeassistant.helpers.storage"] = MagicMock()
+sys.modules["homeassistant.util"] = MagicMock()
 
 # Add parent directory to path to find custom_components
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,38 @@
+"""Schema drift recorded by the compiled model builders."""
+import pytest
+
+from custom_components.hep.builders import SCHEMA_DRIFT
+from custom_components.hep.models import HepBalance, HepConsumption
+
+BALANCE = {"iznos": 42.17, "opis": "Stanje računa", "iznosVal": "42,17 €"}
+ROW = {"razdoblje": "12.2025", "tarifa1": 210, "tarifa2": 95, "tarifa3": 0, "proizv1": 0, "proizv2": 0}
+
+
+@pytest.fixture(autouse=True)
+def clean_drift():
+    SCHEMA_DRIFT.clear()
+    yield
+    SCHEMA_DRIFT.clear()
+
+
+def test_drift_is_recorded():
+    HepBalance.from_dict({"iznos": "42,17", "opis": "Stanje računa", "novo": 1})
+
+    assert SCHEMA_DRIFT == {
+        "HepBalance": {
+            "missing_keys": ["iznosVal"],
+            "unexpected_types": {"iznos": "str"},
+            "unmapped_keys": ["novo"],
+        }
+    }
+
+
+def test_drift_is_cleared_once_the_shape_is_back():
+    HepBalance.from_dict({"opis": "Stanje računa"})
+    HepConsumption.from_rows([{"razdoblje": "12.2025"}, ROW])
+    assert set(SCHEMA_DRIFT) == {"HepBalance", "HepConsumption"}
+
+    HepBalance.from_dict(BALANCE)
+    assert set(SCHEMA_DRIFT) == {"HepConsumption"}
+    HepConsumption.from_rows([ROW, {"razdoblje": "11.2025"}])
+    assert SCHEMA_DRIFT == {}
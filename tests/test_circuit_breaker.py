@@ -0,0 +1,145 @@
+"""Circuit breaker states and the single trial request while half open."""
+import asyncio
+import time
+
+import pytest
+
+from custom_components.hep.api import HepApiClient, HepCircuitBreaker, HepCircuitOpen
+from hep_simulator import HepSimulator
+
+KUPAC_ID = 500000
+RESET_TIMEOUT = 0.05
+
+
+def open_breaker() -> HepCircuitBreaker:
+    breaker = HepCircuitBreaker(failure_threshold=3, reset_timeout=RESET_TIMEOUT)
+    for _ in range(3):
+        breaker.record_failure()
+    return breaker
+
+
+def half_open_breaker() -> HepCircuitBreaker:
+    breaker = open_breaker()
+    breaker._opened_at -= RESET_TIMEOUT
+    return breaker
+
+
+async def in_task(func):
+    """Run func in a task of its own, like a concurrent caller."""
+    async def call():
+        return func()
+
+    return await asyncio.create_task(call())
+
+
+def test_opens_after_consecutive_failures():
+    breaker = HepCircuitBreaker(failure_threshold=3, reset_timeout=RESET_TIMEOUT)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(HepCircuitOpen):
+        asyncio.run(in_task(breaker.check))
+
+
+def test_half_open_after_reset_timeout():
+    breaker = open_breaker()
+    time.sleep(RESET_TIMEOUT)
+
+    assert breaker.state == "half_open"
+
+
+def test_half_open_admits_a_single_trial():
+    async def main():
+        breaker = half_open_breaker()
+        breaker.check()
+        # The trial task may send more requests, other callers fail fast
+        breaker.check()
+        with pytest.raises(HepCircuitOpen):
+            await in_task(breaker.check)
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("record, state", [("record_success", "closed"), ("record_failure", "open")])
+def test_trial_outcome_closes_or_reopens(record, state):
+    async def main():
+        breaker = half_open_breaker()
+        await in_task(breaker.check)
+        getattr(breaker, record)()
+        return breaker
+
+    assert asyncio.run(main()).state == state
+
+
+def test_trial_is_given_up_when_its_task_is_done():
+    async def main():
+        breaker = half_open_breaker()
+        # The trial task ends without reporting an outcome
+        await in_task(breaker.check)
+        await in_task(breaker.check)
+
+    asyncio.run(main())
+
+
+def test_trial_is_given_up_after_reset_timeout():
+    async def main():
+        breaker = half_open_breaker()
+        breaker.check()
+        await asyncio.sleep(RESET_TIMEOUT)
+        await in_task(breaker.check)
+
+    asyncio.run(main())
+
+
+def test_concurrent_calls_send_one_trial_request():
+    async def main():
+        simulator = HepSimulator(latency=0.01)
+        base_url = await simulator.start()
+        client = HepApiClient("kupac@example.com", "secret", base_url=base_url)
+        try:
+            await client.async_ensure_authenticated()
+            client._circuit_breaker = half_open_breaker()
+            simulator.reset_stats()
+
+            results = await asyncio.gather(*(client.get_prices() for _ in range(5)), return_exceptions=True)
+        finally:
+            await client.async_close()
+            await simulator.stop()
+
+        assert simulator.request_count == 1
+        assert sum(1 for result in results if isinstance(result, HepCircuitOpen)) == 4
+        assert client.circuit_breaker.state == "closed"
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("endpoint, fetch", [
+    ("cjenik", lambda client: client.get_prices()),
+    ("promet", lambda client: client.get_billing(KUPAC_ID)),
+    ("potrosnja", lambda client: client.get_consumption(KUPAC_ID)),
+    ("opomene", lambda client: client.get_warnings(KUPAC_ID)),
+])
+@pytest.mark.parametrize("status", [400, 404])
+def test_unexpected_status_is_no_result(endpoint, fetch, status):
+    async def main():
+        simulator = HepSimulator()
+        base_url = await simulator.start()
+        client = HepApiClient("kupac@example.com", "secret", base_url=base_url)
+        try:
+            simulator.statuses[endpoint] = status
+            # None, not an empty result, so the coordinator keeps the last good data
+            assert await fetch(client) is None
+            assert simulator.requests[endpoint] == 1
+            assert client.circuit_breaker.state == "closed"
+        finally:
+            await client.async_close()
+            await simulator.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""Streamed and buffered history responses, against the HEP simulator."""
+import asyncio
+import json
+
+import pytest
+
+from custom_components.hep import api
+from custom_components.hep.api import HepApiClient
+from custom_components.hep.models import HepBill, HepBillingInfo, HepConsumption
+from hep_simulator import HepSimulator, make_billing
+
+KUPAC_ID = 500000
+ROWS = 300
+
+
+def run(test, rows=ROWS, **client_options):
+    """Run test(simulator, client) against a simulator with rows rows of history."""
+    async def main():
+        simulator = HepSimulator(billing_rows=rows, consumption_rows=rows)
+        base_url = await simulator.start()
+        client = HepApiClient("kupac@example.com", "secret", base_url=base_url, **client_options)
+        try:
+            return await test(simulator, client)
+        finally:
+            await client.async_close()
+            await simulator.stop()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def built_bills(monkeypatch):
+    """Count the bill rows built from dicts."""
+    built = []
+    from_dict = HepBill.from_dict
+
+    def counting_from_dict(data):
+        built.append(data)
+        return from_dict(data)
+
+    monkeypatch.setattr(HepBill, "from_dict", counting_from_dict)
+    return built
+
+
+async def fetch(simulator, client):
+    return await client.get_billing(KUPAC_ID), await client.get_consumption(KUPAC_ID)
+
+
+def test_streamed_models_match_the_body():
+    async def test(simulator, client):
+        streamed = await fetch(simulator, client)
+        assert streamed == (
+            HepBillingInfo.from_dict(json.loads(simulator._billing[KUPAC_ID])),
+            HepConsumption.from_rows(json.loads(simulator._consumption)),
+        )
+        assert len(streamed[0].bills) == len(streamed[1]) == ROWS
+
+    run(test)
+
+
+def test_small_bodies_are_streamed_too(monkeypatch):
+    streamed = []
+    stream_history = HepApiClient._stream_history
+
+    async def counting_stream_history(self, url, response, history):
+        streamed.append(url)
+        return await stream_history(self, url, response, history)
+
+    monkeypatch.setattr(HepApiClient, "_stream_history", counting_stream_history)
+    billing, consumption = run(fetch, rows=2)
+
+    assert len(billing.bills) == len(consumption) == 2
+    assert len(streamed) == 2
+
+
+def test_unchanged_streamed_body_builds_no_rows(built_bills):
+    async def test(simulator, client):
+        first = await client.get_billing(KUPAC_ID)
+        built = len(built_bills)
+        second = await client.get_billing(KUPAC_ID)
+        assert second is first
+        assert built == ROWS
+        assert len(built_bills) == built
+
+    run(test)
+
+
+def test_changed_streamed_body_is_parsed():
+    async def test(simulator, client):
+        first = await client.get_billing(KUPAC_ID)
+        simulator._billing[KUPAC_ID] = json.dumps(make_billing(KUPAC_ID, rows=5)).encode()
+        second = await client.get_billing(KUPAC_ID)
+        assert len(first.bills) == ROWS
+        assert len(second.bills) == 5
+
+    run(test)
+
+
+def test_row_cap():
+    billing, consumption = run(fetch, history_max_rows=24)
+
+    assert len(billing.bills) == len(consumption) == 24
+    assert billing.bills[0].datum.startswith("2025-12")
+    assert billing.balance.opis == "Stanje računa"
+
+
+class FixedDate(api.date):
+    @classmethod
+    def today(cls):
+        return cls(2026, 2, 10)
+
+
+def test_history_months(monkeypatch):
+    monkeypatch.setattr(api, "date", FixedDate)
+    billing, consumption = run(fetch, history_months=6)
+
+    # September 2025 to February 2026; the simulator's history ends in December 2025
+    assert [bill.datum[:7] for bill in billing.bills] == ["2025-12", "2025-11", "2025-10", "2025-09"]
+    assert [row.razdoblje for row in consumption] == ["12.2025", "11.2025", "10.2025", "09.2025"]
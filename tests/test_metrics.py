@@ -0,0 +1,32 @@
+"""Request metrics and their listeners."""
+from custom_components.hep.metrics import HepRequestMetrics
+
+
+def test_records_latency_status_and_size():
+    metrics = HepRequestMetrics()
+    metrics.record("cjenik", 200, 0.12, 512)
+    metrics.record("cjenik", 500, 0.3)
+    metrics.record("cjenik", None, 10.0)
+    metrics.record_retry("cjenik")
+
+    summary = metrics.as_dict()["cjenik"]
+
+    assert summary["requests"] == 3
+    assert summary["failures"] == 2
+    assert summary["retries"] == 1
+    assert summary["status_codes"] == {"200": 1, "500": 1, "error": 1}
+    assert summary["last_latency_ms"] == 10000.0
+    assert summary["bytes_total"] == 512
+
+
+def test_listeners_are_told_which_endpoint_recorded():
+    metrics = HepRequestMetrics()
+    calls = []
+    remove = metrics.add_listener(calls.append)
+
+    metrics.record("omm_page", 200, 0.1)
+    metrics.record_retry("omm_check")
+    remove()
+    metrics.record("omm_submit", 200, 0.1)
+
+    assert calls == ["omm_page", "omm_check"]
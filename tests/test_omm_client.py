@@ -0,0 +1,66 @@
+"""OMM submissions through reused form tokens, against the HEP simulator."""
+import asyncio
+
+from custom_components.hep.api import HepOmmClient, HepRateLimiter
+from hep_simulator import HepSimulator
+
+OMM_ID = "1000001"
+# High enough never to delay
+UNLIMITED = HepRateLimiter(rate=10000.0, burst=10000)
+
+
+def run_with_client(test):
+    """Run test(simulator, client) against a fresh simulator."""
+    async def main():
+        simulator = HepSimulator()
+        await simulator.start()
+        client = HepOmmClient(OMM_ID, base_url=simulator.omm_url, rate_limiter=UNLIMITED)
+        try:
+            return await test(simulator, client)
+        finally:
+            await client.async_close()
+            await simulator.stop()
+
+    return asyncio.run(main())
+
+
+def test_tokens_are_reused_between_submissions():
+    async def test(simulator, client):
+        for day in (1, 2, 3):
+            result = await client.async_submit(f"0{day}.06.2026.", 26500, 12000)
+            assert result.status == 1 and result.posalji == 0
+        assert simulator.requests == {"omm_page": 1, "omm_check": 3, "omm_submit": 3}
+
+    run_with_client(test)
+
+
+def test_rejected_check_reloads_the_page_once():
+    async def test(simulator, client):
+        await client.async_submit("01.06.2026.", 26500, 12000)
+        simulator.expire_omm_tokens()
+        simulator.reset_stats()
+
+        result = await client.async_submit("02.06.2026.", 26500, 12000)
+
+        assert result.status == 1
+        assert simulator.requests == {"omm_check": 2, "omm_page": 1, "omm_submit": 1}
+
+    run_with_client(test)
+
+
+def test_failed_submission_is_not_sent_again():
+    async def test(simulator, client):
+        await client.async_submit("01.06.2026.", 26500, 12000)
+        # The check still passes, the submission gets the error page
+        client._delivery_form_token = "stale"
+        simulator.reset_stats()
+
+        result = await client.async_submit("02.06.2026.", 26500, 12000)
+
+        assert result is None
+        assert simulator.requests == {"omm_check": 1, "omm_submit": 1}
+        # The next submission starts from a fresh page
+        assert not client.has_tokens
+        assert (await client.async_submit("02.06.2026.", 26500, 12000)).status == 1
+
+    run_with_client(test)
@@ -0,0 +1,71 @@
+"""Login session reuse of HepApiClient, against the HEP simulator."""
+import asyncio
+
+from custom_components.hep.api import HepApiClient
+from hep_simulator import HepSimulator
+
+KUPAC_ID = 500000
+
+
+def run_with_client(test):
+    """Run test(simulator, client) against a fresh simulator."""
+    async def main():
+        simulator = HepSimulator()
+        base_url = await simulator.start()
+        client = HepApiClient("kupac@example.com", "secret", base_url=base_url)
+        try:
+            return await test(simulator, client)
+        finally:
+            await client.async_close()
+            await simulator.stop()
+
+    return asyncio.run(main())
+
+
+def test_login_is_reused_across_refreshes():
+    async def test(simulator, client):
+        for _ in range(3):
+            assert await client.async_ensure_authenticated()
+            await client.get_billing(KUPAC_ID)
+            await client.get_prices()
+        assert simulator.requests["prijava"] == 1
+        assert simulator.requests["promet"] == 3
+
+    run_with_client(test)
+
+
+def test_concurrent_callers_share_one_login():
+    async def test(simulator, client):
+        results = await asyncio.gather(*(client.async_ensure_authenticated() for _ in range(5)))
+        assert all(results)
+        assert simulator.requests["prijava"] == 1
+
+    run_with_client(test)
+
+
+def test_rejected_session_logs_in_again_once():
+    async def test(simulator, client):
+        await client.async_ensure_authenticated()
+        # Data requests on the old session are answered with 401
+        simulator.expire_api_session()
+
+        billing = await client.get_billing(KUPAC_ID)
+
+        assert billing.bills
+        assert simulator.requests["prijava"] == 2
+        assert simulator.requests["promet"] == 2
+
+    run_with_client(test)
+
+
+def test_invalidated_session_logs_in_again():
+    async def test(simulator, client):
+        await client.async_ensure_authenticated()
+        client.invalidate_session()
+
+        assert not client.is_session_valid
+        assert await client.async_ensure_authenticated()
+        assert client.is_session_valid
+        assert simulator.requests["prijava"] == 2
+
+    run_with_client(test)
@@ -0,0 +1,124 @@
+"""Snapshot cache serialization and loading."""
+import asyncio
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.hep import store
+from custom_components.hep.models import (
+    HepAccountSnapshot,
+    HepBillingInfo,
+    HepConsumption,
+    HepPrices,
+    HepPriceTable,
+    HepSnapshot,
+    HepUser,
+    HepWarning,
+    HepWarningIndex,
+)
+from hep_simulator import make_billing, make_consumption, make_prices, make_user, make_warnings
+
+UPDATED_AT = datetime(2026, 6, 1, 12, 30, tzinfo=timezone.utc)
+
+
+class FakeStore:
+    """In-memory stand-in for homeassistant.helpers.storage.Store."""
+
+    def __init__(self, data=None, error=None):
+        self.data = data
+        self.error = error
+
+    async def async_load(self):
+        if self.error:
+            raise self.error
+        return self.data
+
+
+@pytest.fixture(autouse=True)
+def dt_util(monkeypatch):
+    monkeypatch.setattr(store, "dt_util", SimpleNamespace(
+        parse_datetime=datetime.fromisoformat,
+        get_time_zone=lambda _name: timezone.utc,
+        DEFAULT_TIME_ZONE=timezone.utc,
+    ))
+
+
+def make_snapshot() -> HepSnapshot:
+    user = HepUser.from_dict(make_user(accounts=2))
+    prices = HepPrices.from_dict(make_prices())
+    warnings = HepWarning.from_rows(make_warnings(2))
+    first, second = user.accounts
+    accounts = {
+        first.kupac_id: HepAccountSnapshot(
+            account=first,
+            billing=HepBillingInfo.from_dict(make_billing(first.kupac_id)),
+            consumption=HepConsumption.from_rows(make_consumption()),
+            warnings=warnings,
+            warning_index=HepWarningIndex.from_warnings(warnings, timezone.utc),
+            price_table=HepPriceTable.resolve(prices, first.tarifni_model),
+            updated_at=UPDATED_AT,
+        ),
+        # Not fetched yet
+        second.kupac_id: HepAccountSnapshot(
+            account=second,
+            billing=None,
+            consumption=None,
+            warnings=None,
+            warning_index=None,
+            price_table=HepPriceTable.resolve(prices, second.tarifni_model),
+            updated_at=UPDATED_AT,
+        ),
+    }
+    return HepSnapshot(user=user, prices=prices, accounts=accounts, updated_at=UPDATED_AT)
+
+
+def test_snapshot_round_trip():
+    snapshot = make_snapshot()
+    # Through JSON, as HA storage writes it
+    data = json.loads(json.dumps(store.snapshot_to_dict(snapshot)))
+
+    restored = store.snapshot_from_dict(data, timezone.utc)
+
+    assert restored.from_cache
+    assert restored.user == snapshot.user
+    assert restored.prices == snapshot.prices
+    assert restored.updated_at == snapshot.updated_at
+    assert restored.accounts == snapshot.accounts
+
+
+def test_price_tables_are_shared_between_accounts_of_a_tariff_model():
+    restored = store.snapshot_from_dict(store.snapshot_to_dict(make_snapshot()), timezone.utc)
+
+    first, second = restored.accounts.values()
+    assert first.price_table is second.price_table
+
+
+def test_snapshot_with_different_fields_is_discarded():
+    data = store.snapshot_to_dict(make_snapshot())
+    data["fields"]["bill"] = data["fields"]["bill"][:-1]
+
+    assert store.snapshot_from_dict(data, timezone.utc) is None
+
+
+@pytest.mark.parametrize("fake", [
+    FakeStore(),
+    FakeStore(error=ValueError("corrupt")),
+    FakeStore({"fields": {}, "user": None}),
+    FakeStore({"fields": store._row_fields(), "user": {}}),
+])
+def test_unusable_cache_loads_as_none(fake):
+    snapshot_store = store.HepSnapshotStore(MagicMock(), "entry")
+    snapshot_store._store = fake
+
+    assert asyncio.run(snapshot_store.async_load()) is None
+
+
+def test_cache_loads():
+    snapshot = make_snapshot()
+    snapshot_store = store.HepSnapshotStore(MagicMock(), "entry")
+    snapshot_store._store = FakeStore(store.snapshot_to_dict(snapshot))
+
+    assert asyncio.run(snapshot_store.async_load()).accounts == snapshot.accounts
@@ -0,0 +1,150 @@
+"""Incremental parsing of responses fed in chunks of every size."""
+import json
+
+import pytest
+
+from custom_components.hep.streaming import FormTokenScanner, JsonArrayStream
+from hep_simulator import make_omm_page
+
+ITEMS = [
+    {"razdoblje": "12.2025", "tarifa1": 210, "tarifa2": -95, "saldo": 12.5, "iznos": 1e3, "mali": 2.5E-2},
+    {"opis": "Račun za električnu energiju", "escaped": "\"quoted\" \\ ☃ 💡", "status": None},
+    {"nested": {"list": [1, [2, 3], {"a": []}], "flags": [True, False, None]}},
+    12.5,
+    -0.75e+2,
+    0,
+    "Plaćeno",
+    [],
+    {},
+]
+
+
+CHECK_FORM = "Provjera_Omm_Form_Div"
+DELIVERY_FORM = "Dostava_Omm_Div"
+
+
+def chunked(data: bytes, size: int):
+    return [data[index:index + size] for index in range(0, len(data), size)]
+
+
+def parse(data: bytes, size: int, key=None):
+    """Feed data in chunks of size, returning the elements and the stream."""
+    stream = JsonArrayStream(key)
+    items = []
+    for chunk in chunked(data, size):
+        items.extend(stream.feed(chunk))
+    items.extend(stream.close())
+    return items, stream
+
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+def test_array_in_chunks_of_every_size(separators):
+    data = json.dumps(ITEMS, ensure_ascii=False, separators=separators).encode()
+    for size in range(1, len(data) + 1):
+        items, stream = parse(data, size)
+        assert items == ITEMS, f"chunk size {size}"
+        assert stream.done
+
+
+def test_object_member_in_chunks_of_every_size():
+    document = {"saldo": {"iznos": 42.17, "opis": "Stanje"}, "promet": ITEMS, "ukupno": -1.5e1}
+    data = json.dumps(document, ensure_ascii=False, indent=1).encode()
+    for size in range(1, len(data) + 1):
+        items, stream = parse(data, size, key="promet")
+        assert items == ITEMS, f"chunk size {size}"
+        assert stream.members == {"saldo": document["saldo"], "ukupno": -15.0}
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    ([b"[12.", b"5]"], [12.5]),
+    ([b"[1e", b"3]"], [1000.0]),
+    ([b"[1E+", b"3]"], [1000.0]),
+    ([b"[-", b"2.5e-", b"1]"], [-0.25]),
+    ([b"[12", b".5,1", b"0]"], [12.5, 10]),
+    ([b"[tr", b"ue,nu", b"ll]"], [True, None]),
+])
+def test_values_split_across_chunks(chunks, expected):
+    stream = JsonArrayStream()
+    items = []
+    for chunk in chunks:
+        items.extend(stream.feed(chunk))
+    items.extend(stream.close())
+
+    assert items == expected
+
+
+def test_elements_are_yielded_as_soon_as_they_are_complete():
+    stream = JsonArrayStream()
+
+    assert list(stream.feed(b'[{"a": 1}, {"b"')) == [{"a": 1}]
+    assert list(stream.feed(b': 2}, 3')) == [{"b": 2}]
+    assert list(stream.feed(b"]")) == [3]
+
+
+def test_empty_array_and_object():
+    assert parse(b" [ ] ", 1)[0] == []
+    items, stream = parse(b'{"saldo": {}}', 3, key="promet")
+    assert items == []
+    assert stream.members == {"saldo": {}}
+
+
+@pytest.mark.parametrize("data, key", [
+    (b"[1, 2", None),
+    (b"[1, 2.", None),
+    (b"[1 2]", None),
+    (b"[1, 2] 3", None),
+    (b"{1: 2}", None),
+    (b'{"promet": [1]', "promet"),
+    (b'{"promet": [1], "saldo" 2}', "promet"),
+    (b'{"promet": [1]}', None),
+])
+def test_malformed_documents_raise(data, key):
+    for size in (1, 2, len(data)):
+        with pytest.raises(ValueError):
+            parse(data, size, key=key)
+
+
+def token_input(token: str) -> str:
+    return f'<input name="__RequestVerificationToken" type="hidden" value="{token}" />'
+
+
+def scan(page: bytes, size: int, *element_ids):
+    """Feed page in chunks of size until the scanner is done; returns it and the bytes fed."""
+    scanner = FormTokenScanner(*element_ids)
+    fed = 0
+    for chunk in chunked(page, size):
+        fed += len(chunk)
+        if scanner.feed(chunk):
+            break
+    return scanner, fed
+
+
+def test_form_tokens_in_chunks_of_every_size():
+    page = make_omm_page("1000001", "check-token", "delivery-token", size=0)
+    last_token_end = page.index(b"delivery-token") + len(b"delivery-token") + 1
+    for size in range(1, len(page) + 1):
+        scanner, fed = scan(page, size, CHECK_FORM, DELIVERY_FORM)
+        assert scanner.tokens == {CHECK_FORM: "check-token", DELIVERY_FORM: "delivery-token"}, f"chunk size {size}"
+        # Done with the chunk holding the end of the last token, not later
+        assert fed - size < last_token_end <= fed
+
+
+def test_form_tokens_before_an_element_are_ignored():
+    page = (
+        token_input("login-token")
+        + f'<div id="{DELIVERY_FORM}">' + token_input("delivery-token") + "</div>"
+        + f'<div id="{CHECK_FORM}"><p>no token here</p></div>'
+        + token_input("check-token")
+    ).encode()
+    for size in range(1, len(page) + 1):
+        scanner, _ = scan(page, size, CHECK_FORM, DELIVERY_FORM)
+        assert scanner.tokens == {CHECK_FORM: "check-token", DELIVERY_FORM: "delivery-token"}, f"chunk size {size}"
+
+
+def test_missing_form_token():
+    page = (f'<div id="{CHECK_FORM}">' + token_input("check-token") + f'</div><div id="{DELIVERY_FORM}"></div>').encode()
+    for size in range(1, len(page) + 1):
+        scanner, fed = scan(page, size, CHECK_FORM, DELIVERY_FORM)
+        assert not scanner.done
+        assert fed == len(page)
+        assert scanner.tokens == {CHECK_FORM: "check-token"}
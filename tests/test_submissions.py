@@ -0,0 +1,278 @@
+"""Durable OMM submission queue, with stand-ins for HA storage and the OMM client registry."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.hep import submissions
+from custom_components.hep.const import (
+    OMM_QUEUE_IDLE,
+    OMM_QUEUE_OK,
+    OMM_QUEUE_RETRYING,
+    OMM_QUEUE_RETRY_BASE,
+    OMM_QUEUE_RETRY_MAX,
+    OMM_QUEUE_SUBMITTED_TTL,
+    OMM_RESULT_ACCEPTED,
+    OMM_RESULT_FAILED,
+    OMM_RESULT_NEEDS_FORCE,
+)
+from custom_components.hep.models import HepOmmSubmission
+from custom_components.hep.submissions import HepSubmissionQueue, _retry_delay
+
+
+class FakeStore:
+    """In-memory stand-in for homeassistant.helpers.storage.Store."""
+
+    def __init__(self, data=None, error=None):
+        self.data = data
+        self.error = error
+        self.saves = 0
+
+    async def async_load(self):
+        if self.error:
+            raise self.error
+        return self.data
+
+    async def async_save(self, data):
+        self.data = data
+        self.saves += 1
+
+    async def async_remove(self):
+        self.data = None
+
+
+class FakeRegistry:
+    """Answers every reading with the result of outcome(omm_id, tarifa1), recording what was sent."""
+
+    def __init__(self, outcome=lambda omm_id, tarifa1: OMM_RESULT_ACCEPTED):
+        self.outcome = outcome
+        self.sent = []
+        self.during_submit = None
+
+    async def async_submit_batch(self, readings, reading_date):
+        self.sent.extend((reading_date, *reading) for reading in readings)
+        if self.during_submit:
+            await self.during_submit()
+        return [
+            HepOmmSubmission(omm_id, self.outcome(omm_id, tarifa1), "opis")
+            for omm_id, tarifa1, _tarifa2, _force in readings
+        ]
+
+
+class FakeHass:
+    def async_create_background_task(self, target, name):
+        return asyncio.get_running_loop().create_task(target, name=name)
+
+
+@pytest.fixture(autouse=True)
+def ha_helpers(monkeypatch):
+    """Real clock, and retries recorded instead of scheduled."""
+    retries = []
+
+    def async_call_later(_hass, delay, action):
+        retries.append((delay, action))
+        return lambda: retries.remove((delay, action))
+
+    monkeypatch.setattr(submissions, "dt_util", SimpleNamespace(utcnow=lambda: datetime.now(timezone.utc)))
+    monkeypatch.setattr(submissions, "async_call_later", async_call_later)
+    return retries
+
+
+def make_queue(registry, store=None) -> HepSubmissionQueue:
+    queue = HepSubmissionQueue(FakeHass(), lambda: registry)
+    queue._store = store if store is not None else FakeStore()
+    return queue
+
+
+async def flushed(queue):
+    """Wait for the background flush in progress, if any."""
+    while queue._flush_task is not None:
+        await queue._flush_task
+
+
+def test_queued_readings_are_stored_and_submitted():
+    async def main():
+        registry = FakeRegistry(lambda omm_id, tarifa1: OMM_RESULT_NEEDS_FORCE if omm_id == "2" else OMM_RESULT_ACCEPTED)
+        queue = make_queue(registry)
+        changes = []
+        queue.async_add_listener(lambda: changes.append(len(queue)))
+
+        await queue.async_enqueue("1", "01.06.2026.", 26500, 12000)
+        # Stored before it is submitted
+        assert queue._store.data["readings"][0]["omm_id"] == "1"
+        await queue.async_enqueue("2", "01.06.2026.", 26500, 12000, force_send=True)
+        await flushed(queue)
+        return queue, registry, changes
+
+    queue, registry, changes = asyncio.run(main())
+
+    assert len(queue) == 0
+    assert queue._store.data["readings"] == []
+    assert set(queue._store.data["submitted"]) == {"1/01.06.2026."}
+    assert queue.status == OMM_QUEUE_OK
+    assert sorted(registry.sent) == [("01.06.2026.", "1", 26500, 12000, False), ("01.06.2026.", "2", 26500, 12000, True)]
+    # Any answer from HEP takes a reading off the queue
+    assert {result["omm_id"]: result["result"] for result in queue.last_results}.get("2") == OMM_RESULT_NEEDS_FORCE
+    assert changes[-1] == 0
+
+
+def test_failed_readings_stay_queued_and_are_retried(ha_helpers):
+    async def main():
+        registry = FakeRegistry(lambda omm_id, tarifa1: OMM_RESULT_FAILED)
+        queue = make_queue(registry)
+        await queue.async_enqueue("1", "01.06.2026.", 26500, 12000)
+        await flushed(queue)
+
+        reading = queue.readings[0]
+        assert (reading["attempts"], reading["last_error"]) == (1, "opis")
+        assert queue.status == OMM_QUEUE_RETRYING
+        assert queue.failed_flushes == 1
+        assert queue.next_flush_at is not None
+        assert queue._store.data["readings"] == [reading]
+        (delay, retry), = ha_helpers
+        assert OMM_QUEUE_RETRY_BASE / 2 <= delay <= OMM_QUEUE_RETRY_BASE
+
+        # HEP is back when the retry fires
+        registry.outcome = lambda omm_id, tarifa1: OMM_RESULT_ACCEPTED
+        ha_helpers.clear()
+        retry(None)
+        await flushed(queue)
+        return queue
+
+    queue = asyncio.run(main())
+
+    assert len(queue) == 0
+    assert queue.status == OMM_QUEUE_OK
+    assert queue.failed_flushes == 0
+    assert queue.next_flush_at is None
+
+
+def test_reading_of_the_same_omm_and_date_replaces_the_waiting_one():
+    async def main():
+        registry = FakeRegistry(lambda omm_id, tarifa1: OMM_RESULT_FAILED)
+        queue = make_queue(registry)
+        await queue.async_enqueue("1", "01.06.2026.", 26500, 12000)
+        await queue.async_enqueue("1", "02.06.2026.", 26500, 12000)
+        await queue.async_enqueue("1", "01.06.2026.", 26600, 12000)
+        await flushed(queue)
+        return queue
+
+    queue = asyncio.run(main())
+
+    assert [(reading["reading_date"], reading["tarifa1"]) for reading in queue.readings] == [
+        ("01.06.2026.", 26600),
+        ("02.06.2026.", 26500),
+    ]
+
+
+@pytest.mark.parametrize("force_send, sent", [(False, [26500]), (True, [26500, 26600])])
+def test_reading_replaced_during_a_flush_is_sent_only_if_forced(force_send, sent):
+    async def main():
+        registry = FakeRegistry()
+        queue = make_queue(registry)
+
+        async def replace():
+            registry.during_submit = None
+            await queue.async_enqueue("1", "01.06.2026.", 26600, 12000, force_send=force_send)
+
+        registry.during_submit = replace
+        await queue.async_enqueue("1", "01.06.2026.", 26500, 12000)
+        await flushed(queue)
+        return queue, registry
+
+    queue, registry = asyncio.run(main())
+
+    assert [reading[2] for reading in registry.sent] == sent
+    assert len(queue) == 0
+
+
+def test_accepted_reading_is_not_queued_again_unless_forced():
+    async def main():
+        store = FakeStore()
+        registry = FakeRegistry()
+        queue = make_queue(registry, store)
+        assert await queue.async_enqueue("1", "01.06.2026.", 26500, 12000)
+        await flushed(queue)
+
+        # Also after a restart
+        queue = make_queue(registry, store)
+        await queue.async_load()
+        assert not await queue.async_enqueue("1", "01.06.2026.", 26600, 12000)
+        assert len(queue) == 0
+        assert await queue.async_enqueue("1", "02.06.2026.", 26600, 12000)
+        await flushed(queue)
+        assert await queue.async_enqueue("1", "01.06.2026.", 26700, 12000, force_send=True)
+        await flushed(queue)
+        return registry
+
+    registry = asyncio.run(main())
+
+    assert [(reading[0], reading[2]) for reading in registry.sent] == [
+        ("01.06.2026.", 26500),
+        ("02.06.2026.", 26600),
+        ("01.06.2026.", 26700),
+    ]
+
+
+def test_reading_hep_did_not_accept_can_be_queued_again():
+    async def main():
+        registry = FakeRegistry(lambda omm_id, tarifa1: OMM_RESULT_NEEDS_FORCE)
+        queue = make_queue(registry)
+        await queue.async_enqueue("1", "01.06.2026.", 26500, 12000)
+        await flushed(queue)
+        return await queue.async_enqueue("1", "01.06.2026.", 26600, 12000)
+
+    assert asyncio.run(main())
+
+
+def test_accepted_readings_are_forgotten_after_a_while():
+    accepted_at = datetime.now(timezone.utc) - timedelta(seconds=OMM_QUEUE_SUBMITTED_TTL + 60)
+    store = FakeStore({"readings": [], "submitted": {"1/01.06.2026.": accepted_at.isoformat()}})
+
+    async def main():
+        queue = make_queue(FakeRegistry(), store)
+        await queue.async_load()
+        return await queue.async_enqueue("1", "01.06.2026.", 26500, 12000)
+
+    assert asyncio.run(main())
+
+
+def test_stored_readings_are_flushed_after_a_restart():
+    async def main():
+        store = FakeStore()
+        await make_queue(FakeRegistry(lambda omm_id, tarifa1: OMM_RESULT_FAILED), store).async_enqueue(
+            "1", "01.06.2026.", 26500, 12000
+        )
+
+        registry = FakeRegistry()
+        queue = make_queue(registry, store)
+        await queue.async_load()
+        await flushed(queue)
+        return queue, registry
+
+    queue, registry = asyncio.run(main())
+
+    assert registry.sent == [("01.06.2026.", "1", 26500, 12000, False)]
+    assert len(queue) == 0
+
+
+@pytest.mark.parametrize("store", [FakeStore(), FakeStore(error=ValueError("corrupt"))])
+def test_empty_or_unreadable_store_loads_an_idle_queue(store):
+    async def main():
+        queue = make_queue(FakeRegistry(), store)
+        await queue.async_load()
+        return queue
+
+    queue = asyncio.run(main())
+
+    assert len(queue) == 0
+    assert queue.status == OMM_QUEUE_IDLE
+    assert queue._flush_task is None
+
+
+def test_retry_delay_backs_off_up_to_the_maximum():
+    for failed_flushes in range(1, 20):
+        delay = min(OMM_QUEUE_RETRY_MAX, OMM_QUEUE_RETRY_BASE * 2 ** (failed_flushes - 1))
+        assert delay / 2 <= _retry_delay(failed_flushes) <= delay
+    assert _retry_delay(20) <= OMM_QUEUE_RETRY_MAX
@@ -0,0 +1,59 @@
+"""Request phase traces, against the HEP simulator."""
+import asyncio
+
+from custom_components.hep.api import HepApiClient, HepOmmClient
+from custom_components.hep.tracing import HepRequestTracer
+from hep_simulator import API_PREFIX, HepSimulator
+
+OMM_ID = "1000001"
+
+
+def test_traces_keep_identifiers_out_of_urls():
+    async def main():
+        simulator = HepSimulator()
+        base_url = await simulator.start()
+        tracer = HepRequestTracer()
+        client = HepApiClient("kupac@example.com", "secret", base_url=base_url, tracer=tracer)
+        try:
+            user = await client.get_data()
+            await client.get_billing(user.accounts[0].kupac_id)
+        finally:
+            await client.async_close()
+            await simulator.stop()
+        return simulator.omm_url, tracer.as_list()
+
+    origin, traces = asyncio.run(main())
+
+    assert [trace["url"] for trace in traces] == [
+        f"{origin}{API_PREFIX}/korisnik/prijava",
+        f"{origin}{API_PREFIX}/promet/{{id}}",
+    ]
+    assert all(trace["status"] == 200 and trace["total_ms"] is not None for trace in traces)
+
+
+def test_streamed_bodies_are_traced():
+    async def main():
+        simulator = HepSimulator()
+        base_url = await simulator.start()
+        tracer = HepRequestTracer()
+        client = HepApiClient("kupac@example.com", "secret", base_url=base_url, tracer=tracer)
+        omm_client = HepOmmClient(OMM_ID, tracer=tracer, base_url=simulator.omm_url)
+        try:
+            user = await client.get_data()
+            tracer.clear()
+            await client.get_billing(user.accounts[0].kupac_id)
+            await omm_client.initialize()
+        finally:
+            await client.async_close()
+            await omm_client.async_close()
+            await simulator.stop()
+        return tracer.as_list()
+
+    billing, page = asyncio.run(main())
+
+    assert billing["url"].endswith("/promet/{id}")
+    assert page["url"].endswith("/Dostava/{id}")
+    for trace in (billing, page):
+        assert trace["body_ms"] is not None
+        assert trace["body_bytes"] > 0
+        assert trace["total_ms"] >= trace["body_ms"]